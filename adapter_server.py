@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Multi-Adapter Serving for Per-Tenant Fine-Tunes
+Loads the base model once and keeps several tenant LoRA adapters resident,
+switching between them per request (or mixing them in one batch), with an
+LRU limit on how many adapters stay loaded.
+
+Adapters are discovered as <root>/<tenant>/adapter_config.json, i.e. each
+tenant's phi2-qlora style output directory under a shared root.
+
+Usage:
+    python adapter_server.py --bench    # tiny base + synthetic adapters, CPU only
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from bench_utils import rss_mb
+from chat_format import encode_prompt
+from generation import DEFAULT_STOP_SEQUENCES, make_stop_criteria, truncate_at_stop
+
+
+def discover_adapters(root: str) -> Dict[str, str]:
+    """Map tenant name -> adapter directory for every adapter under root"""
+    adapters = {}
+    if os.path.isdir(root):
+        for name in sorted(os.listdir(root)):
+            path = os.path.join(root, name)
+            if os.path.exists(os.path.join(path, "adapter_config.json")):
+                adapters[name] = path
+    return adapters
+
+
+class MultiAdapterModel:
+    def __init__(self, base_model, tokenizer, adapter_paths: Dict[str, str], max_loaded: int = 4):
+        if max_loaded < 1:
+            raise ValueError("max_loaded must be at least 1")
+        self.base_model = base_model
+        self.tokenizer = tokenizer
+        self.adapter_paths = dict(adapter_paths)
+        self.max_loaded = max_loaded
+
+        self.model = None  # PeftModel, created with the first adapter
+        self.loaded: "OrderedDict[str, None]" = OrderedDict()  # least recently used first
+        # The active adapter is model-wide state, so switching and generating are serialized
+        self._lock = threading.RLock()
+
+        self.stats = {"loads": 0, "evictions": 0, "switches": 0}
+
+    def _ensure_loaded(self, tenants: List[str]):
+        """Load any missing adapters for `tenants`, evicting the least recently used ones"""
+        from peft import PeftModel
+
+        if len(set(tenants)) > self.max_loaded:
+            raise ValueError(f"A batch can mix at most {self.max_loaded} adapters")
+
+        for tenant in tenants:
+            if tenant in self.loaded:
+                self.loaded.move_to_end(tenant)
+                continue
+            if tenant not in self.adapter_paths:
+                raise KeyError(f"No adapter registered for tenant '{tenant}'")
+
+            if self.model is None:
+                self.model = PeftModel.from_pretrained(self.base_model, self.adapter_paths[tenant],
+                                                       adapter_name=tenant).eval()
+            else:
+                self.model.load_adapter(self.adapter_paths[tenant], adapter_name=tenant)
+            self.loaded[tenant] = None
+            self.stats["loads"] += 1
+
+        while len(self.loaded) > self.max_loaded:
+            victim = next(t for t in self.loaded if t not in tenants)
+            if self.model.active_adapter == victim:
+                self.model.set_adapter(tenants[-1])
+            self.model.delete_adapter(victim)
+            del self.loaded[victim]
+            self.stats["evictions"] += 1
+
+    def _generate(self, questions: List[str], max_new_tokens: int,
+                  stop_sequences: Optional[Sequence[str]] = DEFAULT_STOP_SEQUENCES, **kwargs) -> List[str]:
+        """Answers for a batch of questions, stopping each row at the next turn marker"""
+        import torch
+        from transformers import StoppingCriteriaList
+
+        # Left-pad here rather than through tokenizer.padding_side, which is shared state
+        prompts = [encode_prompt(self.tokenizer, q) for q in questions]
+        width = max(len(p) for p in prompts)
+        pad_id = self.tokenizer.pad_token_id if self.tokenizer.pad_token_id is not None else self.tokenizer.eos_token_id
+        input_ids = torch.tensor([[pad_id] * (width - len(p)) + p for p in prompts], device=self.model.device)
+        attention_mask = torch.tensor([[0] * (width - len(p)) + [1] * len(p) for p in prompts],
+                                      device=self.model.device)
+
+        kwargs.setdefault("pad_token_id", self.tokenizer.eos_token_id)
+        if stop_sequences:
+            kwargs["stopping_criteria"] = StoppingCriteriaList(
+                [make_stop_criteria(self.tokenizer, stop_sequences, width)])
+        with torch.no_grad():
+            output = self.model.generate(input_ids=input_ids, attention_mask=attention_mask,
+                                         max_new_tokens=max_new_tokens, **kwargs)
+        texts = self.tokenizer.batch_decode(output[:, width:], skip_special_tokens=True)
+        if stop_sequences:
+            texts = [truncate_at_stop(t, stop_sequences) for t in texts]
+        return [t.strip() for t in texts]
+
+    def answer(self, tenant: str, question: str, max_new_tokens: int = 100, **kwargs) -> str:
+        """Answer one question with the tenant's adapter"""
+        with self._lock:
+            self._ensure_loaded([tenant])
+            if self.model.active_adapter != tenant:
+                self.model.set_adapter(tenant)
+                self.stats["switches"] += 1
+            return self._generate([question], max_new_tokens, **kwargs)[0]
+
+    def answer_batch(self, requests: List[Tuple[str, str]], max_new_tokens: int = 100, **kwargs) -> List[str]:
+        """Answer (tenant, question) pairs in one batch, each row using its own adapter"""
+        with self._lock:
+            tenants = [tenant for tenant, _ in requests]
+            self._ensure_loaded(list(dict.fromkeys(tenants)))
+            # PEFT routes each row through its own adapter when adapter_names is given
+            return self._generate([question for _, question in requests], max_new_tokens,
+                                  adapter_names=tenants, **kwargs)
+
+
+def make_synthetic_adapters(base_model, root: str, tenants: int, r: int = 8) -> Dict[str, str]:
+    """Save `tenants` randomly initialized LoRA adapters for the tiny model under root"""
+    import copy
+
+    import torch
+    from peft import LoraConfig, get_peft_model
+
+    paths = {}
+    for i in range(tenants):
+        torch.manual_seed(i)
+        config = LoraConfig(r=r, lora_alpha=16, target_modules=["c_attn"], fan_in_fan_out=True,
+                            init_lora_weights=False, task_type="CAUSAL_LM")
+        peft_model = get_peft_model(copy.deepcopy(base_model), config)
+        path = os.path.join(root, f"tenant{i:02d}")
+        peft_model.save_pretrained(path)
+        paths[f"tenant{i:02d}"] = path
+    return paths
+
+
+def benchmark(tenants: int = 8, max_loaded: int = 4, questions_per_tenant: int = 3, max_new_tokens: int = 16):
+    from tiny_lm import load_tiny_lm
+    from slm_data import QA_PAIRS
+
+    root = tempfile.mkdtemp(prefix="adapters_")
+    try:
+        base_model, tokenizer = load_tiny_lm(n_layer=4, n_embd=256, n_head=4)
+        adapter_paths = make_synthetic_adapters(base_model, root, tenants)
+        base_mb = sum(p.numel() * p.element_size() for p in base_model.parameters()) / 2**20
+
+        rss_start = rss_mb()
+        server = MultiAdapterModel(base_model, tokenizer, adapter_paths, max_loaded=max_loaded)
+        gen = dict(do_sample=False, min_new_tokens=max_new_tokens)
+
+        print(f"📦 Base model {base_mb:.1f} MB; {tenants} tenants, LRU limit {max_loaded}\n")
+        print(f"{'tenant':<10}{'cold ms':>9}{'warm ms':>9}{'RSS +MB':>9}")
+        for tenant in adapter_paths:
+            before = rss_mb()
+            start = time.perf_counter()
+            server.answer(tenant, QA_PAIRS[0]["prompt"], max_new_tokens, **gen)
+            cold = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            for qa in QA_PAIRS[1:1 + questions_per_tenant]:
+                server.answer(tenant, qa["prompt"], max_new_tokens, **gen)
+            warm = (time.perf_counter() - start) * 1000 / questions_per_tenant
+            print(f"{tenant:<10}{cold:>9.1f}{warm:>9.1f}{rss_mb() - before:>9.1f}")
+
+        # Round-robin over the resident adapters: switching only, no loads
+        resident = list(server.loaded)
+        start = time.perf_counter()
+        for i in range(len(resident) * questions_per_tenant):
+            server.answer(resident[i % len(resident)], QA_PAIRS[i % len(QA_PAIRS)]["prompt"], max_new_tokens, **gen)
+        switched = (time.perf_counter() - start) * 1000 / (len(resident) * questions_per_tenant)
+
+        # The same requests mixed into one batch
+        batch = [(resident[i % len(resident)], QA_PAIRS[i % len(QA_PAIRS)]["prompt"])
+                 for i in range(len(resident) * questions_per_tenant)]
+        start = time.perf_counter()
+        server.answer_batch(batch, max_new_tokens, **gen)
+        batched = (time.perf_counter() - start) * 1000 / len(batch)
+
+        print(f"\n🔁 Switching between resident adapters: {switched:.1f} ms/request")
+        print(f"🧺 Mixed-adapter batch of {len(batch)}: {batched:.1f} ms/request")
+        print(f"💾 RSS growth for all tenants: {rss_mb() - rss_start:.1f} MB "
+              f"(vs ~{base_mb * tenants:.1f} MB for {tenants} model copies)")
+        print(f"📊 Loads {server.stats['loads']}, evictions {server.stats['evictions']}, "
+              f"switches {server.stats['switches']}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve several tenant LoRA adapters on one base model")
+    parser.add_argument("--bench", action="store_true", help="benchmark with tiny synthetic adapters")
+    parser.add_argument("--tenants", type=int, default=8)
+    parser.add_argument("--max-loaded", type=int, default=4)
+    parser.add_argument("--adapters-root", default="adapters", help="directory of <tenant>/ adapters")
+    parser.add_argument("--tenant")
+    parser.add_argument("question", nargs="*")
+    args = parser.parse_args()
+
+    print("👥 Multi-Adapter Serving")
+    print("=" * 50)
+    if args.bench:
+        benchmark(args.tenants, args.max_loaded)
+        return
+
+    from slm_chatbot import default_backend, load_model
+
+    adapters = discover_adapters(args.adapters_root)
+    if not adapters:
+        print(f"❌ No adapters found under {args.adapters_root}/")
+        return
+    # LoRA layers can't wrap torch's dynamically quantized Linear, so int8 falls back to fp32
+    backend = "cpu-fp32" if default_backend() == "cpu-int8" else default_backend()
+    base_model, tokenizer = load_model(adapter_dir=None, backend=backend)
+    server = MultiAdapterModel(base_model, tokenizer, adapters, args.max_loaded)
+    tenant = args.tenant or next(iter(adapters))
+    question = " ".join(args.question) or "What does your company do?"
+    print(f"👤 [{tenant}] {question}")
+    print(f"🤖 {server.answer(tenant, question)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,9 @@ import os
 import time
 from typing import Optional, Dict, Any
 
+from local_slm_provider import LocalSLMProvider, local_slm_enabled
+from faq_router import FAQRouter
+
 
 class AdvancedVoiceAssistant:
     def __init__(self):
@@ -82,11 +85,21 @@ class AdvancedVoiceAssistant:
             'google': {
                 'key': gemini_key,
                 'available': False
+            },
+            'local': {
+                'key': None,
+                'available': False
             }
         }
         
+        # Order in which providers are tried, e.g. LLM_PRIORITY=local,google,openai
+        self.api_priority = [name.strip() for name in os.getenv('LLM_PRIORITY', 'google,openai,local').split(',')
+                             if name.strip() in self.apis]
+        
         # Check which APIs are available
         for api_name, config in self.apis.items():
+            if api_name == 'local':
+                continue
             if config['key'] and config['key'] != f'your_{api_name}_api_key_here':
                 config['available'] = True
                 if api_name == 'google':
@@ -98,6 +111,26 @@ class AdvancedVoiceAssistant:
                     print(f"⚠️  Google Gemini API not configured")
                 else:
                     print(f"⚠️  {api_name.upper()} API not configured")
+        
+        # Local fine-tuned SLM: loads and warms up in a background process, works offline
+        self.local_slm = None
+        if local_slm_enabled():
+            try:
+                self.local_slm = LocalSLMProvider().start()
+                print("✅ Local SLM starting in the background")
+            except Exception as e:
+                print(f"⚠️  Local SLM could not start: {e}")
+        else:
+            print("⚠️  Local SLM not configured")
+        
+        # Answer close FAQ/document matches directly instead of calling an LLM
+        self.faq_router = None
+        if os.getenv('FAQ_ROUTER', '1') != '0':
+            try:
+                self.faq_router = FAQRouter()
+                print("✅ FAQ router ready")
+            except Exception as e:
+                print(f"⚠️  FAQ router unavailable: {e}")
     
     def speak(self, text: str):
         """Enhanced speak function with better formatting and reliability"""
@@ -164,75 +197,84 @@ class AdvancedVoiceAssistant:
             return None
     
     def get_openai_response(self, question: str) -> str:
-        """Get response from OpenAI API"""
-        try:
-            import openai
-            client = openai.OpenAI(api_key=self.apis['openai']['key'])
-            
-            # Add context from conversation history
-            messages = [
-                {"role": "system", "content": "You are Pari, a friendly and helpful voice assistant. Keep responses concise and conversational, suitable for speech. Always be warm and personable. Limit responses to 2-3 sentences unless asked for more detail. Always respond as if you're speaking out loud to the user."}
-            ]
-            
-            # Add recent conversation history
-            for msg in self.conversation_history[-4:]:  # Last 4 exchanges
-                messages.extend(msg)
-            
-            messages.append({"role": "user", "content": question})
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                max_tokens=200,
-                temperature=0.7
-            )
-            
-            answer = response.choices[0].message.content.strip()
-            
-            # Store conversation
-            self.conversation_history.append([
-                {"role": "user", "content": question},
-                {"role": "assistant", "content": answer}
-            ])
-            
-            return answer
-            
-        except Exception as e:
-            print(f"❌ OpenAI API error: {e}")
-            return "I'm sorry, I encountered an error while processing your request."
+        """Get response from OpenAI API; errors propagate so the next provider is tried"""
+        import openai
+        client = openai.OpenAI(api_key=self.apis['openai']['key'])
+        
+        # Add context from conversation history
+        messages = [
+            {"role": "system", "content": "You are Pari, a friendly and helpful voice assistant. Keep responses concise and conversational, suitable for speech. Always be warm and personable. Limit responses to 2-3 sentences unless asked for more detail. Always respond as if you're speaking out loud to the user."}
+        ]
+        
+        # Add recent conversation history
+        for msg in self.conversation_history[-4:]:  # Last 4 exchanges
+            messages.extend(msg)
+        
+        messages.append({"role": "user", "content": question})
+        
+        response = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=messages,
+            max_tokens=200,
+            temperature=0.7
+        )
+        
+        answer = response.choices[0].message.content.strip()
+        
+        # Store conversation
+        self.conversation_history.append([
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": answer}
+        ])
+        
+        return answer
     
     def get_google_gemini_response(self, question: str) -> str:
-        """Get response from Google Gemini API"""
-        try:
-            import google.generativeai as genai
-            genai.configure(api_key=self.apis['google']['key'])
-            
-            model = genai.GenerativeModel('gemini-pro')
-            
-            # Create a conversational prompt
-            prompt = f"""You are Pari, a friendly voice assistant. Please respond to this question in a conversational way, as if you're speaking out loud. Keep your response to 2-3 sentences and be warm and helpful.
+        """Get response from Google Gemini API; errors propagate so the next provider is tried"""
+        import google.generativeai as genai
+        genai.configure(api_key=self.apis['google']['key'])
+        
+        model = genai.GenerativeModel('gemini-pro')
+        
+        # Create a conversational prompt
+        prompt = f"""You are Pari, a friendly voice assistant. Please respond to this question in a conversational way, as if you're speaking out loud. Keep your response to 2-3 sentences and be warm and helpful.
 
 Question: {question}"""
-            
-            response = model.generate_content(prompt)
-            
-            if response.text:
-                answer = response.text.strip()
-                
-                # Store conversation
-                self.conversation_history.append([
-                    {"role": "user", "content": question},
-                    {"role": "assistant", "content": answer}
-                ])
-                
-                print(f"✅ Got Gemini response: {answer[:50]}...")
-                return answer
-            else:
-                return "I'm sorry, I didn't get a proper response from the AI service."
-            
-        except Exception as e:
-            print(f"❌ Google Gemini API error: {e}")
-            return "I'm sorry, I had trouble connecting to the Google Gemini service."
+        
+        response = model.generate_content(prompt)
+        
+        answer = (response.text or "").strip()
+        if not answer:
+            raise RuntimeError("empty answer from Google Gemini")
+        
+        # Store conversation
+        self.conversation_history.append([
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": answer}
+        ])
+        
+        print(f"✅ Got Gemini response: {answer[:50]}...")
+        return answer
+
+    def get_local_slm_response(self, question: str) -> str:
+        """Get a streamed response from the local fine-tuned SLM"""
+        print("🤖 Pari (local): ", end="", flush=True)
+        chunks = []
+        for chunk in self.local_slm.stream(question):
+            print(chunk, end="", flush=True)
+            chunks.append(chunk)
+        print()
+        
+        answer = "".join(chunks).strip()
+        if not answer:
+            raise RuntimeError("empty answer from local SLM")
+        
+        # Store conversation
+        self.conversation_history.append([
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": answer}
+        ])
+        return answer
 
     def process_question(self, question: str) -> str:
         """Process question using available APIs or fallback"""
@@ -241,21 +283,45 @@ Question: {question}"""
         if local_response:
             return local_response
         
-        # If no local response found, try APIs in order of preference
-        if self.apis['google']['available']:
+        # Confident matches in the FAQ/RAG index skip the LLM round trip
+        start = time.perf_counter()
+        if self.faq_router is not None:
             try:
-                return self.get_google_gemini_response(question)
+                route, answer, similarity = self.faq_router.route(question)
+                if answer is not None:
+                    self.faq_router.record(route, time.perf_counter() - start)
+                    print(f"🧭 Answered from {route} index (similarity {similarity:.2f})")
+                    return answer
             except Exception as e:
-                print(f"❌ Google API failed, trying OpenAI: {e}")
+                print(f"❌ FAQ router error: {e}")
         
-        if self.apis['openai']['available']:
+        answer = self.generate_response(question)
+        if self.faq_router is not None:
+            self.faq_router.record("generate", time.perf_counter() - start)
+        return answer
+    
+    def provider_available(self, api_name: str) -> bool:
+        """Whether a provider can answer right now; the local SLM only once its worker is loaded and alive"""
+        if api_name == 'local':
+            return self.local_slm is not None and self.local_slm.available
+        return self.apis[api_name]['available']
+    
+    def generate_response(self, question: str) -> str:
+        """Try LLM providers in order of priority, then the fallback"""
+        providers = {
+            'google': self.get_google_gemini_response,
+            'openai': self.get_openai_response,
+            'local': self.get_local_slm_response,
+        }
+        for api_name in self.api_priority:
+            if not self.provider_available(api_name):
+                continue
             try:
-                return self.get_openai_response(question)
+                return providers[api_name](question)
             except Exception as e:
-                print(f"❌ OpenAI API failed, using fallback: {e}")
-                return self.get_fallback_response(question)
-        else:
-            return self.get_fallback_response(question)
+                print(f"❌ {api_name} provider failed, trying the next one: {e}")
+        
+        return self.get_fallback_response(question)
     
     def try_local_response(self, question: str) -> Optional[str]:
         """Try to find a local response for common questions"""
@@ -414,6 +480,11 @@ Question: {question}"""
         except KeyboardInterrupt:
             print("\n🛑 Voice Assistant stopped by user")
             self.speak("Goodbye!")
+        finally:
+            if self.local_slm is not None:
+                self.local_slm.stop()
+            if self.faq_router is not None:
+                self.faq_router.report()
 
     def listen_for_wake_word(self) -> Optional[str]:
         """Listens specifically for the wake word."""
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Asset Cache
+Replacement for the download_and_unzip helper in images.ipynb. Archives are
+stored once per SHA-256 in a shared cache directory, so every notebook and
+worker on the machine reuses the same download. Downloads stream into a
+partial file and resume with an HTTP Range request after an interruption,
+the hash is verified before an archive enters the cache, and extraction only
+writes members that are missing or differ from the archive.
+
+Environment:
+    ASSET_CACHE_DIR     cache location (default ~/.cache/aiml_chatbot/assets)
+
+Usage:
+    python asset_cache.py URL [--dest DIR] [--sha256 HEX] [--member NAME ...]
+    python asset_cache.py --check    # exercise the cache against a local HTTP server
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import zipfile
+import zlib
+from typing import Dict, Iterable, List, Optional
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+DEFAULT_ASSET_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aiml_chatbot", "assets")
+OPENCV_BOOTCAMP_URL = "https://www.dropbox.com/s/qhhlqcica1nvtaw/opencv_bootcamp_assets_NB1.zip?dl=1"
+CHUNK_SIZE = 1 << 20
+
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """Exclusive lock shared between processes (blocking)"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _crc32_file(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+class AssetCache:
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.getenv("ASSET_CACHE_DIR", DEFAULT_ASSET_DIR)
+        self._blobs = os.path.join(self.cache_dir, "blobs")
+        self._partial = os.path.join(self.cache_dir, "partial")
+        self._index_path = os.path.join(self.cache_dir, "urls.json")
+        os.makedirs(self._blobs, exist_ok=True)
+        os.makedirs(self._partial, exist_ok=True)
+        self.downloaded_bytes = 0
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self._blobs, sha256[:2], sha256)
+
+    def _url_index(self) -> Dict[str, str]:
+        if not os.path.exists(self._index_path):
+            return {}
+        with open(self._index_path) as f:
+            return json.load(f)
+
+    def _remember(self, url: str, sha256: str):
+        with _file_lock(self._index_path + ".lock"):
+            index = self._url_index()
+            index[url] = sha256
+            tmp_path = self._index_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(index, f, indent=1)
+            os.replace(tmp_path, self._index_path)
+
+    def cached(self, url: str, sha256: Optional[str] = None) -> Optional[str]:
+        """Path of the cached archive for a URL (or hash), or None"""
+        sha256 = sha256 or self._url_index().get(url)
+        if sha256 and os.path.exists(self.blob_path(sha256)):
+            return self.blob_path(sha256)
+        return None
+
+    def fetch(self, url: str, sha256: Optional[str] = None) -> str:
+        """Return the cached archive for `url`, downloading it if needed.
+
+        With `sha256` the download must match it; without, the first
+        download of the URL is trusted and its hash recorded.
+        """
+        sha256 = sha256.lower() if sha256 else None
+        path = self.cached(url, sha256)
+        if path:
+            return path
+
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+        part_path = os.path.join(self._partial, key + ".part")
+        with _file_lock(part_path + ".lock"):
+            path = self.cached(url, sha256)  # another worker may have finished it meanwhile
+            if path:
+                return path
+
+            digest = self._download(url, part_path)
+            if sha256 and digest != sha256:
+                os.remove(part_path)
+                raise ValueError(f"SHA-256 mismatch for {url}: expected {sha256}, got {digest}")
+
+            blob = self.blob_path(digest)
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(part_path, blob)
+        self._remember(url, digest)
+        return blob
+
+    def _download(self, url: str, part_path: str) -> str:
+        """Stream `url` into `part_path`, resuming a previous partial download; returns its SHA-256"""
+        digest = hashlib.sha256()
+        offset = 0
+        if os.path.exists(part_path):
+            with open(part_path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    offset += len(chunk)
+
+        request = Request(url, headers={"Range": f"bytes={offset}-"} if offset else {})
+        try:
+            response = urlopen(request)
+        except HTTPError as e:
+            if e.code == 416 and offset:
+                return digest.hexdigest()  # the partial file was already complete
+            raise
+        with response:
+            if offset and response.status != 206:
+                # Server ignored the range: start over
+                digest, offset = hashlib.sha256(), 0
+            with open(part_path, "ab" if offset else "wb") as f:
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    self.downloaded_bytes += len(chunk)
+        return digest.hexdigest()
+
+    def extract(self, archive: str, dest_dir: str, members: Optional[Iterable[str]] = None) -> List[str]:
+        """Extract members that are missing or differ in `dest_dir`; returns the names written"""
+        written = []
+        with zipfile.ZipFile(archive) as z:
+            infos = z.infolist()
+            if members is not None:
+                wanted = set(members)
+                infos = [info for info in infos if info.filename in wanted]
+                missing = wanted - {info.filename for info in infos}
+                if missing:
+                    raise KeyError(f"Not in {os.path.basename(archive)}: {sorted(missing)}")
+            for info in infos:
+                if info.is_dir():
+                    continue
+                target = os.path.join(dest_dir, info.filename)
+                if (os.path.isfile(target) and os.path.getsize(target) == info.file_size
+                        and _crc32_file(target) == info.CRC):
+                    continue
+                z.extract(info, dest_dir)
+                written.append(info.filename)
+        return written
+
+    def ensure(self, url: str, dest_dir: str, sha256: Optional[str] = None,
+               members: Optional[Iterable[str]] = None) -> List[str]:
+        """Fetch (or reuse) the archive and bring `dest_dir` up to date; returns the names written"""
+        return self.extract(self.fetch(url, sha256), dest_dir, members)
+
+
+def download_and_unzip(url: str, save_path: str, sha256: Optional[str] = None):
+    """Drop-in for the notebook helper: assets end up next to `save_path`.
+
+    The archive itself stays in the shared cache instead of at `save_path`.
+    """
+    print("Downloading and extracting assets....", end="")
+    try:
+        written = AssetCache().ensure(url, os.path.split(save_path)[0] or ".", sha256)
+        print(f"Done ({len(written)} file(s) updated)")
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        print("\nInvalid file.", e)
+
+
+def _serve_zip(payload: bytes):
+    """Local HTTP server for `payload` with Range support; returns (server, url)"""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        requests_seen = []
+
+        def do_GET(self):
+            start = 0
+            if self.headers.get("Range"):
+                start = int(self.headers["Range"].split("=")[1].split("-")[0])
+            Handler.requests_seen.append(start)
+            if start >= len(payload):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206 if start else 200)
+            self.send_header("Content-Length", str(len(payload) - start))
+            self.end_headers()
+            self.wfile.write(payload[start:])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/assets.zip", Handler.requests_seen
+
+
+def check() -> bool:
+    """Download, reuse, resume, selective extraction and hash verification against a local server"""
+    import io
+    import shutil
+    import tempfile
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        for i in range(20):
+            z.writestr(f"assets/file_{i:02d}.bin", os.urandom(64 * 1024))
+    payload = buffer.getvalue()
+    expected = hashlib.sha256(payload).hexdigest()
+
+    server, url, requests_seen = _serve_zip(payload)
+    root = tempfile.mkdtemp(prefix="asset_cache_check_")
+    results = []
+
+    def report(name, passed):
+        results.append(passed)
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    try:
+        cache = AssetCache(os.path.join(root, "cache"))
+        dest = os.path.join(root, "notebook")
+
+        written = cache.ensure(url, dest, expected)
+        report("first run downloads and extracts everything", len(written) == 20
+               and cache.downloaded_bytes == len(payload))
+
+        written = AssetCache(cache.cache_dir).ensure(url, dest)
+        report("second run (new instance, no hash given) downloads and extracts nothing",
+               written == [] and len(requests_seen) == 1)
+
+        os.remove(os.path.join(dest, "assets", "file_03.bin"))
+        with open(os.path.join(dest, "assets", "file_07.bin"), "r+b") as f:
+            f.write(b"corrupt")
+        written = cache.ensure(url, dest)
+        report("only missing or changed members are re-extracted",
+               sorted(written) == ["assets/file_03.bin", "assets/file_07.bin"])
+
+        written = cache.ensure(url, os.path.join(root, "worker"), members=["assets/file_11.bin"])
+        report("selective extraction writes just the requested member", written == ["assets/file_11.bin"])
+
+        resume_url = url + "?resume"
+        fresh = AssetCache(os.path.join(root, "cache2"))
+        key = hashlib.sha256(resume_url.encode("utf-8")).hexdigest()[:16]
+        with open(os.path.join(fresh._partial, key + ".part"), "wb") as f:
+            f.write(payload[:len(payload) // 3])  # interrupted download
+        fresh.fetch(resume_url, expected)
+        report("interrupted download resumes with a Range request",
+               requests_seen[-1] == len(payload) // 3
+               and fresh.downloaded_bytes == len(payload) - len(payload) // 3)
+
+        try:
+            AssetCache(os.path.join(root, "cache3")).fetch(url + "?bad", "0" * 64)
+            report("hash mismatch is rejected", False)
+        except ValueError:
+            report("hash mismatch is rejected", True)
+    finally:
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed asset cache")
+    parser.add_argument("url", nargs="?", help=f"archive URL (e.g. {OPENCV_BOOTCAMP_URL})")
+    parser.add_argument("--dest", default=".", help="directory to extract into")
+    parser.add_argument("--sha256", help="expected SHA-256 of the archive")
+    parser.add_argument("--member", action="append", help="extract only this member (repeatable)")
+    parser.add_argument("--check", action="store_true", help="self-check against a local HTTP server")
+    args = parser.parse_args()
+
+    if args.check:
+        print("📦 Asset Cache Check")
+        print("=" * 50)
+        if not check():
+            raise SystemExit(1)
+        return
+    if not args.url:
+        parser.print_help()
+        return
+    cache = AssetCache()
+    written = cache.ensure(args.url, args.dest, args.sha256, args.member)
+    print(f"📦 {args.url} -> {args.dest}: {len(written)} file(s) extracted, "
+          f"{cache.downloaded_bytes / 2**20:.1f} MB downloaded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark Helpers
+Small timing and memory helpers shared by the benchmark scripts.
+"""
+
+import os
+import sys
+from typing import List
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        # Peak rather than current RSS, but better than nothing (KB on Linux, bytes on macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far in MB (0 if unknown)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    except ImportError:  # Windows
+        pass
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().peak_wset / 2**20
+    except (ImportError, AttributeError):
+        return 0.0
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
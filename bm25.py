@@ -0,0 +1,83 @@
+"""
+BM25 Sparse Retriever
+A small inverted-index BM25 used alongside the FAISS index, so exact-match
+queries (plan names, error codes, proper nouns) still find their documents.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Keep codes like "E-1042" or "v2.1" together as a single token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        self.total_length = 0
+
+    @property
+    def avg_length(self) -> float:
+        return self.total_length / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+    def idf(self, term: str) -> float:
+        n, df = len(self.doc_lengths), len(self.postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def build(self, texts: List[str]):
+        """Index the texts; document ids are their positions in the list"""
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+        self.total_length = 0
+        return self.add(texts)
+
+    def add(self, texts: List[str]):
+        """Append texts; their ids continue after the documents already indexed.
+
+        Only the new documents are tokenized. IDF and the average length are
+        derived from the counts at query time, so nothing else is recomputed.
+        """
+        for doc_id, text in enumerate(texts, start=len(self.doc_lengths)):
+            counts = Counter(tokenize(text))
+            length = sum(counts.values())
+            self.doc_lengths.append(length)
+            self.total_length += length
+            for term, tf in counts.items():
+                self.postings[term].append((doc_id, tf))
+        return self
+
+    def search(self, query: str, k: int = 3,
+               include: Optional[Callable[[int], bool]] = None) -> List[Tuple[int, float]]:
+        """Return up to k (doc_id, score) pairs, best first, among ids `include` accepts"""
+        scores: Dict[int, float] = defaultdict(float)
+        avg_length = self.avg_length
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in docs:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        hits = scores.items() if include is None else [(i, s) for i, s in scores.items() if include(i)]
+        return sorted(hits, key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse several ranked id lists; ids ranked high by any list float to the top"""
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
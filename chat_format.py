@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Chat Format
+The single place that turns questions and answers into the "User: ...\\nAssistant:"
+format and token ids, used by both fine-tuning and inference so the model is
+always prompted exactly the way it was trained.
+
+Training examples end with the EOS token and keep it in the labels, so the
+model learns where an answer stops; only the prompt tokens are masked.
+
+Usage:
+    python chat_format.py --compare-lengths   # answer length with old vs new labels, tiny model
+"""
+
+import argparse
+from typing import Dict, List
+
+
+USER_PREFIX = "User: "
+ASSISTANT_PREFIX = "\nAssistant:"
+CONTEXT_INSTRUCTIONS = "Answer the user's question using the context below.\n"
+
+
+def build_prompt(question: str) -> str:
+    """Prompt text for a question, ending where the answer starts"""
+    return f"{USER_PREFIX}{question}{ASSISTANT_PREFIX}"
+
+
+def build_context_prefix(passages: List[str]) -> str:
+    """Instructions and retrieved passages placed before the prompt.
+
+    Kept separate from the question so the same prefix tokenizes identically
+    for every query and its KV cache can be reused (see prefix_cache.py).
+    """
+    lines = "".join(f"- {p}\n" for p in passages)
+    return f"{CONTEXT_INSTRUCTIONS}Context:\n{lines}\n"
+
+
+def encode_prompt(tokenizer, question: str) -> List[int]:
+    """Prompt token ids, tokenized exactly as in training examples"""
+    return tokenizer(build_prompt(question), add_special_tokens=False)["input_ids"]
+
+
+def encode_answer(tokenizer, answer: str) -> List[int]:
+    return tokenizer(" " + answer.strip(), add_special_tokens=False)["input_ids"]
+
+
+def encode_example(tokenizer, question: str, answer: str, max_length: int = 256) -> Dict:
+    """Token ids for a training example and the span of prompt tokens to mask.
+
+    The prompt and answer are tokenized separately so the prompt ids match
+    encode_prompt() at inference. Truncation shortens the answer but always
+    keeps the closing EOS.
+    """
+    prompt_ids = encode_prompt(tokenizer, question)[:max_length - 1]
+    answer_ids = encode_answer(tokenizer, answer)[:max_length - 1 - len(prompt_ids)]
+    input_ids = prompt_ids + answer_ids + [tokenizer.eos_token_id]
+    return {"input_ids": input_ids, "prompt_spans": [(0, len(prompt_ids))]}
+
+
+def notebook_example(tokenizer, question: str, answer: str, max_length: int = 256) -> Dict:
+    """The notebook's original labels: padded to max_length, prompt trained on,
+    every pad-token id (which is also EOS) masked. Kept for comparison only."""
+    enc = tokenizer(f"{USER_PREFIX}{question}\nAssistant: {answer}", padding="max_length",
+                    truncation=True, max_length=max_length)
+    labels = [(t if t != tokenizer.pad_token_id else -100) for t in enc["input_ids"]]
+    return {"input_ids": enc["input_ids"], "attention_mask": enc["attention_mask"], "labels": labels}
+
+
+def compare_lengths(steps: int = 300, max_new_tokens: int = 64, seed: int = 0):
+    """Fine-tune a tiny model with the old and new labels and compare answer lengths"""
+    import torch
+
+    from finetune_data import DynamicPaddingCollator
+    from slm_data import QA_PAIRS, TEST_QUESTIONS
+    from tiny_lm import load_tiny_lm
+
+    def train(make_batch):
+        model, tokenizer = load_tiny_lm(n_layer=2, n_embd=128, n_head=2, seed=seed)
+        optimizer = torch.optim.AdamW(model.parameters(), lr=1e-3)
+        model.train()
+        for step in range(steps):
+            batch = make_batch(tokenizer, [QA_PAIRS[(step * 4 + i) % len(QA_PAIRS)] for i in range(4)])
+            model(**batch).loss.backward()
+            optimizer.step()
+            optimizer.zero_grad()
+        return model.eval(), tokenizer
+
+    def old_batch(tokenizer, pairs):
+        examples = [notebook_example(tokenizer, qa["prompt"], qa["answer"], max_length=64) for qa in pairs]
+        return {key: torch.tensor([e[key] for e in examples]) for key in ("input_ids", "attention_mask", "labels")}
+
+    def new_batch(tokenizer, pairs):
+        collator = DynamicPaddingCollator(tokenizer.pad_token_id)
+        return collator([encode_example(tokenizer, qa["prompt"], qa["answer"]) for qa in pairs])
+
+    print(f"{'labels':<10}{'avg new tokens':>16}{'stopped':>10}")
+    for name, make_batch in (("notebook", old_batch), ("chat", new_batch)):
+        model, tokenizer = train(make_batch)
+        lengths = []
+        for question in TEST_QUESTIONS:
+            ids = torch.tensor([encode_prompt(tokenizer, question)])
+            with torch.no_grad():
+                out = model.generate(ids, max_new_tokens=max_new_tokens, do_sample=False,
+                                     pad_token_id=tokenizer.eos_token_id, eos_token_id=tokenizer.eos_token_id)
+            new = out[0, ids.shape[1]:].tolist()
+            lengths.append(new.index(tokenizer.eos_token_id) + 1 if tokenizer.eos_token_id in new else len(new))
+        stopped = sum(length < max_new_tokens for length in lengths)
+        print(f"{name:<10}{sum(lengths) / len(lengths):>16.1f}{stopped:>7}/{len(lengths)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat format shared by training and inference")
+    parser.add_argument("--compare-lengths", action="store_true",
+                        help="train a tiny model with old and new labels and compare answer lengths")
+    parser.add_argument("--steps", type=int, default=300)
+    args = parser.parse_args()
+
+    if not args.compare_lengths:
+        parser.print_help()
+        return
+    print("💬 Answer Length: notebook labels vs chat-format labels")
+    print("=" * 50)
+    compare_lengths(args.steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+CPU Inference Benchmark
+Compares the cpu-fp32 and cpu-int8 backends of slm_chatbot on a small
+stand-in model: load time, resident memory and generation tokens/sec.
+Each backend runs in its own Python process, so neither inherits the
+other's imports or memory.
+
+Usage:
+    python cpu_inference_benchmark.py                      # offline tiny model
+    python cpu_inference_benchmark.py --model distilgpt2   # any small HF causal LM
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from bench_utils import peak_rss_mb, rss_mb
+from slm_data import QA_PAIRS
+
+
+BACKENDS = ("cpu-fp32", "cpu-int8")
+
+
+def load_stand_in(model_name: str):
+    """A local HF causal LM, or the offline tiny model (bigger than the default tiny config)"""
+    if model_name:
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        tokenizer.pad_token = tokenizer.eos_token
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+        return model.eval(), tokenizer
+
+    from tiny_lm import load_tiny_lm
+    return load_tiny_lm(n_layer=6, n_embd=512, n_head=8)
+
+
+def count_linear_layers(model):
+    """(int8 dynamic-quantized Linear layers, remaining fp32 Linear/Conv1D layers)"""
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    quantized = fp32 = 0
+    for module in model.modules():
+        if type(module).__module__.startswith("torch.ao.nn.quantized"):
+            quantized += isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+        elif isinstance(module, (torch.nn.Linear, Conv1D)):
+            fp32 += 1
+    return quantized, fp32
+
+
+def run_backend(backend: str, model_name: str, questions, max_new_tokens: int, threads: int = 0):
+    """Benchmark one backend in this process (see measure() for the isolated version)"""
+    import torch
+    from transformers import AutoModelForCausalLM, GPT2LMHeadModel  # noqa: F401  (import cost is not load time)
+
+    from slm_chatbot import SLMChatbot, quantize_int8
+
+    if threads:
+        torch.set_num_threads(threads)
+    rss_before = rss_mb()  # after imports, so only the model is measured
+
+    start = time.perf_counter()
+    model, tokenizer = load_stand_in(model_name)
+    if backend == "cpu-int8":
+        model = quantize_int8(model)
+    load_seconds = time.perf_counter() - start
+    model_mb = rss_mb() - rss_before
+    int8_layers, fp32_layers = count_linear_layers(model)
+    chatbot = SLMChatbot(model, tokenizer)
+
+    chatbot.answer(questions[0], max_new_tokens=4)  # warm-up
+    tokens = 0
+    start = time.perf_counter()
+    for question in questions:
+        # Fixed-length greedy decode so both backends do the same amount of work
+        chatbot.answer(question, max_new_tokens=max_new_tokens, min_new_tokens=max_new_tokens,
+                       do_sample=False, stop_sequences=None)
+        tokens += max_new_tokens
+    elapsed = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "model_mb": model_mb,
+        "peak_rss_mb": peak_rss_mb(),
+        "int8_layers": int8_layers,
+        "fp32_layers": fp32_layers,
+        "tokens_per_sec": tokens / elapsed,
+        "threads": torch.get_num_threads(),
+    }
+
+
+def measure(backend: str, args) -> dict:
+    """Run one backend in a fresh interpreter and return its result"""
+    command = [sys.executable, __file__, "--worker", backend, "--model", args.model,
+               "--questions", str(args.questions), "--max-new-tokens", str(args.max_new_tokens),
+               "--threads", str(args.threads)]
+    out = subprocess.run(command, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"{backend} worker failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU inference benchmark for the SLM backends")
+    parser.add_argument("--model", default="", help="HF causal LM to use instead of the offline tiny model")
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 = torch default)")
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    questions = [qa["prompt"] for qa in QA_PAIRS[:args.questions]]
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.model, questions, args.max_new_tokens, args.threads)))
+        return
+
+    print("🖥️  CPU Inference Benchmark")
+    print("=" * 50)
+    results = [measure(backend, args) for backend in BACKENDS]
+    print(f"Model: {args.model or 'tiny stand-in'}, {results[0]['threads']} threads, one process per backend\n")
+    print(f"{'backend':<10}{'load s':>9}{'model MB':>10}{'peak RSS MB':>13}{'int8/fp32 layers':>18}{'tokens/s':>11}")
+    for r in results:
+        layers = f"{r['int8_layers']}/{r['fp32_layers']}"
+        print(f"{r['backend']:<10}{r['load_seconds']:>9.2f}{r['model_mb']:>10.1f}{r['peak_rss_mb']:>13.1f}"
+              f"{layers:>18}{r['tokens_per_sec']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Persistent Embedding Cache
+Stores SentenceTransformer embeddings on disk keyed by a hash of the text, so
+index builds and repeated questions don't re-encode the same text twice.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from asset_cache import _file_lock
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aiml_chatbot", "embeddings")
+
+
+def text_key(text: str) -> str:
+    """Content hash used as the cache key for a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content hash -> float16 vector cache backed by a memory-mapped array.
+
+    Each model gets its own directory (named after a hash of the model name),
+    holding ``vectors.f16`` (rows of float16), ``keys.txt`` (one hash per row,
+    in row order) and ``meta.json``. A different model name or embedding size
+    never sees another model's vectors.
+
+    New vectors are kept in memory and committed (vectors written and
+    flushed, keys appended, then meta.json updated) every `flush_every` rows
+    and on flush(). meta.json's count is the single source of truth: key
+    lines past it are dropped. Loading and committing hold an exclusive lock
+    on the directory, and a commit first picks up rows other processes have
+    committed, so several processes can share one cache.
+    """
+
+    def __init__(self, model_name: str, dim: int, cache_dir: str = DEFAULT_CACHE_DIR,
+                 flush_every: int = 256):
+        self.model_name = model_name
+        self.dim = dim
+        self.flush_every = flush_every
+        model_id = hashlib.sha256(model_name.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, model_id)
+        os.makedirs(self.path, exist_ok=True)
+
+        self._vectors_path = os.path.join(self.path, "vectors.f16")
+        self._keys_path = os.path.join(self.path, "keys.txt")
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self._lock_path = os.path.join(self.path, "lock")
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+
+        with _file_lock(self._lock_path):
+            self._load()
+
+    def _read_meta(self) -> Optional[dict]:
+        if not os.path.exists(self._meta_path):
+            return None
+        with open(self._meta_path) as f:
+            return json.load(f)
+
+    def _load(self):
+        """Open the on-disk cache, resetting it if it belongs to another model"""
+        meta = self._read_meta()
+        if not meta or meta.get("model_name") != self.model_name or meta.get("dim") != self.dim:
+            for path in (self._vectors_path, self._keys_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            meta = {"model_name": self.model_name, "dim": self.dim, "count": 0}
+            self._write_meta(meta)
+
+        self.index: Dict[str, int] = {}
+        self.count = 0  # committed rows known to this process
+        self._keys_bytes = 0  # length of keys.txt covering those rows
+        self.capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._pending_index: Dict[str, int] = {}  # key -> position in _pending_vectors
+        self._pending_vectors: List[np.ndarray] = []
+        self._sync(meta["count"])
+
+    def _sync(self, committed: int):
+        """Read keys committed since the last sync (by any process); needs the file lock"""
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, "r+b") as f:
+                f.seek(self._keys_bytes)
+                while self.count < committed:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break
+                    self.index[line.strip().decode()] = self.count
+                    self.count += 1
+                    self._keys_bytes += len(line)
+                # A crash between appending keys and writing meta.json left uncommitted lines;
+                # drop them so the next append lines up with the vector rows again
+                f.truncate(self._keys_bytes)
+        if self.count < committed:
+            self._write_meta({"model_name": self.model_name, "dim": self.dim, "count": self.count})
+        self._ensure_capacity(self.count)
+
+    def _write_meta(self, meta: dict):
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _ensure_capacity(self, rows: int):
+        """Map enough of the vector file to hold `rows` rows, growing it but never shrinking it"""
+        if rows <= self.capacity:
+            return
+        row_bytes = self.dim * np.dtype(np.float16).itemsize
+        on_disk = os.path.getsize(self._vectors_path) // row_bytes if os.path.exists(self._vectors_path) else 0
+        new_capacity = max(rows, self.capacity * 2, 1024, on_disk)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        if new_capacity > on_disk:
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(new_capacity * row_bytes)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float16, mode="r+",
+                                  shape=(new_capacity, self.dim))
+        self.capacity = new_capacity
+
+    def _lookup(self, keys: List[str]) -> np.ndarray:
+        """float32 vectors for keys that are all cached, committed or pending"""
+        out = np.empty((len(keys), self.dim), dtype=np.float32)
+        committed = [(i, self.index[k]) for i, k in enumerate(keys) if k in self.index]
+        if committed:
+            positions, rows = zip(*committed)
+            out[list(positions)] = self._vectors[list(rows)]
+        for i, key in enumerate(keys):
+            if key not in self.index:
+                out[i] = self._pending_vectors[self._pending_index[key]]
+        return out
+
+    def _cached(self, key: str) -> bool:
+        return key in self.index or key in self._pending_index
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached vector for a text, or None"""
+        key = text_key(text)
+        with self._lock:
+            return self._lookup([key])[0] if self._cached(key) else None
+
+    def encode(self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Return float32 embeddings for `texts`, encoding only the ones not cached.
+
+        `encode_fn` receives the list of missing texts and must return an
+        array of shape (len(missing), dim), e.g.
+        ``lambda t: embedder.encode(t, convert_to_numpy=True)``.
+        """
+        keys = [text_key(t) for t in texts]
+
+        with self._lock:
+            missing = {}
+            for i, key in enumerate(keys):
+                if not self._cached(key) and key not in missing:
+                    missing[key] = i
+
+            if missing:
+                start = time.perf_counter()
+                new_vectors = np.asarray(encode_fn([texts[i] for i in missing.values()]))
+                self.encode_seconds += time.perf_counter() - start
+                self._append(list(missing.keys()), new_vectors)
+
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+            return self._lookup(keys)
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        if vectors.shape != (len(keys), self.dim):
+            raise ValueError(f"Expected embeddings of shape {(len(keys), self.dim)}, got {vectors.shape}")
+        # Stored as float16 right away so a vector reads the same before and after its commit
+        for key, vector in zip(keys, vectors.astype(np.float16)):
+            self._pending_index[key] = len(self._pending_vectors)
+            self._pending_vectors.append(vector)
+        if len(self._pending_vectors) >= self.flush_every:
+            self._commit()
+
+    def _commit(self):
+        """Persist pending rows after those other processes committed: vectors, keys, then meta.json"""
+        if not self._pending_vectors:
+            return
+        with _file_lock(self._lock_path):
+            meta = self._read_meta()
+            self._sync(meta["count"] if meta else self.count)
+            new = [key for key in self._pending_index if key not in self.index]
+            if new:
+                self._ensure_capacity(self.count + len(new))
+                self._vectors[self.count:self.count + len(new)] = np.stack(
+                    [self._pending_vectors[self._pending_index[key]] for key in new])
+                self._vectors.flush()
+                lines = "".join(key + "\n" for key in new).encode()
+                with open(self._keys_path, "ab") as f:
+                    f.write(lines)
+                for row, key in enumerate(new, start=self.count):
+                    self.index[key] = row
+                self.count += len(new)
+                self._keys_bytes += len(lines)
+                self._write_meta({"model_name": self.model_name, "dim": self.dim, "count": self.count})
+        self._pending_index = {}
+        self._pending_vectors = []
+
+    def flush(self):
+        """Write any rows added since the last commit to disk"""
+        with self._lock:
+            self._commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit rate and an estimate of the encode time the cache saved"""
+        lookups = self.hits + self.misses
+        per_text = self.encode_seconds / self.misses if self.misses else 0.0
+        return {
+            "entries": self.count + len(self._pending_vectors),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "encode_seconds": self.encode_seconds,
+            "encode_seconds_saved": self.hits * per_text,
+        }
+
+    def report(self):
+        """Print cache statistics"""
+        s = self.stats()
+        print(f"📦 Embedding cache: {s['entries']} entries, "
+              f"hit rate {s['hit_rate']:.1%} ({s['hits']} hits / {s['misses']} misses)")
+        print(f"⏱️  Encode time: {s['encode_seconds']:.3f}s spent, ~{s['encode_seconds_saved']:.3f}s saved")
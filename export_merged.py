@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Merge LoRA Adapters for Deployment
+Folds the phi2-qlora adapter into the Phi-2 base weights and saves a single
+safetensors checkpoint, so inference no longer pays for the adapter matmuls.
+Load the result with slm_chatbot.load_model(adapter_dir=None, model_name=<out>).
+
+Usage:
+    python export_merged.py --adapter phi2-qlora --out phi2-merged [--dtype float16] [--int8]
+    python export_merged.py --tiny    # parity check + latency on a tiny model, CPU only
+"""
+
+import argparse
+import time
+
+from chat_format import build_prompt
+from slm_chatbot import ADAPTER_DIR, MODEL_NAME
+from slm_data import QA_PAIRS
+
+
+DTYPES = ("float32", "float16", "bfloat16")
+
+
+def merge_adapter(model_name: str = MODEL_NAME, adapter_dir: str = ADAPTER_DIR, dtype: str = "float16"):
+    """Load the base model unquantized, apply the adapter and merge it; returns (merged, tokenizer)"""
+    import torch
+    from peft import PeftModel
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    # LoRA can't be folded into 4-bit weights, so the base is loaded in full or half precision
+    base = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=getattr(torch, dtype))
+    model = PeftModel.from_pretrained(base, adapter_dir)
+    tokenizer = AutoTokenizer.from_pretrained(adapter_dir)
+    return model.merge_and_unload(), tokenizer
+
+
+def save_merged(model, tokenizer, out_dir: str, int8: bool = False):
+    """Write a safetensors checkpoint, optionally re-loaded and saved in bitsandbytes int8"""
+    model.save_pretrained(out_dir, safe_serialization=True)
+    tokenizer.save_pretrained(out_dir)
+
+    if int8:
+        from transformers import AutoModelForCausalLM, BitsAndBytesConfig
+
+        # bitsandbytes int8 serialization needs CUDA
+        quantized = AutoModelForCausalLM.from_pretrained(
+            out_dir, quantization_config=BitsAndBytesConfig(load_in_8bit=True), device_map="auto"
+        )
+        quantized.save_pretrained(out_dir, safe_serialization=True)
+    print(f"✅ Merged checkpoint saved to {out_dir}")
+
+
+def logits_for(model, tokenizer, prompts):
+    import torch
+
+    inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+    with torch.no_grad():
+        return model(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"]).logits.float()
+
+
+def per_token_latency_ms(model, tokenizer, prompt: str, new_tokens: int = 32) -> float:
+    """Average decode time per generated token (greedy, fixed length)"""
+    import torch
+
+    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+    kwargs = dict(max_new_tokens=new_tokens, min_new_tokens=new_tokens, do_sample=False,
+                  pad_token_id=tokenizer.eos_token_id)
+    with torch.no_grad():
+        model.generate(input_ids=inputs["input_ids"], max_new_tokens=2, pad_token_id=tokenizer.eos_token_id)
+        start = time.perf_counter()
+        model.generate(input_ids=inputs["input_ids"], **kwargs)
+    return (time.perf_counter() - start) * 1000 / new_tokens
+
+
+def check_parity(peft_model, tokenizer, atol: float = 1e-3, benchmark: bool = True):
+    """Merge `peft_model` in place and compare logits (and latency) before and after.
+
+    Returns (passed, merged_model).
+    """
+    prompts = [build_prompt(qa["prompt"]) for qa in QA_PAIRS[:4]]
+    before = logits_for(peft_model, tokenizer, prompts)
+    latency_before = per_token_latency_ms(peft_model, tokenizer, prompts[0]) if benchmark else None
+
+    merged = peft_model.merge_and_unload()
+    after = logits_for(merged, tokenizer, prompts)
+    latency_after = per_token_latency_ms(merged, tokenizer, prompts[0]) if benchmark else None
+
+    max_diff = float((before - after).abs().max())
+    passed = max_diff <= atol
+    print(f"🧪 Max |logit difference| merged vs unmerged: {max_diff:.2e} (tolerance {atol:g})")
+    print("✅ Parity check passed" if passed else "❌ Parity check failed")
+    if benchmark:
+        print(f"⏱️  Per-token latency: {latency_before:.2f} ms with adapters, "
+              f"{latency_after:.2f} ms merged ({latency_before / latency_after:.2f}x)")
+    return passed, merged
+
+
+def tiny_peft_model():
+    """Tiny random model with a randomly initialized (non-zero) LoRA adapter"""
+    from peft import LoraConfig, get_peft_model
+    from tiny_lm import load_tiny_lm
+
+    model, tokenizer = load_tiny_lm(n_layer=4, n_embd=256, n_head=4)
+    lora_config = LoraConfig(
+        r=8,
+        lora_alpha=16,
+        target_modules=["c_attn"],
+        fan_in_fan_out=True,  # GPT-2 uses Conv1D layers
+        init_lora_weights=False,  # random B, so the adapter actually changes the output
+        task_type="CAUSAL_LM"
+    )
+    return get_peft_model(model, lora_config).eval(), tokenizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge LoRA adapters into the base weights")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--adapter", default=ADAPTER_DIR)
+    parser.add_argument("--out", default="phi2-merged")
+    parser.add_argument("--dtype", choices=DTYPES, default="float16")
+    parser.add_argument("--int8", action="store_true", help="also quantize the checkpoint to int8 (CUDA)")
+    parser.add_argument("--check", action="store_true", help="parity check and latency before saving")
+    parser.add_argument("--tiny", action="store_true", help="parity check on a tiny random model only")
+    args = parser.parse_args()
+
+    print("🔗 LoRA Merge Export")
+    print("=" * 50)
+
+    if args.tiny:
+        model, tokenizer = tiny_peft_model()
+        passed, _ = check_parity(model, tokenizer)
+        raise SystemExit(0 if passed else 1)
+
+    if args.check:
+        import torch
+        from peft import PeftModel
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        # Parity in float32 so the tolerance measures the merge, not half-precision rounding
+        base = AutoModelForCausalLM.from_pretrained(args.model, torch_dtype=torch.float32)
+        tokenizer = AutoTokenizer.from_pretrained(args.adapter)
+        tokenizer.pad_token = tokenizer.eos_token
+        passed, merged = check_parity(PeftModel.from_pretrained(base, args.adapter).eval(), tokenizer)
+        if not passed:
+            raise SystemExit(1)
+        merged = merged.to(getattr(torch, args.dtype))
+    else:
+        merged, tokenizer = merge_adapter(args.model, args.adapter, args.dtype)
+
+    save_merged(merged, tokenizer, args.out, args.int8)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Confidence-Gated FAQ Routing
+Embeds a question and checks its nearest neighbours in the company QA pairs
+and the RAG documents. A close enough match is answered straight from the
+stored answer; anything else is escalated to an LLM. Keeps per-route counts
+and latencies so the share of traffic served locally is visible.
+
+Environment:
+    FAQ_ROUTER             "0" to disable routing in the voice assistant
+    FAQ_THRESHOLD          cosine similarity needed to answer from a QA pair (0.80)
+    FAQ_DOC_THRESHOLD      cosine similarity needed to answer with a document (0.85)
+
+Usage:
+    python faq_router.py --report    # replay sample traffic and print the route mix
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from bench_utils import percentile
+from slm_data import DOCS, QA_PAIRS
+
+
+ROUTES = ("faq", "rag", "generate")
+
+
+def l2_to_cosine(distance: float) -> float:
+    """Cosine similarity from squared L2 distance between unit vectors"""
+    return 1.0 - distance / 2.0
+
+
+class FAQRouter:
+    def __init__(self, embedder=None, threshold: Optional[float] = None, doc_threshold: Optional[float] = None):
+        from rag_retrieval import RAGRetriever, load_embedder
+
+        self.threshold = threshold if threshold is not None else float(os.getenv("FAQ_THRESHOLD", "0.80"))
+        self.doc_threshold = (doc_threshold if doc_threshold is not None
+                              else float(os.getenv("FAQ_DOC_THRESHOLD", "0.85")))
+
+        # Both indexes share one embedder and the embedding cache
+        embedder = embedder if embedder is not None else load_embedder()
+        self.qa_index = RAGRetriever(embedder).build([{"text": qa["prompt"], "answer": qa["answer"]}
+                                                      for qa in QA_PAIRS])
+        self.doc_index = RAGRetriever(embedder, cache=self.qa_index.cache).build(DOCS)
+
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+
+    def route(self, question: str) -> Tuple[str, Optional[str], float]:
+        """Return (route, stored answer or None, best similarity)"""
+        # Both indexes use the same embedder, so the question is embedded once
+        q = self.qa_index.embed_query(question)
+        qa_hit = self.qa_index.dense_search_vector(q, 1)
+        if qa_hit:
+            doc_id, distance = qa_hit[0]
+            similarity = l2_to_cosine(distance)
+            if similarity >= self.threshold:
+                return "faq", self.qa_index.docs[doc_id]["answer"], similarity
+        else:
+            similarity = 0.0
+
+        doc_hit = self.doc_index.dense_search_vector(q, 1)
+        if doc_hit:
+            doc_id, distance = doc_hit[0]
+            doc_similarity = l2_to_cosine(distance)
+            if doc_similarity >= self.doc_threshold:
+                return "rag", self.doc_index.docs[doc_id]["text"], doc_similarity
+            similarity = max(similarity, doc_similarity)
+
+        return "generate", None, similarity
+
+    def record(self, route: str, seconds: float):
+        """Record the end-to-end time of a question answered through `route`"""
+        with self._lock:
+            self.counts[route] += 1
+            self.latencies[route].append(seconds * 1000)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = sum(self.counts.values())
+            local = self.counts["faq"] + self.counts["rag"]
+            return {
+                "total": total,
+                "local_fraction": local / total if total else 0.0,
+                "routes": {
+                    route: {
+                        "count": self.counts[route],
+                        "p50_ms": percentile(self.latencies[route], 50),
+                        "p95_ms": percentile(self.latencies[route], 95),
+                        "max_ms": max(self.latencies[route], default=0.0),
+                    }
+                    for route in ROUTES
+                },
+            }
+
+    def report(self):
+        """Print the share of traffic served locally and latency per route"""
+        s = self.stats()
+        print(f"🧭 {s['total']} questions, {s['local_fraction']:.1%} answered locally")
+        print(f"{'route':<10}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for route, r in s["routes"].items():
+            print(f"{route:<10}{r['count']:>7}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['max_ms']:>10.1f}")
+
+
+def main():
+    from slm_data import RETRIEVAL_EVAL
+
+    parser = argparse.ArgumentParser(description="Confidence-gated FAQ routing")
+    parser.add_argument("--report", action="store_true", help="replay sample questions and print the route mix")
+    parser.add_argument("--threshold", type=float)
+    args = parser.parse_args()
+
+    if not args.report:
+        parser.print_help()
+        return
+
+    print("🧭 FAQ Router")
+    print("=" * 50)
+    router = FAQRouter(threshold=args.threshold)
+    traffic = [qa["prompt"] for qa in QA_PAIRS] + [item["query"] for item in RETRIEVAL_EVAL] + [
+        "What's the capital of France?",
+        "Tell me about black holes",
+        "Can you recommend a good book?",
+        "How do I bake sourdough bread?",
+    ]
+    for question in traffic:
+        start = time.perf_counter()
+        route, answer, similarity = router.route(question)
+        router.record(route, time.perf_counter() - start)
+        print(f"  [{route:<8} {similarity:.2f}] {question}")
+    print()
+    router.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+QLoRA Fine-Tuning
+The Trainer cell from slm_chatbot.ipynb as a script, with the training-time
+options the notebook lacks:
+    - tokenized dataset cached on disk, keyed by a hash of the tokenizer and
+      of the QA data, so tokenization only reruns when either changes
+    - dynamic padding with length-grouped batches (or packing) from
+      finetune_data.py instead of padding every sample to 256 tokens
+    - optional gradient checkpointing, trading recompute for activation memory
+    - tokens/sec and memory for every optimizer step, printed every
+      --logging-steps and written to throughput.jsonl in the output directory
+    - periodic checkpoints, and --resume to continue from the latest one
+
+Usage:
+    python finetune.py                              # Phi-2, 4-bit on CUDA, adapter saved to phi2-qlora
+    python finetune.py --gradient-checkpointing --batch-size 8 --grad-accum 1
+    python finetune.py --resume                     # continue from the last checkpoint in --output-dir
+    python finetune.py --tiny --epochs 2            # tiny random model on CPU, end to end
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from bench_utils import peak_rss_mb, rss_mb
+from chat_format import ASSISTANT_PREFIX, USER_PREFIX
+from finetune_data import DynamicPaddingCollator, LengthGroupedSampler, pack_samples, tokenize_dataset
+from slm_chatbot import ADAPTER_DIR, MODEL_NAME
+from slm_data import QA_PAIRS
+
+
+DEFAULT_TOKENIZED_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aiml_chatbot", "tokenized")
+TOKENIZED_FORMAT = 1  # bump when the cached sample layout changes
+TINY_OUTPUT_DIR = "tiny-qlora"
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Hash of everything that decides token ids: vocabulary, merges, normalization and special tokens"""
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    state = backend.to_str() if backend is not None else json.dumps(tokenizer.get_vocab(), sort_keys=True)
+    special = json.dumps(tokenizer.special_tokens_map, sort_keys=True)
+    return hashlib.sha256((state + special).encode("utf-8")).hexdigest()
+
+
+def data_fingerprint(qa_pairs: Sequence[Dict]) -> str:
+    """Hash of the QA pairs and the chat format they are rendered in"""
+    payload = json.dumps([USER_PREFIX, ASSISTANT_PREFIX, list(qa_pairs)], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_tokenized(tokenizer, qa_pairs: Sequence[Dict] = QA_PAIRS, max_length: int = 256,
+                   cache_dir: Optional[str] = DEFAULT_TOKENIZED_DIR) -> Tuple[List[Dict], bool]:
+    """(samples, cache_hit): tokenize_dataset() output, reused from disk when nothing changed"""
+    if not cache_dir:
+        return tokenize_dataset(tokenizer, qa_pairs, max_length), False
+
+    key = hashlib.sha256(f"{TOKENIZED_FORMAT}:{tokenizer_fingerprint(tokenizer)}:"
+                         f"{data_fingerprint(qa_pairs)}:{max_length}".encode("utf-8")).hexdigest()[:32]
+    path = os.path.join(cache_dir, key + ".json")
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f), True
+
+    samples = tokenize_dataset(tokenizer, qa_pairs, max_length)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(samples, f)
+    os.replace(tmp_path, path)
+    return samples, False
+
+
+def load_base_model(model_name: str, gradient_checkpointing: bool):
+    """Phi-2 as in the notebook: 4-bit with bitsandbytes on CUDA, float32 otherwise"""
+    import torch
+    from peft import prepare_model_for_kbit_training
+    from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.pad_token = tokenizer.eos_token
+
+    if torch.cuda.is_available():
+        bnb_config = BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_compute_dtype=torch.float16,
+            bnb_4bit_use_double_quant=True
+        )
+        model = AutoModelForCausalLM.from_pretrained(model_name, quantization_config=bnb_config, device_map="auto")
+        model = prepare_model_for_kbit_training(model, use_gradient_checkpointing=gradient_checkpointing)
+    else:
+        print("⚠️  No CUDA device: training in float32 on CPU without 4-bit quantization")
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+    return model, tokenizer
+
+
+def add_lora(model, tiny: bool):
+    from peft import LoraConfig, get_peft_model
+
+    if tiny:
+        lora_config = LoraConfig(r=8, lora_alpha=16, lora_dropout=0.05, target_modules=["c_attn"],
+                                 fan_in_fan_out=True, task_type="CAUSAL_LM")  # GPT-2 uses Conv1D layers
+    else:
+        lora_config = LoraConfig(r=8, lora_alpha=16, lora_dropout=0.05, target_modules=["q_proj", "v_proj"],
+                                 task_type="CAUSAL_LM")
+    return get_peft_model(model, lora_config)
+
+
+def _throughput_classes():
+    """Trainer subclass that counts real tokens and groups batches by length, and the callback
+    that logs the tokens per optimizer step"""
+    import torch
+    from transformers import Trainer, TrainerCallback
+
+    class ThroughputCallback(TrainerCallback):
+        def __init__(self, log_path: str):
+            self.log_path = log_path
+            self.tokens = 0  # real (unpadded) tokens seen, counted by ThroughputTrainer
+            self.steps: List[Dict] = []
+            self._last_time = self._last_tokens = None
+
+        def on_train_begin(self, args, state, control, **kwargs):
+            self._last_time, self._last_tokens = time.perf_counter(), self.tokens
+
+        def on_step_end(self, args, state, control, **kwargs):
+            now = time.perf_counter()
+            tokens, elapsed = self.tokens - self._last_tokens, now - self._last_time
+            self._last_time, self._last_tokens = now, self.tokens
+            record = {
+                "step": state.global_step,
+                "tokens": tokens,
+                "step_ms": elapsed * 1000,
+                "tokens_per_sec": tokens / elapsed if elapsed else 0.0,
+                "rss_mb": rss_mb(),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+            if torch.cuda.is_available():
+                record["cuda_mb"] = torch.cuda.memory_allocated() / 2**20
+                record["peak_cuda_mb"] = torch.cuda.max_memory_allocated() / 2**20
+            self.steps.append(record)
+            if state.is_world_process_zero:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+                if args.logging_steps and state.global_step % args.logging_steps == 0:
+                    memory = (f"{record['peak_cuda_mb']:.0f} MB CUDA peak" if "peak_cuda_mb" in record
+                              else f"{record['rss_mb']:.0f} MB RSS")
+                    print(f"⏱️  step {state.global_step}: {record['tokens_per_sec']:.0f} tokens/s, "
+                          f"{record['step_ms']:.0f} ms, {memory}")
+
+    class ThroughputTrainer(Trainer):
+        def __init__(self, *args, throughput: ThroughputCallback, group_by_length: bool = False, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.throughput = throughput
+            self.group_by_length = group_by_length
+            self.add_callback(throughput)
+
+        def _get_train_sampler(self, *args, **kwargs):
+            # TrainingArguments(group_by_length=...) is gone in transformers 5, so group here
+            if not self.group_by_length:
+                return super()._get_train_sampler(*args, **kwargs)
+            lengths = [len(s["input_ids"]) for s in self.train_dataset]
+            return LengthGroupedSampler(lengths, self.args.per_device_train_batch_size, self.args.seed)
+
+        def training_step(self, model, inputs, *args, **kwargs):
+            self.throughput.tokens += int(inputs["attention_mask"].sum())
+            return super().training_step(model, inputs, *args, **kwargs)
+
+    return ThroughputCallback, ThroughputTrainer
+
+
+def train(model, tokenizer, samples: List[Dict], output_dir: str, epochs: float = 10, batch_size: int = 2,
+          grad_accum: int = 4, learning_rate: float = 2e-4, gradient_checkpointing: bool = False,
+          group_by_length: bool = True, max_steps: int = -1, logging_steps: int = 5, save_steps: int = 50,
+          save_total_limit: int = 2, resume: bool = False, seed: int = 0) -> List[Dict]:
+    """Fine-tune with Trainer; returns the per-step throughput records"""
+    import torch
+    from transformers import TrainingArguments
+    from transformers.trainer_utils import get_last_checkpoint
+
+    ThroughputCallback, ThroughputTrainer = _throughput_classes()
+    os.makedirs(output_dir, exist_ok=True)
+    training_args = TrainingArguments(
+        output_dir=output_dir,
+        per_device_train_batch_size=batch_size,
+        gradient_accumulation_steps=grad_accum,
+        num_train_epochs=epochs,
+        max_steps=max_steps,
+        learning_rate=learning_rate,
+        logging_steps=logging_steps,
+        fp16=torch.cuda.is_available(),
+        gradient_checkpointing=gradient_checkpointing,
+        gradient_checkpointing_kwargs={"use_reentrant": False} if gradient_checkpointing else None,
+        remove_unused_columns=False,  # the collator needs prompt_spans
+        save_strategy="steps",
+        save_steps=save_steps,
+        save_total_limit=save_total_limit,
+        seed=seed,
+        report_to="none",
+    )
+    throughput = ThroughputCallback(os.path.join(output_dir, "throughput.jsonl"))
+    trainer = ThroughputTrainer(
+        model=model,
+        args=training_args,
+        train_dataset=samples,
+        data_collator=DynamicPaddingCollator(tokenizer.pad_token_id),
+        throughput=throughput,
+        group_by_length=group_by_length,
+    )
+
+    checkpoint = get_last_checkpoint(output_dir) if resume else None
+    if resume and checkpoint is None:
+        print(f"⚠️  No checkpoint in {output_dir}, starting from scratch")
+    elif checkpoint:
+        print(f"↩️  Resuming from {checkpoint}")
+    trainer.train(resume_from_checkpoint=checkpoint)
+
+    model.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    return throughput.steps
+
+
+def print_summary(steps: Sequence[Dict], seconds: float):
+    if not steps:
+        print("No optimizer steps were run")
+        return
+    tokens = sum(s["tokens"] for s in steps)
+    train_seconds = sum(s["step_ms"] for s in steps) / 1000
+    print(f"\n{'optimizer steps':<22}{len(steps):>12}")
+    print(f"{'tokens':<22}{tokens:>12}")
+    print(f"{'tokens/sec':<22}{tokens / train_seconds if train_seconds else 0.0:>12.1f}")
+    print(f"{'peak RSS MB':<22}{max(s['peak_rss_mb'] for s in steps):>12.0f}")
+    if "peak_cuda_mb" in steps[-1]:
+        print(f"{'peak CUDA MB':<22}{max(s['peak_cuda_mb'] for s in steps):>12.0f}")
+    print(f"{'wall time s':<22}{seconds:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QLoRA fine-tuning of the SLM chatbot")
+    parser.add_argument("--tiny", action="store_true", help="tiny random model on CPU, for testing the pipeline")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--output-dir", help=f"adapter and checkpoints (default {ADAPTER_DIR}, {TINY_OUTPUT_DIR} with --tiny)")
+    parser.add_argument("--epochs", type=float, default=10)
+    parser.add_argument("--max-steps", type=int, default=-1, help="stop after this many optimizer steps")
+    parser.add_argument("--batch-size", type=int, default=2)
+    parser.add_argument("--grad-accum", type=int, default=4)
+    parser.add_argument("--lr", type=float, default=2e-4)
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--gradient-checkpointing", action="store_true",
+                        help="recompute activations in the backward pass to save memory")
+    parser.add_argument("--pack", action="store_true", help="pack short samples into --max-length sequences")
+    parser.add_argument("--no-group-by-length", action="store_true", help="batch in random order")
+    parser.add_argument("--logging-steps", type=int, default=5)
+    parser.add_argument("--save-steps", type=int, default=50)
+    parser.add_argument("--save-total-limit", type=int, default=2)
+    parser.add_argument("--resume", action="store_true", help="continue from the latest checkpoint")
+    parser.add_argument("--cache-dir", default=os.getenv("TOKENIZED_CACHE_DIR", DEFAULT_TOKENIZED_DIR),
+                        help="tokenized dataset cache")
+    parser.add_argument("--no-cache", action="store_true", help="always re-tokenize")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("🏋️ QLoRA Fine-Tuning")
+    print("=" * 50)
+    start = time.perf_counter()
+    if args.tiny:
+        from tiny_lm import load_tiny_lm
+        model, tokenizer = load_tiny_lm(n_layer=4, n_embd=256, n_head=4, seed=args.seed)
+    else:
+        model, tokenizer = load_base_model(args.model, args.gradient_checkpointing)
+    model = add_lora(model, args.tiny)
+    model.print_trainable_parameters()
+
+    t0 = time.perf_counter()
+    samples, hit = load_tokenized(tokenizer, QA_PAIRS, args.max_length, None if args.no_cache else args.cache_dir)
+    print(f"📚 {len(samples)} samples {'loaded from cache' if hit else 'tokenized'} "
+          f"in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    if args.pack:
+        samples = pack_samples(samples, args.max_length, tokenizer.eos_token_id)
+        print(f"📦 Packed into {len(samples)} sequences of up to {args.max_length} tokens")
+
+    output_dir = args.output_dir or (TINY_OUTPUT_DIR if args.tiny else ADAPTER_DIR)
+    steps = train(model, tokenizer, samples, output_dir, args.epochs, args.batch_size, args.grad_accum, args.lr,
+                  args.gradient_checkpointing, not args.no_group_by_length, args.max_steps, args.logging_steps,
+                  args.save_steps, args.save_total_limit, args.resume, args.seed)
+    print_summary(steps, time.perf_counter() - start)
+    print(f"\n💾 Adapter saved to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
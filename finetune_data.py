@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Fine-Tuning Data Pipeline
+Replaces the notebook's pad-everything-to-256 `tokenize` with unpadded samples,
+a collator that pads per batch and masks padding and prompt tokens with tensor
+ops, length-grouped batching and optional packing of short samples.
+
+Usage:
+    python finetune_data.py --smoke    # CPU before/after comparison on a tiny model
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from chat_format import encode_example
+from slm_data import QA_PAIRS
+
+
+def tokenize_dataset(tokenizer, qa_pairs: Sequence[Dict] = QA_PAIRS, max_length: int = 256) -> List[Dict]:
+    """Unpadded chat-format examples (ending in EOS) with their prompt spans"""
+    return [encode_example(tokenizer, qa["prompt"], qa["answer"], max_length) for qa in qa_pairs]
+
+
+def pack_samples(samples: List[Dict], max_length: int, eos_token_id: int) -> List[Dict]:
+    """Concatenate short samples into sequences of up to max_length tokens.
+
+    First-fit decreasing, so sequences end up as full as possible. Each sample
+    keeps its own prompt span, shifted to its offset in the packed sequence.
+    A sample longer than max_length is cut like encode_example cuts it: the
+    closing EOS is kept, so the model still learns where answers stop.
+    """
+    packed: List[Dict] = []
+    for sample in sorted(samples, key=lambda s: len(s["input_ids"]), reverse=True):
+        ids = sample["input_ids"]
+        if not ids or ids[-1] != eos_token_id:
+            ids = ids + [eos_token_id]  # keep samples separated
+        if len(ids) > max_length:
+            ids = ids[:max_length - 1] + [eos_token_id]
+        for target in packed:
+            if len(target["input_ids"]) + len(ids) <= max_length:
+                break
+        else:
+            target = {"input_ids": [], "prompt_spans": []}
+            packed.append(target)
+        offset = len(target["input_ids"])
+        target["input_ids"].extend(ids)
+        target["prompt_spans"].extend((offset + start, offset + min(end, len(ids) - 1))
+                                      for start, end in sample["prompt_spans"] if start < len(ids) - 1)
+    return packed
+
+
+def length_grouped_batches(lengths: Sequence[int], batch_size: int, seed: int = 0,
+                           megabatch_factor: int = 8) -> List[List[int]]:
+    """Batches of sample indices with similar lengths.
+
+    Indices are shuffled, cut into megabatches of `megabatch_factor` batches,
+    sorted by length inside each megabatch and split, so batches pad little
+    but training order stays random (the same idea as Trainer's group_by_length).
+    """
+    rng = random.Random(seed)
+    indices = list(range(len(lengths)))
+    rng.shuffle(indices)
+    megabatch = batch_size * megabatch_factor
+    batches = []
+    for start in range(0, len(indices), megabatch):
+        group = sorted(indices[start:start + megabatch], key=lambda i: lengths[i], reverse=True)
+        batches.extend(group[i:i + batch_size] for i in range(0, len(group), batch_size))
+    rng.shuffle(batches)
+    return batches
+
+
+class LengthGroupedSampler:
+    """Sample indices for a DataLoader, in length_grouped_batches order.
+
+    Batches are flattened with the one short batch (if any) moved to the end,
+    so a DataLoader with the same batch_size cuts exactly the same batches.
+    A new grouping is drawn for every epoch passed to set_epoch().
+    """
+
+    def __init__(self, lengths: Sequence[int], batch_size: int, seed: int = 0):
+        self.lengths = list(lengths)
+        self.batch_size = batch_size
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __iter__(self):
+        batches = length_grouped_batches(self.lengths, self.batch_size, self.seed + self.epoch)
+        batches.sort(key=lambda b: len(b) < self.batch_size)  # stable: keeps the shuffled order otherwise
+        return (i for batch in batches for i in batch)
+
+
+class DynamicPaddingCollator:
+    """Pads each batch to its own longest sample and builds labels.
+
+    Labels are -100 on padding (by position, so a real EOS equal to the pad
+    token still counts) and on every prompt span, computed with tensor ops.
+    """
+
+    def __init__(self, pad_token_id: int, mask_prompt: bool = True, pad_to_multiple_of: int = 8):
+        self.pad_token_id = pad_token_id
+        self.mask_prompt = mask_prompt
+        self.pad_to_multiple_of = pad_to_multiple_of
+
+    def __call__(self, features: List[Dict]) -> Dict:
+        import torch
+
+        lengths = torch.tensor([len(f["input_ids"]) for f in features])
+        max_len = int(lengths.max())
+        if self.pad_to_multiple_of:
+            max_len = -(-max_len // self.pad_to_multiple_of) * self.pad_to_multiple_of
+
+        input_ids = torch.full((len(features), max_len), self.pad_token_id, dtype=torch.long)
+        for row, f in enumerate(features):
+            input_ids[row, :len(f["input_ids"])] = torch.tensor(f["input_ids"], dtype=torch.long)
+
+        positions = torch.arange(max_len)
+        attention_mask = (positions[None, :] < lengths[:, None]).long()
+        labels = input_ids.masked_fill(attention_mask == 0, -100)
+
+        if self.mask_prompt:
+            n_spans = max(len(f.get("prompt_spans", [])) for f in features)
+            if n_spans:
+                starts = torch.zeros((len(features), n_spans), dtype=torch.long)
+                ends = torch.zeros((len(features), n_spans), dtype=torch.long)
+                for row, f in enumerate(features):
+                    for col, (start, end) in enumerate(f.get("prompt_spans", [])):
+                        starts[row, col] = start
+                        ends[row, col] = end
+                in_prompt = ((positions[None, None, :] >= starts[..., None]) &
+                             (positions[None, None, :] < ends[..., None])).any(dim=1)
+                labels = labels.masked_fill(in_prompt, -100)
+
+        return {"input_ids": input_ids, "attention_mask": attention_mask, "labels": labels}
+
+
+def padding_waste(batches: List[Dict]) -> Tuple[int, int]:
+    """(real tokens, padding tokens) over collated batches"""
+    real = sum(int(b["attention_mask"].sum()) for b in batches)
+    total = sum(b["attention_mask"].numel() for b in batches)
+    return real, total - real
+
+
+def smoke_run(batch_size: int = 4, steps: int = 20, max_length: int = 256):
+    """Train a tiny model briefly with each pipeline and compare throughput and padding"""
+    import torch
+
+    from tiny_lm import load_tiny_lm
+
+    model, tokenizer = load_tiny_lm(n_layer=4, n_embd=256, n_head=4)
+    samples = tokenize_dataset(tokenizer, max_length=max_length)
+    lengths = [len(s["input_ids"]) for s in samples]
+    collator = DynamicPaddingCollator(tokenizer.pad_token_id)
+
+    def notebook_batches():
+        # padding="max_length" as in the notebook, in dataset order
+        fixed = DynamicPaddingCollator(tokenizer.pad_token_id, pad_to_multiple_of=max_length)
+        return [fixed(samples[i:i + batch_size]) for i in range(0, len(samples), batch_size)]
+
+    def grouped_batches():
+        return [collator([samples[i] for i in b]) for b in length_grouped_batches(lengths, batch_size)]
+
+    def packed_batches():
+        packed = pack_samples(samples, max_length=128, eos_token_id=tokenizer.eos_token_id)
+        return [collator(packed[i:i + batch_size]) for i in range(0, len(packed), batch_size)]
+
+    print(f"📏 {len(samples)} samples, {min(lengths)}-{max(lengths)} tokens (mean {sum(lengths) / len(lengths):.1f})\n")
+    print(f"{'pipeline':<22}{'batches':>8}{'padding':>9}{'tokens/s':>11}{'steps/s':>9}")
+
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-4)
+    for name, build in (("max_length=256", notebook_batches),
+                        ("dynamic + grouped", grouped_batches),
+                        ("dynamic + packed", packed_batches)):
+        batches = build()
+        real, padding = padding_waste(batches)
+
+        model.train()
+        processed = 0
+        start = time.perf_counter()
+        for step in range(steps):
+            batch = batches[step % len(batches)]
+            loss = model(**batch).loss
+            loss.backward()
+            optimizer.step()
+            optimizer.zero_grad()
+            processed += int(batch["attention_mask"].sum())
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:<22}{len(batches):>8}{padding / (real + padding):>9.1%}"
+              f"{processed / elapsed:>11.1f}{steps / elapsed:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fine-tuning data pipeline")
+    parser.add_argument("--smoke", action="store_true", help="CPU throughput/padding comparison")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--steps", type=int, default=20)
+    args = parser.parse_args()
+
+    if not args.smoke:
+        parser.print_help()
+        return
+    print("🧵 Fine-Tuning Data Pipeline Smoke Run")
+    print("=" * 50)
+    smoke_run(args.batch_size, args.steps)
+
+
+if __name__ == "__main__":
+    main()
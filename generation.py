@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Stop-Sequence Aware Generation
+Ends generation as soon as the model starts a fake "User:" turn instead of
+running the full max_new_tokens and cutting the text afterwards, and returns
+only the newly generated answer.
+
+Usage:
+    python generation.py --bench --tiny    # tokens and time per answer, old vs new
+"""
+
+import argparse
+import time
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from chat_format import ASSISTANT_PREFIX, USER_PREFIX, encode_prompt
+
+
+# A new turn marker means the answer is over
+DEFAULT_STOP_SEQUENCES = ("\n" + USER_PREFIX.strip(), ASSISTANT_PREFIX)
+
+
+def make_stop_criteria(tokenizer, stop_sequences: Sequence[str], prompt_length: int):
+    """StoppingCriteria that stops each row when its new text contains a stop sequence.
+
+    Only a short window of the most recent tokens is decoded at every step
+    (long enough to contain any stop sequence), so the cost per step stays
+    constant instead of growing with the answer.
+    """
+    import torch
+    from transformers import StoppingCriteria
+
+    window = max(len(tokenizer(s, add_special_tokens=False)["input_ids"]) for s in stop_sequences) + 2
+
+    class _StopSequenceCriteria(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            done = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+            new_length = input_ids.shape[1] - prompt_length
+            if new_length <= 0:
+                return done
+            tail = input_ids[:, -min(window, new_length):]
+            for row, text in enumerate(tokenizer.batch_decode(tail, skip_special_tokens=True)):
+                done[row] = any(stop in text for stop in stop_sequences)
+            return done
+
+    return _StopSequenceCriteria()
+
+
+def truncate_at_stop(text: str, stop_sequences: Sequence[str]) -> str:
+    """Cut the text at the first stop sequence"""
+    cut = len(text)
+    for stop in stop_sequences:
+        index = text.find(stop)
+        if index != -1:
+            cut = min(cut, index)
+    return text[:cut]
+
+
+def stream_until_stop(chunks: Iterable[str], stop_sequences: Sequence[str]) -> Iterator[str]:
+    """Pass streamed text through, holding back just enough of the tail that a
+    stop sequence split across chunks is never shown"""
+    text, emitted = "", 0
+    hold = max(len(s) for s in stop_sequences) - 1 if stop_sequences else 0
+    for chunk in chunks:
+        text += chunk
+        cut = truncate_at_stop(text, stop_sequences)
+        if len(cut) < len(text):
+            if len(cut) > emitted:
+                yield cut[emitted:]
+            return
+        safe = len(text) - hold
+        if safe > emitted:
+            yield text[emitted:safe]
+            emitted = safe
+    if len(text) > emitted:
+        yield text[emitted:]
+
+
+def context_window(model) -> Optional[int]:
+    """Maximum sequence length the model supports, if its config states one"""
+    config = model.config
+    return getattr(config, "n_positions", None) or getattr(config, "max_position_embeddings", None)
+
+
+def generate_answer(model, tokenizer, question: str, max_new_tokens: int = 100,
+                    stop_sequences: Optional[Sequence[str]] = DEFAULT_STOP_SEQUENCES,
+                    prefix: str = "", prefix_cache=None, drafter=None, **generate_kwargs) -> Tuple[str, int]:
+    """Generate an answer; returns (answer text, number of tokens generated).
+
+    `prefix` (e.g. chat_format.build_context_prefix) goes before the prompt;
+    with a PrefixCache its KV cache is reused instead of being prefilled again.
+    With a speculative.py drafter, decoding is greedy and speculative; other
+    generate() options and the prefix cache are not used on that path.
+    """
+    import torch
+    from transformers import StoppingCriteriaList
+
+    prefix_ids = tokenizer(prefix, add_special_tokens=False)["input_ids"] if prefix else []
+    input_ids = torch.tensor([prefix_ids + encode_prompt(tokenizer, question)], device=model.device)
+    if prefix_ids and prefix_cache is not None:
+        generate_kwargs["past_key_values"] = prefix_cache.get(model, prefix_ids)
+    prompt_length = input_ids.shape[1]
+    window = context_window(model)
+    if window is not None and prompt_length + max_new_tokens > window:
+        raise ValueError(f"Prompt of {prompt_length} tokens plus max_new_tokens={max_new_tokens} exceeds the "
+                         f"model's {window}-token context; shorten the prefix or generate fewer tokens")
+
+    if drafter is not None:
+        return _speculative_answer(model, tokenizer, input_ids[0].tolist(), drafter,
+                                   max_new_tokens, stop_sequences)
+
+    generate_kwargs.setdefault("pad_token_id", tokenizer.eos_token_id)
+    if stop_sequences:
+        generate_kwargs["stopping_criteria"] = StoppingCriteriaList(
+            [make_stop_criteria(tokenizer, stop_sequences, prompt_length)])
+
+    with torch.no_grad():
+        output = model.generate(input_ids=input_ids, attention_mask=torch.ones_like(input_ids),
+                                max_new_tokens=max_new_tokens, **generate_kwargs)
+
+    new_tokens = output[0, prompt_length:]
+    text = tokenizer.decode(new_tokens, skip_special_tokens=True)
+    if stop_sequences:
+        text = truncate_at_stop(text, stop_sequences)
+    return text.strip(), int(new_tokens.shape[0])
+
+
+def _speculative_answer(model, tokenizer, input_ids: List[int], drafter, max_new_tokens: int,
+                       stop_sequences: Optional[Sequence[str]]) -> Tuple[str, int]:
+    from speculative import speculative_generate
+
+    should_stop = None
+    if stop_sequences:
+        window = max(len(tokenizer(s, add_special_tokens=False)["input_ids"]) for s in stop_sequences) + 2
+        prompt_length = len(input_ids)
+
+        def should_stop(ids):
+            # Drafts can add several tokens per step, so look a little further back
+            tail = tokenizer.decode(ids[max(prompt_length, len(ids) - 2 * window):], skip_special_tokens=True)
+            return any(stop in tail for stop in stop_sequences)
+
+    new_tokens = speculative_generate(model, input_ids, drafter, max_new_tokens,
+                                      tokenizer.eos_token_id, should_stop)
+    text = tokenizer.decode(new_tokens, skip_special_tokens=True)
+    if stop_sequences:
+        text = truncate_at_stop(text, stop_sequences)
+    return text.strip(), len(new_tokens)
+
+
+def notebook_answer(model, tokenizer, question: str, max_new_tokens: int = 100,
+                    **generate_kwargs) -> Tuple[str, int]:
+    """The notebook's approach: no stop sequences, so the model runs on into fake turns"""
+    return generate_answer(model, tokenizer, question, max_new_tokens, stop_sequences=None, **generate_kwargs)
+
+
+def train_transcript_model(steps: int = 300, **model_kwargs):
+    """Tiny model trained on back-to-back QA turns, so like the notebook's model
+    it keeps writing "User:" turns after its answer"""
+    import torch
+
+    from slm_data import QA_PAIRS
+    from tiny_lm import load_tiny_lm
+
+    model_kwargs = {"n_layer": 2, "n_embd": 128, "n_head": 2, **model_kwargs}
+    model, tokenizer = load_tiny_lm(**model_kwargs)
+    turns = [f"{USER_PREFIX}{qa['prompt']}{ASSISTANT_PREFIX} {qa['answer']}" for qa in QA_PAIRS]
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-3)
+    model.train()
+    for step in range(steps):
+        start = (step * 3) % len(turns)
+        text = "\n".join((turns + turns)[start:start + 3])
+        ids = torch.tensor([tokenizer(text)["input_ids"]])
+        model(input_ids=ids, labels=ids).loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+    return model.eval(), tokenizer
+
+
+def benchmark(model, tokenizer, questions: List[str], max_new_tokens: int = 100):
+    print(f"{'mode':<14}{'tokens/answer':>15}{'ms/answer':>11}")
+    for name, fn in (("notebook", notebook_answer), ("stop-aware", generate_answer)):
+        fn(model, tokenizer, questions[0], max_new_tokens=4, do_sample=False)  # warm-up
+        tokens = 0
+        start = time.perf_counter()
+        for question in questions:
+            _, n = fn(model, tokenizer, question, max_new_tokens=max_new_tokens, do_sample=False)
+            tokens += n
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{name:<14}{tokens / len(questions):>15.1f}{elapsed / len(questions):>11.1f}")
+
+
+def main():
+    from slm_chatbot import ADAPTER_DIR
+    from slm_data import TEST_QUESTIONS
+
+    parser = argparse.ArgumentParser(description="Stop-sequence aware generation")
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--tiny", action="store_true", help="use a tiny CPU model trained on QA transcripts")
+    parser.add_argument("--adapter", default=ADAPTER_DIR)
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    if not args.bench:
+        parser.print_help()
+        return
+
+    print("🛑 Stop-Sequence Generation Benchmark")
+    print("=" * 50)
+    if args.tiny:
+        model, tokenizer = train_transcript_model()
+    else:
+        from slm_chatbot import load_model
+        model, tokenizer = load_model(args.adapter)
+    benchmark(model, tokenizer, TEST_QUESTIONS, args.max_new_tokens)
+
+
+if __name__ == "__main__":
+    main()
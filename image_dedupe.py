@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Perceptual-Hash Deduplication
+Hashes every image in a folder (dHash or pHash, 64 bits) in one parallel,
+batched pass and groups images whose hashes differ by at most `radius`
+bits into duplicate clusters.
+
+Hamming-radius lookups use a multi-index hash table: the 64 bits are cut
+into m chunks, and two hashes within radius r must agree on at least one
+chunk up to r // m flipped bits (pigeonhole). Each chunk is a sorted
+array, so candidates come from binary searches instead of comparing every
+pair. m is picked from the dataset size so buckets stay small.
+
+Usage:
+    python image_dedupe.py FOLDER [--hash dhash|phash] [--radius 4]
+    python image_dedupe.py --bench     # 10k / 100k / 1M synthetic hashes
+"""
+
+import argparse
+import math
+import time
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from image_index import THUMB_SIZE, gray_thumbnails, phash
+from image_ops import DEFAULT_WORKERS, iter_batches, list_images
+from image_pipeline import imread_flags
+
+
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(x: np.ndarray) -> np.ndarray:
+    """Set bits per uint64 element"""
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(x)
+    return _BYTE_POPCOUNT[np.ascontiguousarray(x).view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+
+def pack_uint64(bits: np.ndarray) -> np.ndarray:
+    """(N, 8) packed big-endian bytes (np.packbits output) -> (N,) uint64"""
+    return np.ascontiguousarray(bits).view(">u8").ravel().astype(np.uint64)
+
+
+def dhash(batch: np.ndarray) -> np.ndarray:
+    """(N,) 64-bit difference hashes: is each pixel brighter than its right neighbour, on a 9x8 thumbnail"""
+    gray = gray_thumbnails(batch, 32).astype(np.uint8)
+    small = np.stack([cv2.resize(g, (9, 8), interpolation=cv2.INTER_AREA) for g in gray]).astype(np.int16)
+    bits = (small[:, :, 1:] > small[:, :, :-1]).reshape(len(gray), 64)
+    return pack_uint64(np.packbits(bits, axis=1))
+
+
+HASHES = {
+    "dhash": dhash,
+    "phash": lambda batch: pack_uint64(phash(batch)),
+}
+
+
+def hash_images(paths: Sequence[str], kind: str = "dhash", batch_size: int = 256,
+                workers: int = DEFAULT_WORKERS, reduce: int = 2) -> np.ndarray:
+    """Hash image files in batches decoded on a worker pool; returns (N,) uint64"""
+    hash_fn = HASHES[kind]
+    out = [hash_fn(batch) for batch in iter_batches(paths, batch_size, imread_flags(reduce), THUMB_SIZE, workers)]
+    return np.concatenate(out) if out else np.zeros(0, dtype=np.uint64)
+
+
+def _expand(lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(row, position) for every position in each [lo, hi) range"""
+    counts = hi - lo
+    rows = np.repeat(np.arange(len(lo)), counts)
+    starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+    return rows, starts + np.arange(counts.sum())
+
+
+class MultiIndexHashTable:
+    def __init__(self, hashes: np.ndarray, radius: int = 4, chunks: int = 0):
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.radius = radius
+        if not chunks:
+            # ~log2(n) bits per chunk keeps buckets near one entry; r // m must stay <= 1
+            by_size = round(64 / max(math.log2(max(len(self.hashes), 2)), 1))
+            chunks = max(math.ceil((radius + 1) / 2), min(radius + 1, by_size))
+        self.chunks = chunks
+        self.chunk_radius = radius // chunks
+        if self.chunk_radius > 1:
+            raise ValueError(f"{chunks} chunks leave {self.chunk_radius} bits per chunk; use more chunks")
+
+        widths = [64 // chunks + (1 if i < 64 % chunks else 0) for i in range(chunks)]
+        self.layout = []  # (shift, width) per chunk
+        self.keys, self.orders = [], []
+        shift = 64
+        for width in widths:
+            shift -= width
+            keys = self._chunk(self.hashes, shift, width)
+            order = np.argsort(keys, kind="stable")
+            self.layout.append((shift, width))
+            self.keys.append(keys[order])
+            self.orders.append(order)
+        self.candidates = 0  # hashes compared by the last query()/pairs()
+
+    @staticmethod
+    def _chunk(hashes: np.ndarray, shift: int, width: int) -> np.ndarray:
+        return (hashes >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+
+    def _flips(self, width: int) -> List[int]:
+        return [0] + ([1 << b for b in range(width)] if self.chunk_radius else [])
+
+    def query(self, h: int, radius: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, distances) of stored hashes within `radius` bits of `h`, closest first"""
+        radius = self.radius if radius is None else radius
+        if radius > self.radius:
+            raise ValueError(f"Table was built for radius <= {self.radius}")
+        h = np.uint64(h)
+        found = []
+        for (shift, width), keys, order in zip(self.layout, self.keys, self.orders):
+            key = int(self._chunk(np.array([h]), shift, width)[0])
+            for flip in self._flips(width):
+                probe = np.uint64(key ^ flip)
+                found.append(order[np.searchsorted(keys, probe, "left"):np.searchsorted(keys, probe, "right")])
+        ids = np.unique(np.concatenate(found))
+        self.candidates = len(ids)
+        distances = popcount(self.hashes[ids] ^ h)
+        keep = distances <= radius
+        ids, distances = ids[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return ids[order], distances[order]
+
+    def pairs(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """All (i, j, distance) with i < j and distance <= radius; a pair may repeat across chunks"""
+        a, b, d = [], [], []
+        self.candidates = 0
+        for (shift, width), keys, order in zip(self.layout, self.keys, self.orders):
+            own = self._chunk(self.hashes, shift, width)
+            for flip in self._flips(width):
+                probe = own ^ np.uint64(flip)
+                lo = np.searchsorted(keys, probe, "left")
+                hi = np.searchsorted(keys, probe, "right")
+                i, pos = _expand(lo, hi)
+                j = order[pos]
+                keep = i < j
+                i, j = i[keep], j[keep]
+                self.candidates += len(i)
+                dist = popcount(self.hashes[i] ^ self.hashes[j])
+                close = dist <= self.radius
+                a.append(i[close])
+                b.append(j[close])
+                d.append(dist[close])
+        return np.concatenate(a), np.concatenate(b), np.concatenate(d)
+
+
+def cluster_labels(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Connected components of the duplicate graph: smallest member id per node"""
+    labels = np.arange(n)
+    while True:
+        low = np.minimum(labels[a], labels[b])
+        before = labels.copy()
+        np.minimum.at(labels, a, low)
+        np.minimum.at(labels, b, low)
+        labels = labels[labels]  # pointer jumping
+        if np.array_equal(labels, before):
+            return labels
+
+
+def duplicate_clusters(hashes: np.ndarray, radius: int = 4) -> List[np.ndarray]:
+    """Groups of ids (size > 1) whose hashes are linked by distances <= radius, largest first"""
+    table = MultiIndexHashTable(hashes, radius)
+    a, b, _ = table.pairs()
+    labels = cluster_labels(len(hashes), a, b)
+    order = np.argsort(labels, kind="stable")
+    groups = np.split(order, np.flatnonzero(np.diff(labels[order])) + 1)
+    return sorted((g for g in groups if len(g) > 1), key=len, reverse=True)
+
+
+def synthetic_hashes(n: int, duplicate_fraction: float = 0.3, max_flips: int = 3,
+                     seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Random 64-bit hashes where a fraction are copies of others with a few bits flipped.
+
+    Returns (hashes, source) with source[i] the id a copy was made from (-1 for originals).
+    """
+    rng = np.random.default_rng(seed)
+    copies = int(n * duplicate_fraction)
+    originals = n - copies
+    hashes = np.empty(n, dtype=np.uint64)
+    hashes[:originals] = rng.integers(0, 2**64, originals, dtype=np.uint64, endpoint=False)
+    source = np.full(n, -1)
+    source[originals:] = rng.integers(0, originals, copies)
+    bits = rng.integers(0, 64, (copies, max_flips)).astype(np.uint64)
+    flips = np.left_shift(np.uint64(1), bits)
+    flips[rng.integers(0, max_flips + 1, copies)[:, None] <= np.arange(max_flips)] = 0  # 0..max_flips flips
+    hashes[originals:] = hashes[source[originals:]] ^ np.bitwise_or.reduce(flips, axis=1)
+    return hashes, source
+
+
+def benchmark(sizes: Sequence[int] = (10_000, 100_000, 1_000_000), radius: int = 4):
+    print(f"{'hashes':>10}{'chunks':>8}{'build s':>9}{'pairs s':>9}{'compared':>14}{'all pairs':>14}"
+          f"{'clusters':>10}{'recall':>8}")
+    for n in sizes:
+        hashes, source = synthetic_hashes(n)
+        start = time.perf_counter()
+        table = MultiIndexHashTable(hashes, radius)
+        built = time.perf_counter()
+        a, b, _ = table.pairs()
+        paired = time.perf_counter()
+
+        labels = cluster_labels(n, a, b)
+        copies = np.flatnonzero(source >= 0)
+        recall = np.mean(labels[copies] == labels[source[copies]]) if len(copies) else 1.0
+        clusters = len(np.unique(labels)) - int(np.sum(np.bincount(labels) == 1))
+        print(f"{n:>10}{table.chunks:>8}{built - start:>9.2f}{paired - built:>9.2f}{table.candidates:>14,}"
+              f"{n * (n - 1) // 2:>14,}{clusters:>10}{recall:>8.1%}")
+
+    queries = hashes[:1000]
+    start = time.perf_counter()
+    compared = 0
+    for h in queries:
+        table.query(int(h))
+        compared += table.candidates
+    elapsed = time.perf_counter() - start
+    print(f"\n🔎 Radius-{radius} query over {n:,} hashes: {elapsed / len(queries) * 1000:.2f} ms, "
+          f"{compared / len(queries):.0f} hashes compared")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perceptual-hash image deduplication")
+    parser.add_argument("folder", nargs="?")
+    parser.add_argument("--hash", choices=sorted(HASHES), default="dhash")
+    parser.add_argument("--radius", type=int, default=4, help="max differing bits for a duplicate")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--bench", action="store_true", help="scaling benchmark on synthetic hashes")
+    args = parser.parse_args()
+
+    if args.bench:
+        print("🧬 Hash Dedupe Benchmark")
+        print("=" * 50)
+        benchmark(radius=args.radius)
+        return
+    if not args.folder:
+        parser.print_help()
+        return
+
+    paths = list_images(args.folder)
+    start = time.perf_counter()
+    hashes = hash_images(paths, args.hash, workers=args.workers)
+    hashed = time.perf_counter()
+    clusters = duplicate_clusters(hashes, args.radius)
+    print(f"🧬 {len(paths)} images hashed in {hashed - start:.1f}s, clustered in {time.perf_counter() - hashed:.2f}s")
+    redundant = sum(len(c) - 1 for c in clusters)
+    print(f"📦 {len(clusters)} duplicate clusters, {redundant} redundant images\n")
+    for cluster in clusters:
+        print(f"  {len(cluster)} images:")
+        for i in cluster:
+            print(f"    {paths[i]}")
+
+
+if __name__ == "__main__":
+    main()
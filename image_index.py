@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Image Search Index
+Compact descriptors for images, computed over whole batches of thumbnails:
+an HSV colour histogram (the colour space used in images.ipynb) for
+similar-image search and a 64-bit perceptual hash for near-duplicate lookup.
+Histograms go into a FAISS inner-product index and hashes into a FAISS
+binary index, both keyed by ids in a shared document store - pass a built
+RAGRetriever and image records become documents next to the text corpus,
+searchable by caption (retriever.search(..., doc_type="image")) as well as by
+appearance. They are stored with type "image", so text searches skip them.
+
+Usage:
+    python image_index.py --bench              # add_batch throughput and query latency at 100k images
+    python image_index.py --bench --rag        # ... with captions going into a RAGRetriever
+    python image_index.py --folder DIR --query IMAGE
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from bench_utils import percentile
+from image_ops import DEFAULT_WORKERS, convert_color, iter_batches
+from image_pipeline import imread_flags
+
+
+THUMB_SIZE = (64, 64)
+HIST_BINS = (8, 4, 4)  # H, S, V
+HIST_DIM = HIST_BINS[0] * HIST_BINS[1] * HIST_BINS[2]
+HASH_BITS = 64
+
+
+def hsv_histograms(batch: np.ndarray) -> np.ndarray:
+    """(N, 128) HSV histograms of a BGR batch, one bincount for the whole batch.
+
+    Rows are square roots of the bin frequencies, so they have unit length
+    and the inner product of two rows is their Bhattacharyya coefficient.
+    """
+    n = len(batch)
+    hsv = convert_color(batch, cv2.COLOR_BGR2HSV).reshape(n, -1, 3)
+    h_bins, s_bins, v_bins = HIST_BINS
+    h = hsv[..., 0].astype(np.int32) * h_bins // 180  # OpenCV hue is 0..179
+    s = hsv[..., 1].astype(np.int32) * s_bins // 256
+    v = hsv[..., 2].astype(np.int32) * v_bins // 256
+    bins = (h * s_bins + s) * v_bins + v + (np.arange(n, dtype=np.int32) * HIST_DIM)[:, None]
+    counts = np.bincount(bins.ravel(), minlength=n * HIST_DIM).reshape(n, HIST_DIM)
+    return np.sqrt(counts / hsv.shape[1]).astype(np.float32)
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    k = np.arange(size)[:, None]
+    x = np.arange(size)[None, :]
+    m = np.cos(np.pi * (2 * x + 1) * k / (2 * size)) * np.sqrt(2.0 / size)
+    m[0] /= np.sqrt(2.0)
+    return m.astype(np.float32)
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def gray_thumbnails(batch: np.ndarray, size: int) -> np.ndarray:
+    """(N, size, size) float32 grayscale thumbnails by block averaging"""
+    gray = batch if batch.ndim == 3 else convert_color(batch, cv2.COLOR_BGR2GRAY)
+    n, h, w = gray.shape
+    if h % size or w % size:
+        gray = np.stack([cv2.resize(g, (size, size), interpolation=cv2.INTER_AREA) for g in gray])
+        return gray.astype(np.float32)
+    return gray.reshape(n, size, h // size, size, w // size).mean(axis=(2, 4), dtype=np.float32)
+
+
+def phash(batch: np.ndarray) -> np.ndarray:
+    """(N, 8) packed 64-bit perceptual hashes: sign of the low 8x8 DCT terms vs their median"""
+    gray = gray_thumbnails(batch, 32)
+    low = (_DCT32 @ gray @ _DCT32.T)[:, :8, :8].reshape(len(gray), 64)
+    bits = low > np.median(low[:, 1:], axis=1, keepdims=True)  # DC term would skew the median
+    return np.packbits(bits, axis=1)
+
+
+def caption(path: str) -> str:
+    """Text stored for an image document: its file name in words"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return "Image: " + name.replace("_", " ").replace("-", " ")
+
+
+class ImageIndex:
+    def __init__(self, retriever=None, use_phash: bool = True):
+        import faiss
+
+        self.retriever = retriever
+        self._store: List[Dict] = []
+        self.hist_index = faiss.IndexIDMap(faiss.IndexFlatIP(HIST_DIM))
+        self.hash_index = faiss.IndexBinaryIDMap(faiss.IndexBinaryFlat(HASH_BITS)) if use_phash else None
+
+    @property
+    def store(self) -> List[Dict]:
+        """Documents by id; the retriever's, read each time since build() and load() replace them"""
+        return self.retriever.docs if self.retriever is not None else self._store
+
+    def describe(self, batch: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Descriptors for a (N, H, W, 3) BGR batch of thumbnails"""
+        hashes = phash(batch) if self.hash_index is not None else None
+        return hsv_histograms(batch), hashes
+
+    def add_batch(self, batch: np.ndarray, records: Sequence[Dict]) -> List[int]:
+        """Store `records` as documents and index the matching images; returns their ids"""
+        hists, hashes = self.describe(batch)
+        records = [dict(r, type="image") for r in records]
+        if self.retriever is not None:
+            ids = self.retriever.add(records)
+        else:
+            ids = list(range(len(self._store), len(self._store) + len(records)))
+            self._store.extend(records)
+        id_array = np.asarray(ids, dtype=np.int64)
+        self.hist_index.add_with_ids(hists, id_array)
+        if hashes is not None:
+            self.hash_index.add_with_ids(hashes, id_array)
+        return ids
+
+    def add_images(self, paths: Sequence[str], batch_size: int = 256, workers: int = DEFAULT_WORKERS,
+                   reduce: int = 2) -> int:
+        """Decode, describe and index image files; returns how many were added"""
+        added = 0
+        for start, batch in zip(range(0, len(paths), batch_size),
+                                iter_batches(paths, batch_size, imread_flags(reduce), THUMB_SIZE, workers)):
+            chunk = paths[start:start + batch_size]
+            added += len(self.add_batch(batch, [{"text": caption(p), "image": p} for p in chunk]))
+        return added
+
+    def _thumbnail(self, image: np.ndarray) -> np.ndarray:
+        return cv2.resize(image, THUMB_SIZE, interpolation=cv2.INTER_AREA)[None]
+
+    def similar(self, image: np.ndarray, k: int = 5) -> List[Dict]:
+        """Most similar images by colour histogram, best first"""
+        scores, ids = self.hist_index.search(hsv_histograms(self._thumbnail(image)), k)
+        return [dict(self.store[i], id=int(i), score=float(s)) for s, i in zip(scores[0], ids[0]) if i != -1]
+
+    def near_duplicates(self, image: np.ndarray, max_distance: int = 8, k: int = 20) -> List[Dict]:
+        """Images whose perceptual hash is within `max_distance` bits, closest first"""
+        if self.hash_index is None:
+            raise RuntimeError("ImageIndex was built without perceptual hashes")
+        distances, ids = self.hash_index.search(phash(self._thumbnail(image)), k)
+        return [dict(self.store[i], id=int(i), distance=int(d))
+                for d, i in zip(distances[0], ids[0]) if i != -1 and d <= max_distance]
+
+
+def _synthetic_thumbnails(n: int, rng) -> np.ndarray:
+    """Flat-coloured noisy thumbnails with a bright box, enough structure for both descriptors"""
+    w, h = THUMB_SIZE
+    base = rng.integers(0, 256, (n, 1, 1, 3))
+    batch = np.clip(base + rng.normal(0, 20, (n, h, w, 3)), 0, 255).astype(np.uint8)
+    corners = rng.integers(0, w // 2, (n, 2))
+    for img, (x, y) in zip(batch, corners):
+        img[y:y + h // 2, x:x + w // 2] = 255 - img[y:y + h // 2, x:x + w // 2]
+    return batch
+
+
+def benchmark(count: int = 100_000, batch_size: int = 1000, queries: int = 200, retriever=None):
+    index = ImageIndex(retriever)
+    rng = np.random.default_rng(0)
+    add_s = 0.0
+    samples, sample_ids = [], []
+    print(f"🖼️  Indexing {count} synthetic {THUMB_SIZE[0]}x{THUMB_SIZE[1]} thumbnails with add_batch...")
+    for start in range(0, count, batch_size):
+        batch = _synthetic_thumbnails(min(batch_size, count - start), rng)
+        records = [{"text": f"Image: synthetic {start + i}", "image": f"synthetic_{start + i}.png"}
+                   for i in range(len(batch))]
+        t0 = time.perf_counter()
+        ids = index.add_batch(batch, records)
+        add_s += time.perf_counter() - t0
+
+        take = min(queries - len(samples), len(batch))
+        samples.extend(batch[:take])
+        sample_ids.extend(ids[:take])
+
+    stage = "add_batch + RAG add" if retriever is not None else "add_batch"
+    print(f"\n{'stage':<22}{'images/s':>12}")
+    print(f"{stage:<22}{count / add_s:>12.0f}")
+
+    lookups = [("similar (HSV)", lambda i, img: index.similar(img, 5)),
+               ("near-dup (pHash)", lambda i, img: index.near_duplicates(img, 8))]
+    if retriever is not None:
+        lookups.append(("caption (RAG)", lambda i, img: retriever.search(index.store[i]["text"], 5, doc_type="image")))
+    print(f"\n{'query':<22}{'p50 ms':>10}{'p95 ms':>10}{'top-1 self':>12}")
+    for name, lookup in lookups:
+        latencies, found = [], 0
+        for i, img in zip(sample_ids, samples):
+            t0 = time.perf_counter()
+            results = lookup(i, img)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            found += any(r["id"] == i for r in results[:1])
+        print(f"{name:<22}{percentile(latencies, 50):>10.2f}{percentile(latencies, 95):>10.2f}"
+              f"{found / len(samples):>12.1%}")
+    if retriever is not None:
+        t0 = time.perf_counter()
+        results = retriever.search("synthetic image", 10)
+        leaked = sum(index.store[r["id"]].get("type") == "image" for r in results)
+        print(f"\n📚 Text search next to {count} images: {(time.perf_counter() - t0) * 1000:.1f} ms, "
+              f"{leaked} image results")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image search index")
+    parser.add_argument("--bench", action="store_true", help="throughput and latency at --count images")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--rag", action="store_true", help="benchmark with a RAGRetriever as the document store")
+    parser.add_argument("--folder", help="index the images in this folder")
+    parser.add_argument("--query", help="image to look up in --folder")
+    args = parser.parse_args()
+
+    if args.bench:
+        print("🔎 Image Index Benchmark")
+        print("=" * 50)
+        retriever = None
+        if args.rag:
+            from rag_retrieval import RAGRetriever
+            retriever = RAGRetriever(cache_dir=None).build()  # keep synthetic captions out of the cache
+        benchmark(args.count, retriever=retriever)
+        return
+    if not args.folder:
+        parser.print_help()
+        return
+
+    from image_ops import list_images
+
+    index = ImageIndex()
+    paths = list_images(args.folder)
+    start = time.perf_counter()
+    index.add_images(paths)
+    print(f"🖼️  Indexed {len(paths)} images in {time.perf_counter() - start:.1f}s")
+    if args.query:
+        query = cv2.imread(args.query, cv2.IMREAD_COLOR)
+        print("\nSimilar:")
+        for r in index.similar(query):
+            print(f"  {r['score']:.3f}  {r['image']}")
+        print("\nNear-duplicates:")
+        for r in index.near_duplicates(query):
+            print(f"  {r['distance']:>3} bits  {r['image']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Batched Image Operations
+The images.ipynb steps (imread, split/merge, BGR->RGB and BGR->HSV) as
+functions over whole batches. Images are decoded on a thread pool (OpenCV
+releases the GIL) straight into one stacked (N, H, W, C) array, channel
+split, merge and RGB reordering are views, and colour conversion is a single
+cvtColor call per batch. Views are copied to contiguous memory only when an
+operation needs it (materialize).
+
+Usage:
+    python image_ops.py --bench          # images/sec and peak memory vs the per-image notebook cells
+    python image_ops.py --bench-views    # allocation per 8K image, views vs cv2.split/merge
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from bench_utils import rss_mb
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def list_images(folder: str) -> List[str]:
+    """Image files in a folder, sorted by name"""
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def read_image(path: str, flags: int = cv2.IMREAD_COLOR) -> np.ndarray:
+    """cv2.imread that raises instead of returning None"""
+    img = cv2.imread(path, flags)
+    if img is None:
+        raise ValueError(f"Could not decode image: {path}")
+    return img
+
+
+def read_batch(paths: Sequence[str], flags: int = cv2.IMREAD_COLOR, size: Optional[Tuple[int, int]] = None,
+               workers: int = DEFAULT_WORKERS, pool: Optional[ThreadPoolExecutor] = None) -> np.ndarray:
+    """Decode images in parallel into one (N, H, W[, C]) uint8 array.
+
+    Each decoded image is copied into its slot and dropped, so only the
+    batch plus one image per worker is alive at a time. Without `size`
+    every image must have the shape of the first one; with `size` (W, H)
+    images are resized to it.
+    """
+    if not paths:
+        raise ValueError("read_batch needs at least one path")
+
+    def load(path):
+        img = read_image(path, flags)
+        if size is not None and img.shape[1::-1] != tuple(size):
+            img = cv2.resize(img, tuple(size), interpolation=cv2.INTER_AREA)
+        return img
+
+    first = load(paths[0])
+    batch = np.empty((len(paths),) + first.shape, dtype=first.dtype)
+    batch[0] = first
+
+    def fill(i):
+        img = load(paths[i])
+        if img.shape != first.shape:
+            raise ValueError(f"{paths[i]} has shape {img.shape}, expected {first.shape}; pass size=")
+        batch[i] = img
+
+    if len(paths) > 1:
+        own_pool = pool is None
+        pool = pool or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imread")
+        try:
+            list(pool.map(fill, range(1, len(paths))))
+        finally:
+            if own_pool:
+                pool.shutdown()
+    return batch
+
+
+def iter_batches(paths: Sequence[str], batch_size: int = 256, flags: int = cv2.IMREAD_COLOR,
+                 size: Optional[Tuple[int, int]] = None, workers: int = DEFAULT_WORKERS) -> Iterator[np.ndarray]:
+    """Yield stacked batches of `batch_size` images, reusing one decode pool"""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imread") as pool:
+        for start in range(0, len(paths), batch_size):
+            yield read_batch(paths[start:start + batch_size], flags, size, pool=pool)
+
+
+def split_channels(batch: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Per-channel views of an image or batch (no copies, unlike cv2.split)"""
+    return tuple(batch[..., c] for c in range(batch.shape[-1]))
+
+
+def _root(arr: np.ndarray) -> np.ndarray:
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+
+def _address(arr: np.ndarray) -> int:
+    return arr.__array_interface__["data"][0]
+
+
+def merge_channels(channels: Sequence[np.ndarray]) -> np.ndarray:
+    """Stack channels back into one (..., C) array.
+
+    Channels that are evenly spaced views into the same buffer (the output
+    of split_channels, in either order) are re-interleaved as a read-only
+    view; only unrelated channels are copied.
+    """
+    first = channels[0]
+    same_layout = all(c.shape == first.shape and c.strides == first.strides and c.dtype == first.dtype
+                      and _root(c) is _root(first) for c in channels)
+    if same_layout and len(channels) > 1:
+        step = _address(channels[1]) - _address(first)
+        if step and all(_address(c) - _address(first) == i * step for i, c in enumerate(channels)):
+            return np.lib.stride_tricks.as_strided(first, shape=first.shape + (len(channels),),
+                                                   strides=first.strides + (step,), writeable=False)
+    return np.stack(channels, axis=-1)
+
+
+def bgr_to_rgb(batch: np.ndarray) -> np.ndarray:
+    """RGB view of a BGR image or batch (same memory, reversed channel stride)"""
+    return batch[..., ::-1]
+
+
+rgb_to_bgr = bgr_to_rgb
+
+
+def materialize(arr: np.ndarray) -> np.ndarray:
+    """Contiguous array for ops that need one; views are copied only here, on demand"""
+    return arr if arr.flags.c_contiguous else np.ascontiguousarray(arr)
+
+
+# Conversions whose input channel order can be flipped by changing the code
+# instead of copying a reversed-channel view
+_CHANNEL_SWAPPED_CODES = {
+    cv2.COLOR_BGR2HSV: cv2.COLOR_RGB2HSV,
+    cv2.COLOR_RGB2HSV: cv2.COLOR_BGR2HSV,
+    cv2.COLOR_BGR2HSV_FULL: cv2.COLOR_RGB2HSV_FULL,
+    cv2.COLOR_RGB2HSV_FULL: cv2.COLOR_BGR2HSV_FULL,
+    cv2.COLOR_BGR2GRAY: cv2.COLOR_RGB2GRAY,
+    cv2.COLOR_RGB2GRAY: cv2.COLOR_BGR2GRAY,
+    cv2.COLOR_BGR2LAB: cv2.COLOR_RGB2LAB,
+    cv2.COLOR_RGB2LAB: cv2.COLOR_BGR2LAB,
+    cv2.COLOR_BGR2YCrCb: cv2.COLOR_RGB2YCrCb,
+    cv2.COLOR_RGB2YCrCb: cv2.COLOR_BGR2YCrCb,
+}
+
+
+def _unreversed(batch: np.ndarray) -> Optional[np.ndarray]:
+    """The contiguous array behind a batch[..., ::-1] view, if that is what `batch` is"""
+    if batch.ndim < 3 or batch.strides[-1] >= 0 or batch.shape[-1] != 3:
+        return None
+    flipped = batch[..., ::-1]
+    return flipped if flipped.flags.c_contiguous else None
+
+
+def convert_color(batch: np.ndarray, code: int) -> np.ndarray:
+    """cvtColor over a whole (N, H, W[, C]) batch in one call.
+
+    Per-pixel conversions do not care about image boundaries, so the batch
+    is viewed as one tall (N*H, W[, C]) image. A reversed-channel view
+    (bgr_to_rgb) is converted from the underlying buffer with the mirrored
+    code rather than copied. For a single image call cv2.cvtColor directly.
+    """
+    source = _unreversed(batch)
+    if source is not None and code in _CHANNEL_SWAPPED_CODES:
+        batch, code = source, _CHANNEL_SWAPPED_CODES[code]
+    n, h = batch.shape[:2]
+    tall = materialize(batch).reshape((n * h,) + batch.shape[2:])
+    out = cv2.cvtColor(tall, code)
+    return out.reshape((n, h) + out.shape[1:])
+
+
+def make_synthetic_folder(folder: str, count: int, size: Tuple[int, int] = (128, 128), ext: str = ".jpg",
+                          seed: int = 0, prefix: str = "img_") -> List[str]:
+    """Write `count` random product-like images (gradient + coloured boxes); returns their paths"""
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    w, h = size
+    ramp = np.linspace(0, 255, w, dtype=np.float32)[None, :, None]
+    paths = []
+    for i in range(count):
+        base = rng.integers(0, 256, 3).astype(np.float32)
+        img = np.clip(base * 0.6 + ramp * 0.4, 0, 255).astype(np.uint8).repeat(h, axis=0)
+        for _ in range(3):
+            x0, y0 = rng.integers(0, w - 8), rng.integers(0, h - 8)
+            x1, y1 = x0 + rng.integers(4, w // 2), y0 + rng.integers(4, h // 2)
+            cv2.rectangle(img, (int(x0), int(y0)), (int(x1), int(y1)), tuple(int(c) for c in rng.integers(0, 256, 3)), -1)
+        path = os.path.join(folder, f"{prefix}{i:06d}{ext}")
+        cv2.imwrite(path, img)
+        paths.append(path)
+    return paths
+
+
+def _notebook_cells(paths: Sequence[str]) -> np.ndarray:
+    """The images.ipynb cells applied to one image at a time"""
+    means = []
+    for path in paths:
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        b, g, r = cv2.split(img)
+        merged = cv2.merge((b, g, r))
+        rgb = cv2.cvtColor(merged, cv2.COLOR_BGR2RGB)
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        h, s, v = cv2.split(hsv)
+        means.append((h.mean(), s.mean(), v.mean()))
+    return np.array(means)
+
+
+def _batched(paths: Sequence[str], batch_size: int, workers: int, size: Tuple[int, int]) -> np.ndarray:
+    """Same outputs through the batched operations"""
+    means = []
+    for batch in iter_batches(paths, batch_size, size=size, workers=workers):
+        b, g, r = split_channels(batch)
+        rgb = bgr_to_rgb(batch)
+        hsv = convert_color(batch, cv2.COLOR_BGR2HSV)
+        means.append(hsv.reshape(len(batch), -1, 3).mean(axis=1))
+    return np.concatenate(means)
+
+
+def benchmark(count: int = 2000, size: Tuple[int, int] = (128, 128), batch_size: int = 256,
+              workers: int = DEFAULT_WORKERS, folder: Optional[str] = None):
+    tmp_dir = None
+    if folder is None:
+        tmp_dir = folder = tempfile.mkdtemp(prefix="image_ops_bench_")
+    try:
+        if tmp_dir is not None:
+            print(f"🖼️  Writing {count} synthetic {size[0]}x{size[1]} images to {folder}...")
+            paths = make_synthetic_folder(folder, count, size)
+        else:
+            paths = list_images(folder)[:count]
+
+        modes = (
+            ("per-image", lambda: _notebook_cells(paths)),
+            (f"batched x{workers}", lambda: _batched(paths, batch_size, workers, size)),
+        )
+        results = {}
+        print(f"\n{'mode':<14}{'images/s':>10}{'peak MB':>10}{'RSS MB':>9}")
+        for name, run in modes:
+            start = time.perf_counter()
+            results[name] = run()
+            elapsed = time.perf_counter() - start
+
+            # Second pass for memory: tracemalloc sees NumPy buffers, including cv2 outputs
+            tracemalloc.start()
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{name:<14}{len(paths) / elapsed:>10.1f}{peak / 2**20:>10.1f}{rss_mb():>9.1f}")
+
+        if tmp_dir is not None:  # real folders get resized for batching, so only compare synthetic ones
+            a, b = results.values()
+            print(f"\n✅ Max difference in mean HSV: {np.abs(a - b).max():.2e}")
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _notebook_channels(img: np.ndarray):
+    """images.ipynb channel cells: cv2.split/merge copies and cvtColor for RGB"""
+    b, g, r = cv2.split(img)
+    merged = cv2.merge((b, g, r))
+    display = merged[:, :, ::-1]
+    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    h, s, v = cv2.split(hsv)
+    return display, rgb, (h, s, v)
+
+
+def _view_channels(img: np.ndarray):
+    """Same outputs as views; only the HSV conversion allocates"""
+    b, g, r = split_channels(img)
+    merged = merge_channels((b, g, r))
+    display = bgr_to_rgb(merged)
+    rgb = bgr_to_rgb(img)
+    hsv = convert_color(img[None], cv2.COLOR_BGR2HSV)[0]
+    h, s, v = split_channels(hsv)
+    return display, rgb, (h, s, v)
+
+
+def benchmark_views(width: int = 7680, height: int = 4320, repeats: int = 5):
+    """Bytes allocated and passes/sec for the channel cells on one large image"""
+    img = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    print(f"🖼️  {width}x{height} BGR image, {img.nbytes / 2**20:.0f} MB\n")
+
+    outputs = {}
+    print(f"{'mode':<10}{'alloc MB/image':>16}{'images/s':>10}")
+    for name, run in (("split/merge", _notebook_channels), ("views", _view_channels)):
+        tracemalloc.start()
+        outputs[name] = run(img)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            run(img)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<10}{peak / 2**20:>16.1f}{repeats / elapsed:>10.2f}")
+
+    (display_a, rgb_a, hsv_a), (display_b, rgb_b, hsv_b) = outputs.values()
+    same = (np.array_equal(display_a, display_b) and np.array_equal(rgb_a, rgb_b)
+            and all(np.array_equal(x, y) for x, y in zip(hsv_a, hsv_b)))
+    print(f"\n{'✅' if same else '❌'} Outputs {'identical' if same else 'differ'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched image operations")
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--bench-views", action="store_true", help="channel views vs split/merge on an 8K image")
+    parser.add_argument("--folder", help="image folder to benchmark (default: synthetic images in a temp dir); "
+                        "batches are resized to 128x128")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    if not (args.bench or args.bench_views):
+        parser.print_help()
+        return
+    if args.bench:
+        print("🖼️  Batched Image Ops Benchmark")
+        print("=" * 50)
+        benchmark(args.count, batch_size=args.batch_size, workers=args.workers, folder=args.folder)
+    if args.bench_views:
+        print("🔍 Channel View Benchmark")
+        print("=" * 50)
+        benchmark_views()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Streaming Image Decode Pipeline
+Decodes image files on a worker pool (cv2.imread releases the GIL) while the
+consumer works on earlier ones. At most `prefetch` images are decoded ahead,
+results come back in input order, and thumbnails can be decoded directly at
+1/2, 1/4 or 1/8 resolution with the IMREAD_REDUCED_* flags, which skips most
+of the JPEG decode work.
+
+Usage:
+    python image_pipeline.py --bench    # serial imread vs the pipeline on generated JPEG/PNG files
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from image_ops import DEFAULT_WORKERS, list_images, make_synthetic_folder, read_image
+
+
+REDUCED_FLAGS = {
+    1: (cv2.IMREAD_COLOR, cv2.IMREAD_GRAYSCALE),
+    2: (cv2.IMREAD_REDUCED_COLOR_2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+    4: (cv2.IMREAD_REDUCED_COLOR_4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    8: (cv2.IMREAD_REDUCED_COLOR_8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+}
+
+
+def imread_flags(reduce: int = 1, grayscale: bool = False) -> int:
+    """imread flags that decode at 1/`reduce` of the full resolution"""
+    if reduce not in REDUCED_FLAGS:
+        raise ValueError(f"reduce must be one of {sorted(REDUCED_FLAGS)}, got {reduce}")
+    return REDUCED_FLAGS[reduce][1 if grayscale else 0]
+
+
+def stream_images(paths: Sequence[str], workers: int = DEFAULT_WORKERS, prefetch: Optional[int] = None,
+                  reduce: int = 1, grayscale: bool = False,
+                  size: Optional[Tuple[int, int]] = None) -> Iterator[Tuple[str, np.ndarray]]:
+    """Yield (path, image) in order, decoding up to `prefetch` images ahead.
+
+    `size` (W, H) resizes after the (possibly reduced) decode. Closing the
+    generator early cancels decodes that have not started.
+    """
+    flags = imread_flags(reduce, grayscale)
+    prefetch = prefetch or 2 * workers
+
+    def load(path):
+        img = read_image(path, flags)
+        if size is not None and img.shape[1::-1] != tuple(size):
+            img = cv2.resize(img, tuple(size), interpolation=cv2.INTER_AREA)
+        return img
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="decode")
+    pending = deque()
+    queued = iter(paths)
+    try:
+        for path in queued:
+            pending.append((path, pool.submit(load, path)))
+            if len(pending) >= prefetch:
+                break
+        while pending:
+            path, future = pending.popleft()
+            img = future.result()
+            next_path = next(queued, None)
+            if next_path is not None:
+                pending.append((next_path, pool.submit(load, next_path)))
+            yield path, img
+    finally:
+        for _, future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+def benchmark(count: int = 200, size: Tuple[int, int] = (1920, 1080), workers: int = DEFAULT_WORKERS):
+    folder = tempfile.mkdtemp(prefix="image_pipeline_bench_")
+    try:
+        print(f"🖼️  Writing {count} synthetic {size[0]}x{size[1]} JPEG/PNG files...")
+        make_synthetic_folder(folder, count - count // 2, size, ".jpg")
+        make_synthetic_folder(folder, count // 2, size, ".png", seed=1, prefix="png_")
+        paths = list_images(folder)
+
+        def serial():
+            for path in paths:
+                yield path, cv2.imread(path, cv2.IMREAD_COLOR)
+
+        modes = (
+            ("serial imread", serial),
+            (f"pipeline x{workers}", lambda: stream_images(paths, workers)),
+            (f"pipeline x{workers} 1/4", lambda: stream_images(paths, workers, reduce=4)),
+        )
+        print(f"\n{'mode':<22}{'images/s':>10}{'first ms':>10}{'MPix/img':>10}")
+        for name, run in modes:
+            start = time.perf_counter()
+            first_ms, pixels, n = None, 0, 0
+            for _, img in run():
+                if first_ms is None:
+                    first_ms = (time.perf_counter() - start) * 1000
+                pixels += img.shape[0] * img.shape[1]
+                n += 1
+            elapsed = time.perf_counter() - start
+            print(f"{name:<22}{n / elapsed:>10.1f}{first_ms:>10.1f}{pixels / n / 1e6:>10.2f}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming image decode pipeline")
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    if not args.bench:
+        parser.print_help()
+        return
+    print("🚚 Image Decode Pipeline Benchmark")
+    print("=" * 50)
+    benchmark(args.count, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
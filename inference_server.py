@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Batched Inference Server for the SLM Chatbot
+Accepts concurrent generation requests and decodes them together with
+continuous batching - new requests join the running batch between decode
+steps and finished ones leave it - streaming tokens back to each caller as
+they are decoded, so throughput grows with load instead of serving one
+prompt at a time.
+
+Rows share one left-padded KV cache, so a long prompt pads every shorter
+row until it finishes. Instead of fixed length buckets (which would split
+the batch), admission caps that padding: a request joins only while the
+padded share of the cache stays under --max-padding, otherwise it waits for
+rows to finish. A request that has waited past --max-defer-ms holds back
+later arrivals, so the batch drains and it cannot starve.
+
+Usage:
+    python inference_server.py --adapter phi2-qlora --port 8000
+    python inference_server.py --tiny --load-test
+"""
+
+import argparse
+import collections
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+_DONE = object()
+
+
+class TokenStream:
+    """Text chunks for one request, readable while the batch is still decoding"""
+
+    def __init__(self):
+        self._chunks = queue.Queue()
+        self.tokens = 0
+        self.first_token_time: Optional[float] = None
+        self.submit_time = time.perf_counter()
+        self.error: Optional[BaseException] = None
+
+    def _put(self, chunk: str):
+        if self.first_token_time is None:
+            self.first_token_time = time.perf_counter()
+        self._chunks.put(chunk)
+
+    def _finish(self, error: Optional[BaseException] = None):
+        self.error = error
+        self._chunks.put(_DONE)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            chunk = self._chunks.get()
+            if chunk is _DONE:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield chunk
+
+    def text(self) -> str:
+        """Block until generation finishes and return the full text"""
+        return "".join(self)
+
+
+class _Request:
+    def __init__(self, input_ids: List[int], max_new_tokens: int, temperature: float):
+        self.input_ids = input_ids
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.stream = TokenStream()
+        self.generated: List[int] = []
+        # Incremental detokenization: tokens before prefix_offset are done; read_offset marks what was streamed
+        self.prefix_offset = 0
+        self.read_offset = 0
+        self.finished = False
+
+
+def sample_next(logits, temperatures, top_p: float = 1.0):
+    """Pick the next token per row: greedy where temperature is 0, else top-p sampling"""
+    import torch
+
+    greedy = logits.argmax(dim=-1)
+    sampling = temperatures > 0
+    if not bool(sampling.any()):
+        return greedy
+
+    probs = torch.softmax(logits.float() / temperatures.clamp(min=1e-5)[:, None], dim=-1)
+    if top_p < 1.0:
+        sorted_probs, sorted_ids = probs.sort(dim=-1, descending=True)
+        sorted_probs[(sorted_probs.cumsum(dim=-1) - sorted_probs) > top_p] = 0
+        probs = torch.zeros_like(probs).scatter_(1, sorted_ids, sorted_probs)
+    sampled = torch.multinomial(probs, 1).squeeze(1)
+    return torch.where(sampling, sampled, greedy)
+
+
+def _cache_layers(past) -> List[Tuple]:
+    """Per-layer (keys, values) tensors of a past_key_values object, any transformers version"""
+    if hasattr(past, "layers"):
+        return [(layer.keys, layer.values) for layer in past.layers]
+    if hasattr(past, "key_cache"):
+        return list(zip(past.key_cache, past.value_cache))
+    return [tuple(layer[:2]) for layer in past]
+
+
+def _build_cache(layers: List[Tuple]):
+    from transformers import DynamicCache
+
+    cache = DynamicCache()
+    for i, (keys, values) in enumerate(layers):
+        cache.update(keys, values, i)
+    return cache
+
+
+def _left_pad(tensor, length: int, dim: int):
+    """Zero-pad `tensor` on the left of `dim` up to `length`"""
+    import torch
+
+    missing = length - tensor.shape[dim]
+    if missing <= 0:
+        return tensor
+    shape = list(tensor.shape)
+    shape[dim] = missing
+    return torch.cat([tensor.new_zeros(shape), tensor], dim=dim)
+
+
+class InferenceServer:
+    """Continuous batching: requests join and leave the running batch between decode steps.
+
+    The batch shares one left-padded KV cache. New requests are prefilled
+    together and merged into it before the next step, and finished rows are
+    dropped right away, so nobody waits for the longest answer in a batch.
+    Requests are admitted in arrival order while the padded share of the
+    merged cache stays at or under `max_padding` (see _fits).
+    """
+
+    def __init__(self, model, tokenizer, max_batch_size: int = 8, max_wait_ms: float = 10, top_p: float = 0.9,
+                 max_padding: float = 0.5, max_defer_ms: float = 200):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.top_p = top_p
+        self.max_padding = max_padding
+        self.max_defer = max_defer_ms / 1000
+
+        self.pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        self.eos_id = tokenizer.eos_token_id
+
+        self._incoming = queue.Queue()
+        self._waiting = collections.deque()  # received, not yet admitted (would pad the batch too much)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Running batch: requests, their KV cache layers, attention mask, next input token and its position
+        self._active: List[_Request] = []
+        self._layers: List[Tuple] = []
+        self._mask = None
+        self._next_ids = None
+        self._positions = None
+
+        self.stats = {"steps": 0, "rows": 0, "requests": 0, "tokens": 0, "padding_tokens": 0,
+                      "cache_cells": 0, "cache_padding": 0, "deferrals": 0}
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="inference-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._incoming.put(None)
+        if self._thread is not None:
+            self._thread.join()
+
+    def submit(self, prompt: str, max_new_tokens: int = 100, temperature: float = 0.0) -> TokenStream:
+        """Queue a prompt; returns a stream that yields text as it is generated"""
+        input_ids = self.tokenizer(prompt, add_special_tokens=False)["input_ids"]
+        request = _Request(input_ids, max_new_tokens, temperature)
+        self._incoming.put(request)
+        return request.stream
+
+    def _fits(self, lengths: List[int], width: int, length: int) -> bool:
+        """Whether a row of `length` tokens keeps the cache's padded share within max_padding"""
+        if not lengths:
+            return True
+        width = max(width, length)
+        rows = len(lengths) + 1
+        padding = width * rows - sum(lengths) - length
+        return padding <= self.max_padding * width * rows
+
+    def _admit(self) -> List[_Request]:
+        """New requests for free batch slots; waits briefly for company only when idle"""
+        if not self._active and not self._waiting:
+            request = self._incoming.get()
+            if request is None:
+                self._running = False
+                return []
+            self._waiting.append(request)
+        deadline = time.perf_counter() + (0 if self._active else self.max_wait)
+        while len(self._active) + len(self._waiting) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._incoming.get(timeout=remaining) if remaining > 0 else self._incoming.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._running = False
+                break
+            self._waiting.append(request)
+
+        arrivals = []
+        lengths = self._mask.sum(dim=-1).tolist() if self._active else []
+        width = self._mask.shape[1] if self._active else 0
+        now = time.perf_counter()
+        for request in list(self._waiting):
+            if len(self._active) + len(arrivals) >= self.max_batch_size:
+                break
+            length = len(request.input_ids)
+            if self._fits(lengths, width, length):
+                self._waiting.remove(request)
+                arrivals.append(request)
+                lengths.append(length)
+                width = max(width, length)
+            else:
+                self.stats["deferrals"] += 1  # per admission pass that skipped a request
+                if now - request.stream.submit_time > self.max_defer:
+                    break  # admit nothing after it, so the batch drains and it gets in
+        return arrivals
+
+    def _loop(self):
+        while self._running:
+            arrivals = self._admit()
+            try:
+                if arrivals:
+                    self._prefill(arrivals)
+                elif self._active:
+                    self._decode_step()
+                self._drop_finished()
+            except Exception as e:
+                print(f"❌ Generation failed: {e}")
+                for request in self._active + arrivals:
+                    if not request.finished:
+                        request.finished = True
+                        request.stream._finish(e)
+                self._active, self._layers, self._mask = [], [], None
+
+        error = RuntimeError("Inference server stopped")
+        for request in self._active + list(self._waiting):
+            if not request.finished:
+                request.stream._finish(error)
+        while True:
+            try:
+                request = self._incoming.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request.stream._finish(error)
+
+    def _prefill(self, arrivals: List[_Request]):
+        """Run the new prompts, emit their first tokens and merge them into the running batch"""
+        import torch
+
+        device = self.model.device
+        max_len = max(len(r.input_ids) for r in arrivals)
+        # Left padding keeps every prompt's last token in the final column
+        input_ids = torch.full((len(arrivals), max_len), self.pad_id, dtype=torch.long)
+        mask = torch.zeros((len(arrivals), max_len), dtype=torch.long)
+        for row, request in enumerate(arrivals):
+            input_ids[row, max_len - len(request.input_ids):] = torch.tensor(request.input_ids)
+            mask[row, max_len - len(request.input_ids):] = 1
+        input_ids, mask = input_ids.to(device), mask.to(device)
+        positions = (mask.cumsum(dim=-1) - 1).clamp(min=0)
+
+        self.stats["requests"] += len(arrivals)
+        self.stats["padding_tokens"] += int((mask == 0).sum())
+        with torch.no_grad():
+            out = self.model(input_ids=input_ids, attention_mask=mask, position_ids=positions, use_cache=True)
+        next_ids = self._sample(out.logits[:, -1, :], arrivals)
+
+        layers = _cache_layers(out.past_key_values)
+        positions = mask.sum(dim=-1)
+        if self._active:
+            length = max(self._mask.shape[1], max_len)
+            layers = [(torch.cat([_left_pad(k0, length, 2), _left_pad(k1, length, 2)]),
+                       torch.cat([_left_pad(v0, length, 2), _left_pad(v1, length, 2)]))
+                      for (k0, v0), (k1, v1) in zip(self._layers, layers)]
+            mask = torch.cat([_left_pad(self._mask, length, 1), _left_pad(mask, length, 1)])
+            next_ids = torch.cat([self._next_ids, next_ids])
+            positions = torch.cat([self._positions, positions])
+        self._active = self._active + arrivals
+        self._layers, self._mask, self._next_ids, self._positions = layers, mask, next_ids, positions
+
+    def _decode_step(self):
+        import torch
+
+        self.stats["cache_cells"] += self._mask.numel()
+        self.stats["cache_padding"] += int((self._mask == 0).sum())
+        mask = torch.cat([self._mask, self._mask.new_ones((len(self._active), 1))], dim=-1)
+        with torch.no_grad():
+            out = self.model(input_ids=self._next_ids[:, None], attention_mask=mask,
+                             position_ids=self._positions[:, None], past_key_values=_build_cache(self._layers),
+                             use_cache=True)
+        self.stats["steps"] += 1
+        self.stats["rows"] += len(self._active)
+        self._layers = _cache_layers(out.past_key_values)
+        self._mask = mask
+        self._positions = self._positions + 1
+        self._next_ids = self._sample(out.logits[:, -1, :], self._active)
+
+    def _sample(self, logits, requests: List[_Request]):
+        """Pick and emit the next token of every row"""
+        import torch
+
+        temperatures = torch.tensor([r.temperature for r in requests], device=logits.device)
+        next_ids = sample_next(logits, temperatures, self.top_p)
+        for row, request in enumerate(requests):
+            self._emit(request, int(next_ids[row]))
+        return next_ids
+
+    def _drop_finished(self):
+        """Remove finished rows and the padding columns no remaining row needs"""
+        keep = [row for row, r in enumerate(self._active) if not r.finished]
+        if len(keep) == len(self._active):
+            return
+        self._active = [self._active[row] for row in keep]
+        if not keep:
+            self._layers, self._mask = [], None
+            return
+        rows = self._mask.new_tensor(keep)
+        mask = self._mask[rows]
+        first = int(mask.any(dim=0).nonzero()[0])
+        self._mask = mask[:, first:]
+        self._layers = [(k[rows, :, first:], v[rows, :, first:]) for k, v in self._layers]
+        self._next_ids = self._next_ids[rows]
+        self._positions = self._positions[rows]
+
+    def _emit(self, request: _Request, token_id: int):
+        """Record one generated token and stream any newly completed text.
+
+        Only a short window of tokens is decoded each time (as in
+        transformers' TextStreamer), so streaming stays linear in the answer length.
+        """
+        if token_id == self.eos_id:
+            request.finished = True
+            request.stream._finish()
+            return
+
+        request.generated.append(token_id)
+        request.stream.tokens += 1
+        self.stats["tokens"] += 1
+        window = request.generated[request.prefix_offset:]
+        emitted = self.tokenizer.decode(request.generated[request.prefix_offset:request.read_offset],
+                                        skip_special_tokens=True)
+        text = self.tokenizer.decode(window, skip_special_tokens=True)
+        if len(text) > len(emitted) and not text.endswith("�"):  # wait for the rest of a multi-byte character
+            request.stream._put(text[len(emitted):])
+            request.prefix_offset = request.read_offset
+            request.read_offset = len(request.generated)
+
+        if len(request.generated) >= request.max_new_tokens:
+            request.finished = True
+            request.stream._finish()
+
+
+def serve_http(server: InferenceServer, host: str = "127.0.0.1", port: int = 8000):
+    """Expose the server as POST /generate {"prompt", "max_new_tokens", "temperature"},
+    streaming the answer back as chunked plain text"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if self.path != "/generate":
+                self.send_error(404)
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                stream = server.submit(body["prompt"], int(body.get("max_new_tokens", 100)),
+                                       float(body.get("temperature", 0.0)))
+            except (ValueError, KeyError) as e:
+                self.send_error(400, str(e))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for chunk in stream:
+                    data = chunk.encode("utf-8")
+                    if data:
+                        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                        self.wfile.flush()
+            except Exception as e:
+                # Headers are already sent, so the error can only end the stream early
+                print(f"❌ Generation failed mid-stream: {e}")
+                self.close_connection = True
+            finally:
+                try:
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except OSError:
+                    pass  # client went away
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    print(f"🚀 Inference server listening on http://{host}:{port}/generate")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Inference server stopped")
+    finally:
+        httpd.server_close()
+
+
+def load_test(server: InferenceServer, concurrencies=(1, 2, 4, 8, 16),
+              requests_per_client: int = 4, max_new_tokens: int = 32) -> List[Dict[str, float]]:
+    """Run closed-loop clients against the server and print tokens/sec per concurrency"""
+    from chat_format import build_context_prefix, build_prompt
+    from slm_data import QA_PAIRS, retrieval_corpus
+
+    # Every fourth prompt carries retrieved passages, so prompt lengths vary as they do with RAG
+    context = build_context_prefix([d["text"] for d in retrieval_corpus()[:4]])
+    prompts = [(context if i % 4 == 3 else "") + build_prompt(qa["prompt"]) for i, qa in enumerate(QA_PAIRS)]
+    results = []
+    print(f"{'clients':>8}{'tokens/s':>11}{'p50 TTFT ms':>13}{'avg batch':>11}{'padding':>9}")
+
+    for clients in concurrencies:
+        ttfts, tokens = [], []
+        steps_before = server.stats["steps"]
+        rows_before = server.stats["rows"]
+        cells_before, padding_before = server.stats["cache_cells"], server.stats["cache_padding"]
+
+        def client(offset: int):
+            for i in range(requests_per_client):
+                stream = server.submit(prompts[(offset + i) % len(prompts)], max_new_tokens)
+                stream.text()
+                tokens.append(stream.tokens)
+                if stream.first_token_time is not None:
+                    ttfts.append((stream.first_token_time - stream.submit_time) * 1000)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        ttfts.sort()
+        steps = server.stats["steps"] - steps_before
+        row = {
+            "clients": clients,
+            "tokens_per_sec": sum(tokens) / elapsed,
+            "p50_ttft_ms": ttfts[len(ttfts) // 2] if ttfts else 0.0,
+            "avg_batch": (server.stats["rows"] - rows_before) / max(steps, 1),  # rows per decode step
+            # Share of the KV cache that decode steps spent on padding
+            "padding": (server.stats["cache_padding"] - padding_before)
+                       / max(server.stats["cache_cells"] - cells_before, 1),
+        }
+        results.append(row)
+        print(f"{clients:>8}{row['tokens_per_sec']:>11.1f}{row['p50_ttft_ms']:>13.1f}{row['avg_batch']:>11.2f}"
+              f"{row['padding']:>9.1%}")
+    return results
+
+
+def main():
+    from slm_chatbot import ADAPTER_DIR
+
+    parser = argparse.ArgumentParser(description="Batched inference server for the SLM chatbot")
+    parser.add_argument("--adapter", default=ADAPTER_DIR, help="LoRA adapter directory")
+    parser.add_argument("--tiny", action="store_true", help="use a tiny random model (CPU testing)")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    parser.add_argument("--max-padding", type=float, default=0.5,
+                        help="largest padded share of the KV cache a new request may cause (1 disables the cap)")
+    parser.add_argument("--max-defer-ms", type=float, default=200,
+                        help="after this long, a deferred request holds back later arrivals")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--load-test", action="store_true", help="run the load test instead of serving")
+    args = parser.parse_args()
+
+    print("🧠 Batched Inference Server")
+    print("=" * 50)
+    if args.tiny:
+        from tiny_lm import load_tiny_lm
+        model, tokenizer = load_tiny_lm()
+    else:
+        from slm_chatbot import load_model
+        model, tokenizer = load_model(args.adapter)
+
+    server = InferenceServer(model, tokenizer, args.max_batch_size, args.max_wait_ms,
+                             max_padding=args.max_padding, max_defer_ms=args.max_defer_ms).start()
+    try:
+        if args.load_test:
+            load_test(server)
+        else:
+            serve_http(server, args.host, args.port)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Local SLM Provider for the Voice Assistant
+Runs the fine-tuned Phi-2 + RAG chatbot in a background process so the voice
+assistant can answer offline. The model is loaded and warmed up once when the
+assistant starts, and answers stream back piece by piece.
+
+Environment:
+    LOCAL_SLM_ENABLED   "1" to start the provider (also on if the adapter exists)
+    LOCAL_SLM_ADAPTER   LoRA adapter directory (default phi2-qlora)
+    LOCAL_SLM_MODEL     base model, or a merged checkpoint from export_merged.py
+    SLM_BACKEND         cuda-4bit / cpu-int8 / cpu-fp32 (see slm_chatbot.py)
+    LOCAL_SLM_RAG       "0" to answer without retrieved context
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+from typing import Dict, Iterator, Optional
+
+
+def local_slm_config() -> Dict:
+    """Provider settings from the environment"""
+    from slm_chatbot import ADAPTER_DIR, MODEL_NAME
+
+    adapter_dir = os.getenv("LOCAL_SLM_ADAPTER", ADAPTER_DIR)
+    return {
+        "adapter_dir": adapter_dir if adapter_dir and os.path.isdir(adapter_dir) else None,
+        "model_name": os.getenv("LOCAL_SLM_MODEL", MODEL_NAME),
+        "backend": os.getenv("SLM_BACKEND") or None,
+        "use_rag": os.getenv("LOCAL_SLM_RAG", "1") != "0",
+        "max_new_tokens": int(os.getenv("LOCAL_SLM_MAX_NEW_TOKENS", "100")),
+    }
+
+
+def local_slm_enabled() -> bool:
+    if os.getenv("LOCAL_SLM_ENABLED") is not None:
+        return os.getenv("LOCAL_SLM_ENABLED") == "1"
+    return local_slm_config()["adapter_dir"] is not None
+
+
+def _worker(config: Dict, requests, responses):
+    """Background process: load the chatbot once, warm it up, then serve questions"""
+    try:
+        from slm_chatbot import SLMChatbot
+
+        chatbot = SLMChatbot.load(config["adapter_dir"], config["model_name"], config["backend"])
+        retriever = None
+        if config["use_rag"]:
+            from rag_retrieval import RAGRetriever
+            from slm_data import retrieval_corpus
+            retriever = RAGRetriever().build(retrieval_corpus())
+
+        # Warm-up: first forward passes allocate buffers and fill caches
+        chatbot.answer("Hello", max_new_tokens=4)
+        responses.put((None, "ready", None))
+    except Exception as e:
+        responses.put((None, "failed", f"{type(e).__name__}: {e}"))
+        return
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        request_id, question = item
+        try:
+            context = [r["text"] for r in retriever.search(question, k=2)] if retriever else None
+            for chunk in chatbot.stream(question, config["max_new_tokens"], context=context, do_sample=False):
+                responses.put((request_id, "chunk", chunk))
+            responses.put((request_id, "done", None))
+        except Exception as e:
+            responses.put((request_id, "error", f"{type(e).__name__}: {e}"))
+
+
+class LocalSLMProvider:
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or local_slm_config()
+        ctx = mp.get_context("spawn")  # same behaviour on Windows and Linux; no forked torch state
+        self._requests = ctx.Queue()
+        self._responses = ctx.Queue()
+        self._process = ctx.Process(target=_worker, args=(self.config, self._requests, self._responses),
+                                    name="local-slm", daemon=True)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()  # one question at a time through the worker
+        self.ready = threading.Event()
+        self.error: Optional[str] = None
+
+    def start(self):
+        """Start loading the model in the background; returns immediately"""
+        self._process.start()
+        threading.Thread(target=self._wait_until_ready, name="local-slm-startup", daemon=True).start()
+        return self
+
+    def _wait_until_ready(self):
+        _, status, detail = self._responses.get()
+        if status == "ready":
+            print("✅ Local SLM loaded and warmed up")
+        else:
+            self.error = detail
+            print(f"❌ Local SLM failed to load: {detail}")
+        self.ready.set()
+
+    @property
+    def available(self) -> bool:
+        return self.ready.is_set() and self.error is None and self._process.is_alive()
+
+    def stream(self, question: str, timeout: float = 60.0) -> Iterator[str]:
+        """Yield answer chunks from the background model"""
+        if not self.ready.wait(timeout) or self.error is not None:
+            raise RuntimeError(self.error or "Local SLM is still loading")
+
+        with self._lock:
+            request_id = next(self._ids)
+            self._requests.put((request_id, question))
+            while True:
+                try:
+                    rid, status, payload = self._responses.get(timeout=timeout)
+                except queue.Empty:
+                    raise RuntimeError("Local SLM timed out")
+                if rid != request_id:
+                    continue  # leftovers from an abandoned request
+                if status == "chunk":
+                    yield payload
+                elif status == "done":
+                    return
+                else:
+                    raise RuntimeError(payload)
+
+    def stop(self):
+        if self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=5)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtime int8 Embedder
+Exports all-MiniLM-L6-v2 to ONNX, applies dynamic int8 quantization and runs
+it with ONNX Runtime, for CPU-only nodes. Exposes the same encode() interface
+as SentenceTransformer so rag_retrieval can use it transparently.
+
+Usage:
+    python onnx_embedder.py --export   # write the fp32 + int8 models
+    python onnx_embedder.py --check    # cosine parity vs the PyTorch embedder
+    python onnx_embedder.py --bench    # sentences/sec by batch size and threads
+"""
+
+import argparse
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+
+
+DEFAULT_EXPORT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aiml_chatbot", "onnx")
+
+
+def hub_id(model_name: str) -> str:
+    """SentenceTransformer short names live under the sentence-transformers org"""
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def export_dir_for(model_name: str, export_dir: str = DEFAULT_EXPORT_DIR) -> str:
+    return os.path.join(export_dir, hub_id(model_name).replace("/", "__"))
+
+
+def export_onnx(model_name: str, export_dir: str = DEFAULT_EXPORT_DIR) -> str:
+    """Export the transformer to ONNX and quantize it; returns the int8 model path"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir = export_dir_for(model_name, export_dir)
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+    if os.path.exists(int8_path):
+        return int8_path
+
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"📦 Exporting {hub_id(model_name)} to ONNX...")
+    tokenizer = AutoTokenizer.from_pretrained(hub_id(model_name))
+    model = AutoModel.from_pretrained(hub_id(model_name)).eval()
+    tokenizer.save_pretrained(out_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    print("🔢 Quantizing to int8...")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"✅ ONNX embedder written to {out_dir}")
+    return int8_path
+
+
+class OnnxEmbedder:
+    """Drop-in replacement for SentenceTransformer.encode() on ONNX Runtime.
+
+    Applies the same mean pooling and L2 normalization as the
+    all-MiniLM-L6-v2 SentenceTransformer pipeline.
+    """
+
+    def __init__(self, model_name: str, export_dir: str = DEFAULT_EXPORT_DIR,
+                 quantized: bool = True, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        int8_path = export_onnx(model_name, export_dir)
+        model_path = int8_path if quantized else os.path.join(os.path.dirname(int8_path), "model.onnx")
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.model_name = model_name
+        self.quantized = quantized
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(model_path))
+        self.max_seq_length = 256  # matches the SentenceTransformer config
+        self._dim = None
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dim is None:
+            self._dim = self.encode(["dimension probe"]).shape[1]
+        return self._dim
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               show_progress_bar: bool = False, normalize_embeddings: bool = True) -> np.ndarray:
+        """Embed sentences; extra SentenceTransformer kwargs are accepted and ignored"""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        # Sort by length so each batch pads to a similar size
+        order = np.argsort([-len(s) for s in sentences])
+        out = [None] * len(sentences)
+        for start in range(0, len(sentences), batch_size):
+            batch_ids = order[start:start + batch_size]
+            batch = [sentences[i] for i in batch_ids]
+            enc = self.tokenizer(batch, padding=True, truncation=True,
+                                 max_length=self.max_seq_length, return_tensors="np")
+            feeds = {name: enc[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for i, vec in zip(batch_ids, pooled):
+                out[i] = vec
+
+        embs = np.stack(out).astype(np.float32) if out else np.zeros((0, 0), np.float32)
+        return embs[0] if single else embs
+
+
+def sample_sentences(n: int) -> List[str]:
+    """Benchmark/parity sentences built from the RAG docs and FAQ-style questions"""
+    from slm_data import DOCS
+
+    base = [d["text"] for d in DOCS] + [
+        "How do I get my money back?",
+        "Is support open on weekends?",
+        "What does the premium plan include?",
+        "I forgot my password, what should I do?",
+    ]
+    return [f"{base[i % len(base)]} (#{i})" for i in range(n)]
+
+
+def check_parity(model_name: str, n: int = 64, threshold: float = 0.99) -> bool:
+    """Compare int8 ONNX embeddings with the fp32 PyTorch embeddings"""
+    from sentence_transformers import SentenceTransformer
+
+    print("🧪 Checking ONNX int8 parity...")
+    sentences = sample_sentences(n)
+    reference = SentenceTransformer(model_name).encode(sentences, convert_to_numpy=True,
+                                                       normalize_embeddings=True)
+    candidate = OnnxEmbedder(model_name).encode(sentences)
+
+    cosine = (reference * candidate).sum(axis=1)
+    print(f"   cosine similarity: min {cosine.min():.4f}, mean {cosine.mean():.4f}")
+    if cosine.min() >= threshold:
+        print(f"✅ Parity check passed (min >= {threshold})")
+        return True
+    print(f"❌ Parity check failed (min < {threshold})")
+    return False
+
+
+def benchmark(model_name: str, batch_sizes=(1, 8, 32, 128), threads=(1, 2, 4), n: int = 512):
+    """Print sentences/sec for fp32 PyTorch and int8 ONNX"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    sentences = sample_sentences(n)
+    print(f"⏱️  Embedding {n} sentences")
+    print(f"{'backend':<14}{'threads':>8}{'batch':>8}{'sent/s':>12}")
+
+    torch_model = SentenceTransformer(model_name)
+    for num_threads in threads:
+        torch.set_num_threads(num_threads)
+        onnx_model = OnnxEmbedder(model_name, num_threads=num_threads)
+        for batch_size in batch_sizes:
+            for name, model in (("torch-fp32", torch_model), ("onnx-int8", onnx_model)):
+                model.encode(sentences[:batch_size], batch_size=batch_size)  # warm-up
+                start = time.perf_counter()
+                model.encode(sentences, batch_size=batch_size, convert_to_numpy=True)
+                rate = n / (time.perf_counter() - start)
+                print(f"{name:<14}{num_threads:>8}{batch_size:>8}{rate:>12.1f}")
+
+
+def main():
+    from rag_retrieval import EMBED_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="ONNX Runtime int8 embedder")
+    parser.add_argument("--model", default=EMBED_MODEL_NAME)
+    parser.add_argument("--export", action="store_true", help="export and quantize the model")
+    parser.add_argument("--check", action="store_true", help="cosine parity vs fp32 PyTorch")
+    parser.add_argument("--bench", action="store_true", help="throughput benchmark")
+    args = parser.parse_args()
+
+    if not (args.export or args.check or args.bench):
+        parser.print_help()
+        return
+    if args.export:
+        export_onnx(args.model)
+    if args.check and not check_parity(args.model):
+        raise SystemExit(1)
+    if args.bench:
+        benchmark(args.model)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+KV-Cache Reuse for Shared Prompt Prefixes
+Keeps the past_key_values of common prompt prefixes (instructions, frequently
+retrieved passages) keyed by the model and a hash of their token ids, so a
+new query only prefills its own suffix. Entries are evicted least recently used first once
+the cache exceeds its memory cap.
+
+Usage:
+    python prefix_cache.py --bench    # prefill time and TTFT with/without the cache, tiny CPU model
+"""
+
+import argparse
+import copy
+import hashlib
+import itertools
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import List, Sequence
+
+from inference_server import _cache_layers
+
+
+def prefix_key(token_ids: Sequence[int], model_key: str = "") -> str:
+    return hashlib.sha256((model_key + "|" + ",".join(map(str, token_ids))).encode("ascii")).hexdigest()
+
+
+def cache_nbytes(past) -> int:
+    """Bytes held by a past_key_values object (DynamicCache or legacy tuples)"""
+    return sum(t.numel() * t.element_size() for layer in _cache_layers(past) for t in layer if t is not None)
+
+
+class PrefixCache:
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, object]" = OrderedDict()
+        self.sizes = {}
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        # Numbers for model instances, never reused while the cache lives (unlike id())
+        self._model_numbers = weakref.WeakKeyDictionary()
+        self._next_number = itertools.count()
+        self.hits = 0
+        self.misses = 0
+
+    def model_key(self, model) -> str:
+        """Identity of the weights producing a cache: model instance, dtype and active adapter.
+
+        Base, merged and adapter variants often share a tokenizer and a
+        name_or_path, so the token ids alone can't tell their caches apart.
+        """
+        with self._lock:
+            if model not in self._model_numbers:
+                self._model_numbers[model] = next(self._next_number)
+            number = self._model_numbers[model]
+        adapter = getattr(model, "active_adapter", None) if hasattr(model, "peft_config") else None
+        if callable(adapter):  # transformers' own adapter integration exposes a method
+            try:
+                adapter = adapter()
+            except ValueError:
+                adapter = None
+        name = getattr(model, "name_or_path", type(model).__name__)
+        return f"{number}:{name}:{model.dtype}:{adapter}"
+
+    def get(self, model, prefix_ids: List[int]):
+        """Return past_key_values for the prefix, computing and storing them on a miss.
+
+        Generation extends a cache in place, so callers always get a copy and
+        the stored entry stays a clean prefix.
+        """
+        import torch
+
+        key = prefix_key(prefix_ids, self.model_key(model))
+        with self._lock:
+            past = self.entries.get(key)
+            if past is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(past)
+            self.misses += 1
+
+        with torch.no_grad():
+            ids = torch.tensor([prefix_ids], device=model.device)
+            past = model(input_ids=ids, attention_mask=torch.ones_like(ids), use_cache=True).past_key_values
+
+        self._put(key, past)
+        return copy.deepcopy(past)
+
+    def _put(self, key: str, past):
+        size = cache_nbytes(past)
+        if size > self.max_bytes:
+            return  # would evict everything and still not fit
+        with self._lock:
+            if key in self.entries:
+                return
+            self.entries[key] = past
+            self.sizes[key] = size
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                old_key, _ = self.entries.popitem(last=False)
+                self.total_bytes -= self.sizes.pop(old_key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def benchmark(repeats: int = 3):
+    import torch
+
+    from chat_format import build_context_prefix, encode_prompt
+    from generation import generate_answer
+    from slm_data import TEST_QUESTIONS, retrieval_corpus
+    from tiny_lm import load_tiny_lm
+
+    model, tokenizer = load_tiny_lm(n_layer=6, n_embd=384, n_head=6)
+    prefix = build_context_prefix([d["text"] for d in retrieval_corpus()[:12]])
+    prefix_ids = tokenizer(prefix, add_special_tokens=False)["input_ids"]
+    cache = PrefixCache()
+    print(f"📏 Shared prefix: {len(prefix_ids)} tokens\n")
+
+    def prefill_ms(question: str, use_cache: bool) -> float:
+        suffix_ids = encode_prompt(tokenizer, question)
+        start = time.perf_counter()
+        with torch.no_grad():
+            if use_cache:
+                past = cache.get(model, prefix_ids)
+                ids = torch.tensor([suffix_ids])
+                mask = torch.ones((1, len(prefix_ids) + len(suffix_ids)), dtype=torch.long)
+                model(input_ids=ids, attention_mask=mask, past_key_values=past, use_cache=True)
+            else:
+                ids = torch.tensor([prefix_ids + suffix_ids])
+                model(input_ids=ids, attention_mask=torch.ones_like(ids), use_cache=True)
+        return (time.perf_counter() - start) * 1000
+
+    def ttft_ms(question: str, use_cache: bool) -> float:
+        start = time.perf_counter()
+        generate_answer(model, tokenizer, question, max_new_tokens=1, do_sample=False, prefix=prefix,
+                        prefix_cache=cache if use_cache else None)
+        return (time.perf_counter() - start) * 1000
+
+    cache.get(model, prefix_ids)  # first query pays for the prefix once
+    print(f"{'mode':<12}{'prefill ms':>12}{'TTFT ms':>10}")
+    for name, use_cache in (("no cache", False), ("prefix cache", True)):
+        prefills, ttfts = [], []
+        for _ in range(repeats):
+            for question in TEST_QUESTIONS:
+                prefills.append(prefill_ms(question, use_cache))
+                ttfts.append(ttft_ms(question, use_cache))
+        print(f"{name:<12}{sum(prefills) / len(prefills):>12.2f}{sum(ttfts) / len(ttfts):>10.2f}")
+
+    s = cache.stats()
+    print(f"\n📦 {s['entries']} cached prefix(es), {s['bytes'] / 2**20:.1f} MB, hit rate {s['hit_rate']:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KV-cache reuse for shared prompt prefixes")
+    parser.add_argument("--bench", action="store_true")
+    args = parser.parse_args()
+
+    if not args.bench:
+        parser.print_help()
+        return
+    print("♻️  Prefix KV-Cache Benchmark")
+    print("=" * 50)
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+RAG Retrieval for the SLM Chatbot
+Builds the FAISS index from slm_chatbot.ipynb as an importable module and
+answers top-k queries, with embeddings going through the shared cache.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bm25 import BM25Index, reciprocal_rank_fusion
+from embedding_cache import DEFAULT_CACHE_DIR, EmbeddingCache
+from slm_data import DOCS
+
+
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+SEARCH_MODES = ("dense", "sparse", "hybrid")
+
+
+def embed_backend() -> str:
+    """Embedder backend from the environment: 'torch' (default) or 'onnx'"""
+    return os.getenv("EMBED_BACKEND", "torch").lower()
+
+
+def load_embedder(model_name: str = EMBED_MODEL_NAME, backend: Optional[str] = None):
+    """Load the sentence embedding model on the selected backend"""
+    backend = backend or embed_backend()
+    if backend == "onnx":
+        from onnx_embedder import OnnxEmbedder
+        return OnnxEmbedder(model_name)
+
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def doc_kind(doc: Dict) -> str:
+    """Document type: "text" unless the record says otherwise (image_index.py stores "image")"""
+    return doc.get("type", "text")
+
+
+class RAGRetriever:
+    def __init__(self, embedder=None, model_name: str = EMBED_MODEL_NAME,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR, backend: Optional[str] = None,
+                 reranker=None, cache: Optional[EmbeddingCache] = None, cache_queries: bool = False,
+                 query_cache_size: int = 1024):
+        self.model_name = model_name
+        self.reranker = reranker  # optional CrossEncoderReranker
+        self.backend = backend or embed_backend()
+        self.embedder = embedder if embedder is not None else load_embedder(model_name, self.backend)
+        self.dim = self.embedder.get_sentence_embedding_dimension()
+
+        # Ingestion and queries share one cache; pass cache_dir=None to disable it.
+        # int8 vectors differ slightly from fp32 ones, so each backend gets its own entries.
+        # Retrievers living in the same process should pass one `cache` so only one writer owns the files.
+        cache_name = model_name if self.backend == "torch" else f"{model_name}:{self.backend}-int8"
+        if cache is None and cache_dir:
+            cache = EmbeddingCache(cache_name, self.dim, cache_dir)
+        self.cache = cache
+        # Queries are open-ended, so caching them on disk would grow the cache without bound; opt in.
+        # Repeated questions are still served from a bounded in-memory LRU (0 disables it).
+        self.cache_queries = cache_queries
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_lock = threading.Lock()
+
+        self.docs: List[Dict] = []
+        self.index = None
+        self.bm25 = BM25Index()
+        self._type_masks: Dict[str, np.ndarray] = {}  # doc_type -> which docs have it
+        # Dense and sparse lookups for one query run side by side
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retrieval")
+
+    def embed(self, texts: List[str], use_cache: bool = True) -> np.ndarray:
+        """Embed texts, going through the cache when enabled"""
+        def encode(batch):
+            return self.embedder.encode(batch, convert_to_numpy=True, show_progress_bar=False)
+
+        if self.cache is None or not use_cache:
+            return np.asarray(encode(texts), dtype=np.float32)
+        return self.cache.encode(texts, encode)
+
+    def build(self, docs: List[Dict] = DOCS):
+        """Embed the documents and build the FAISS and BM25 indexes"""
+        import faiss
+
+        self.docs = list(docs)
+        texts = [d["text"] for d in self.docs]
+        embs = self.embed(texts)
+        if self.cache is not None:
+            self.cache.flush()
+        self.index = faiss.IndexFlatL2(self.dim)
+        self.index.add(embs)
+        self.bm25.build(texts)
+        self._type_masks = {}
+        return self
+
+    def add(self, docs: List[Dict]) -> List[int]:
+        """Append documents to a built index; returns their ids"""
+        start = len(self.docs)
+        self.index.add(self.embed([d["text"] for d in docs]))
+        if self.cache is not None:
+            self.cache.flush()
+        self.docs.extend(docs)
+        self.bm25.add([d["text"] for d in docs])
+        self._type_masks = {}
+        return list(range(start, len(self.docs)))
+
+    def save(self, index_path: str = "index.faiss", docs_path: str = "docs.jsonl"):
+        """Write the index and documents in the notebook's format"""
+        import faiss
+
+        faiss.write_index(self.index, index_path)
+        with open(docs_path, "w") as f:
+            for d in self.docs:
+                f.write(json.dumps(d) + "\n")
+
+    def load(self, index_path: str = "index.faiss", docs_path: str = "docs.jsonl"):
+        """Load an index written by save() or by the notebook"""
+        import faiss
+
+        self.index = faiss.read_index(index_path)
+        with open(docs_path) as f:
+            self.docs = [json.loads(line) for line in f if line.strip()]
+        self.bm25.build([d["text"] for d in self.docs])
+        self._type_masks = {}
+        return self
+
+    def _type_mask(self, doc_type: Optional[str]) -> Optional[np.ndarray]:
+        """Boolean mask of the documents of `doc_type`, or None when no filtering is needed"""
+        if doc_type is None:
+            return None
+        if doc_type not in self._type_masks:
+            self._type_masks[doc_type] = np.fromiter((doc_kind(d) == doc_type for d in self.docs),
+                                                     dtype=bool, count=len(self.docs))
+        mask = self._type_masks[doc_type]
+        return None if mask.all() else mask
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """(1, dim) query embedding, for dense_search_vector; recent queries come from the LRU"""
+        with self._query_lock:
+            q = self._query_cache.get(query)
+            if q is not None:
+                self._query_cache.move_to_end(query)
+                return q
+        q = self.embed([query], use_cache=self.cache_queries)
+        if self.query_cache_size > 0:
+            with self._query_lock:
+                self._query_cache[query] = q
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return q
+
+    def dense_search(self, query: str, k: int, doc_type: Optional[str] = "text") -> List[Tuple[int, float]]:
+        """(doc_id, L2 distance) pairs from FAISS, nearest first"""
+        return self.dense_search_vector(self.embed_query(query), k, doc_type)
+
+    def dense_search_vector(self, q: np.ndarray, k: int, doc_type: Optional[str] = "text") -> List[Tuple[int, float]]:
+        """dense_search for an already embedded query, so one embedding can serve several indexes"""
+        import faiss
+
+        mask = self._type_mask(doc_type)
+        if mask is None:
+            distances, ids = self.index.search(q, min(k, len(self.docs)))
+        elif not mask.any():
+            return []  # FAISS rejects k=0
+        else:
+            # FAISS skips excluded ids during the scan; the bitmap must outlive the call
+            bitmap = np.packbits(mask, bitorder="little")
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap)))
+            distances, ids = self.index.search(q, min(k, int(mask.sum())), params=params)
+        return [(int(i), float(d)) for d, i in zip(distances[0], ids[0]) if i != -1]
+
+    def sparse_search(self, query: str, k: int, doc_type: Optional[str] = "text") -> List[Tuple[int, float]]:
+        """(doc_id, BM25 score) pairs, best first"""
+        mask = self._type_mask(doc_type)
+        return self.bm25.search(query, k, include=None if mask is None else mask.__getitem__)
+
+    def search(self, query: str, k: int = 3, mode: Optional[str] = None,
+               fetch_k: int = 20, rerank: Optional[bool] = None, rerank_top_n: int = 20,
+               doc_type: Optional[str] = "text") -> List[Dict]:
+        """Return the top-k documents for a query, best first.
+
+        `mode` is 'dense', 'sparse' or 'hybrid' (default, or RETRIEVAL_MODE
+        from the environment). Hybrid queries both retrievers concurrently
+        for `fetch_k` candidates each and fuses them by reciprocal rank.
+        With a reranker configured (and `rerank` not False), the top
+        `rerank_top_n` candidates are re-scored by the cross-encoder.
+        Only documents of `doc_type` are returned (see doc_kind); None
+        searches every document.
+        """
+        mode = mode or os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+
+        use_reranker = self.reranker is not None and rerank is not False
+        depth = max(k, rerank_top_n) if use_reranker else k
+
+        if mode == "dense":
+            results = [{"id": i, "text": self.docs[i]["text"], "score": -d, "distance": d}
+                       for i, d in self.dense_search(query, depth, doc_type)]
+        elif mode == "sparse":
+            results = [{"id": i, "text": self.docs[i]["text"], "score": s}
+                       for i, s in self.sparse_search(query, depth, doc_type)]
+        else:
+            candidates = max(depth, fetch_k)
+            dense = self._pool.submit(self.dense_search, query, candidates, doc_type)
+            sparse = self._pool.submit(self.sparse_search, query, candidates, doc_type)
+            fused = reciprocal_rank_fusion([
+                [i for i, _ in dense.result()],
+                [i for i, _ in sparse.result()],
+            ])
+            results = [{"id": i, "text": self.docs[i]["text"], "score": s} for i, s in fused[:depth]]
+
+        if use_reranker:
+            return self.reranker.rerank(query, results, k)
+        return results[:k]
+
+
+def main():
+    """Build the index twice and show what the embedding cache saved"""
+    print("📚 RAG Retrieval")
+    print("=" * 50)
+
+    retriever = RAGRetriever()
+    for attempt in range(2):
+        start = time.perf_counter()
+        retriever.build(DOCS)
+        print(f"🔨 Build {attempt + 1}: {time.perf_counter() - start:.3f}s")
+    retriever.save()
+
+    for query in ["How do I get my money back?", "How do I get my money back?", "How long is shipping?"]:
+        top = retriever.search(query, k=1)[0]
+        print(f"🔎 {query} -> {top['text']}")
+
+    if retriever.cache is not None:
+        retriever.cache.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Cross-Encoder Re-ranking
+Re-scores the retriever's top candidates with a small cross-encoder, batch by
+batch, and stops when the millisecond budget runs out so a slow or busy node
+still answers on time with the retriever's own order for the rest.
+"""
+
+import os
+import time
+from typing import Dict, List, Optional
+
+
+RERANK_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    def __init__(self, model_name: str = RERANK_MODEL_NAME, budget_ms: Optional[float] = None,
+                 batch_size: int = 8, model=None):
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_name)
+        self.model = model
+        self.budget_ms = budget_ms if budget_ms is not None else float(os.getenv("RERANK_BUDGET_MS", "50"))
+        self.batch_size = batch_size
+
+        # Stats from the most recent call, for benchmarks and logging
+        self.last_scored = 0
+        self.last_elapsed_ms = 0.0
+
+    def rerank(self, query: str, candidates: List[Dict], k: int) -> List[Dict]:
+        """Return the best k candidates.
+
+        Candidates are scored in batches in retrieval order. Before each batch
+        the time already spent plus the slowest batch so far is checked against
+        the budget; once it would overrun, the remaining candidates are left
+        unscored and keep their retrieval order behind the scored ones.
+        """
+        start = time.perf_counter()
+        scored = []
+        slowest_batch = 0.0
+        position = 0
+
+        while position < len(candidates):
+            elapsed = (time.perf_counter() - start) * 1000
+            if scored and elapsed + slowest_batch > self.budget_ms:
+                break
+            batch = candidates[position:position + self.batch_size]
+            batch_start = time.perf_counter()
+            scores = self.model.predict([(query, c["text"]) for c in batch], batch_size=len(batch))
+            slowest_batch = max(slowest_batch, (time.perf_counter() - batch_start) * 1000)
+            for candidate, score in zip(batch, scores):
+                scored.append(dict(candidate, rerank_score=float(score)))
+            position += len(batch)
+
+        self.last_scored = len(scored)
+        self.last_elapsed_ms = (time.perf_counter() - start) * 1000
+
+        scored.sort(key=lambda c: c["rerank_score"], reverse=True)
+        return (scored + candidates[position:])[:k]
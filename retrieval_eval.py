@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Retrieval Evaluation
+Runs the labeled queries in slm_data.RETRIEVAL_EVAL against the dense, sparse
+and hybrid retrievers and reports recall@k, MRR and query latency. With
+--rerank it adds hybrid + cross-encoder rows for each millisecond budget.
+With --answers it also generates answers to the QA eval questions with each
+retriever's context and scores them against the reference answers (exact
+match and token F1), so retrieval changes can be judged by answer quality;
+with --rerank too, each budget gets an answer row next to its search latency.
+"""
+
+import argparse
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from rag_retrieval import SEARCH_MODES, RAGRetriever
+from reranker import CrossEncoderReranker
+from slm_data import RETRIEVAL_EVAL, retrieval_corpus
+
+
+def recall_at_k(results: List[int], relevant: List[int]) -> float:
+    """Fraction of the relevant documents found in the results"""
+    return len(set(results) & set(relevant)) / len(relevant)
+
+
+def reciprocal_rank(results: List[int], relevant: List[int]) -> float:
+    """1 / rank of the first relevant result, 0 if none was found"""
+    for rank, doc_id in enumerate(results, start=1):
+        if doc_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def evaluate(retriever: RAGRetriever, mode: str, k: int, search_kwargs: Dict = None) -> Dict[str, float]:
+    """Recall@k and latency percentiles for one search mode"""
+    search_kwargs = search_kwargs or {}
+    recalls, ranks, latencies = [], [], []
+    for item in RETRIEVAL_EVAL:
+        retriever.search(item["query"], k=k, mode=mode, **search_kwargs)  # warm-up
+        start = time.perf_counter()
+        results = retriever.search(item["query"], k=k, mode=mode, **search_kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids = [r["id"] for r in results]
+        recalls.append(recall_at_k(ids, item["relevant"]))
+        ranks.append(reciprocal_rank(ids, item["relevant"]))
+
+    latencies.sort()
+    return {
+        "recall": statistics.mean(recalls),
+        "mrr": statistics.mean(ranks),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def answer_quality(retriever: RAGRetriever, model, tokenizer, mode: Optional[str], k: int,
+                   max_new_tokens: int = 64, limit: int = 0) -> Dict[str, float]:
+    """Exact match, token F1 and search ms per question of greedy answers with the top-k passages as
+    context (mode None: no context). A reranker set on the retriever is used for the hybrid search."""
+    from chat_format import build_context_prefix
+    from generation import generate_answer
+    from slm_eval import eval_questions, exact_match, token_f1
+
+    em, f1, latencies = [], [], []
+    for item in eval_questions()[:limit or None]:
+        prefix = ""
+        if mode is not None:
+            start = time.perf_counter()
+            results = retriever.search(item["question"], k=k, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            prefix = build_context_prefix([r["text"] for r in results])
+        answer, _ = generate_answer(model, tokenizer, item["question"], max_new_tokens, prefix=prefix,
+                                    do_sample=False)
+        em.append(exact_match(answer, item["reference"]))
+        f1.append(token_f1(answer, item["reference"]))
+    return {"exact_match": statistics.mean(em), "token_f1": statistics.mean(f1),
+            "search_ms": statistics.mean(latencies) if latencies else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate dense, sparse and hybrid retrieval")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--rerank", action="store_true", help="also evaluate cross-encoder re-ranking")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[5, 20, 50, 200],
+                        help="re-rank budgets in milliseconds")
+    parser.add_argument("--answers", action="store_true", help="also score generated answers (EM / token F1)")
+    parser.add_argument("--tiny", action="store_true", help="answer with the tiny CPU stand-in model")
+    parser.add_argument("--answer-k", type=int, default=2, help="passages given to the model per question")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--limit", type=int, default=0, help="only the first N answer questions")
+    args = parser.parse_args()
+
+    print("📊 Retrieval Evaluation")
+    print("=" * 50)
+    retriever = RAGRetriever().build(retrieval_corpus())
+    print(f"📚 {len(retriever.docs)} documents, {len(RETRIEVAL_EVAL)} labeled queries\n")
+
+    reranker = CrossEncoderReranker() if args.rerank else None
+
+    print(f"{'mode':<16}{'k':>4}{'recall@k':>11}{'MRR':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for k in args.k:
+        for mode in SEARCH_MODES:
+            r = evaluate(retriever, mode, k)
+            print(f"{mode:<16}{k:>4}{r['recall']:>11.3f}{r['mrr']:>8.3f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}")
+
+        if reranker is None:
+            continue
+        retriever.reranker = reranker
+        for budget in args.budgets:
+            reranker.budget_ms = budget
+            r = evaluate(retriever, "hybrid", k)
+            label = f"rerank@{budget:g}ms"
+            print(f"{label:<16}{k:>4}{r['recall']:>11.3f}{r['mrr']:>8.3f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}")
+        retriever.reranker = None
+
+    if not args.answers:
+        return
+    if args.tiny:
+        from generation import train_transcript_model
+        model, tokenizer = train_transcript_model()
+    else:
+        from slm_chatbot import load_model
+        model, tokenizer = load_model()
+
+    # Re-ranking is judged by what it buys in answer quality for its extra search latency
+    rows = [(mode or "none", mode, None) for mode in (None,) + SEARCH_MODES]
+    if reranker is not None:
+        rows += [(f"rerank@{budget:g}ms", "hybrid", budget) for budget in args.budgets]
+    print(f"\n{'context':<16}{'k':>4}{'EM':>8}{'token F1':>10}{'search ms':>11}")
+    for label, mode, budget in rows:
+        retriever.reranker = reranker if budget is not None else None
+        if budget is not None:
+            reranker.budget_ms = budget
+        r = answer_quality(retriever, model, tokenizer, mode, args.answer_k, args.max_new_tokens, args.limit)
+        print(f"{label:<16}{args.answer_k:>4}{r['exact_match']:>8.3f}{r['token_f1']:>10.3f}{r['search_ms']:>11.2f}")
+    retriever.reranker = None
+
+
+if __name__ == "__main__":
+    main()
@@ -70,7 +70,7 @@ echo ========================================
 echo.
 echo Next steps:
 echo 1. Edit .env file and add your OpenAI API key
-echo 2. Run: python test_components.py (to test everything)
+echo 2. Run: python -m pytest (to test everything headlessly)
 echo 3. Run: python voice_assistant.py (to start the assistant)
 echo.
 echo Press any key to exit...
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+SLM Chatbot
+Loads the fine-tuned Phi-2 + LoRA model from slm_chatbot.ipynb and answers
+questions with it, prompting through chat_format exactly as in training.
+
+Backends (pick with backend= or the SLM_BACKEND environment variable):
+    cuda-4bit  bitsandbytes 4-bit, as in the notebook (needs CUDA)
+    cpu-int8   LoRA merged into fp32 weights, Linear layers dynamically
+               quantized to int8 with torch (default without CUDA)
+    cpu-fp32   LoRA merged, full precision on CPU
+"""
+
+import argparse
+import os
+import queue
+import threading
+from typing import Iterator, List, Optional
+
+from chat_format import build_context_prefix
+from generation import DEFAULT_STOP_SEQUENCES, generate_answer, stream_until_stop
+
+
+MODEL_NAME = "microsoft/phi-2"
+ADAPTER_DIR = "phi2-qlora"
+BACKENDS = ("cuda-4bit", "cpu-int8", "cpu-fp32")
+
+
+def default_backend() -> str:
+    """SLM_BACKEND if set, otherwise 4-bit on CUDA or int8 on CPU"""
+    backend = os.getenv("SLM_BACKEND")
+    if backend:
+        return backend.lower()
+    import torch
+    return "cuda-4bit" if torch.cuda.is_available() else "cpu-int8"
+
+
+def conv1d_to_linear(model):
+    """Swap transformers' Conv1D layers (GPT-2 family) for equivalent nn.Linear layers, in place"""
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape  # Conv1D stores (in, out)
+                linear = torch.nn.Linear(in_features, out_features, dtype=child.weight.dtype)
+                with torch.no_grad():
+                    linear.weight.copy_(child.weight.t())
+                    linear.bias.copy_(child.bias)
+                setattr(module, name, linear)
+    return model
+
+
+def quantize_int8(model):
+    """Dynamically quantize every linear layer to int8 for CPU inference.
+
+    quantize_dynamic only handles nn.Linear, so Conv1D layers are converted
+    first; otherwise a GPT-2 style model would keep all its attention and
+    MLP weights in fp32.
+    """
+    import torch
+    return torch.ao.quantization.quantize_dynamic(conv1d_to_linear(model), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_model(adapter_dir: Optional[str] = ADAPTER_DIR, model_name: str = MODEL_NAME,
+               backend: Optional[str] = None):
+    """Load Phi-2 on the chosen backend, with the LoRA adapter if one is given.
+
+    Returns (model, tokenizer).
+    """
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+
+    backend = backend or default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+    tokenizer = AutoTokenizer.from_pretrained(adapter_dir or model_name)
+    tokenizer.pad_token = tokenizer.eos_token
+
+    if backend == "cuda-4bit":
+        bnb_config = BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_compute_dtype=torch.float16,
+            bnb_4bit_use_double_quant=True
+        )
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            quantization_config=bnb_config,
+            device_map="auto"
+        )
+        if adapter_dir:
+            from peft import PeftModel
+            model = PeftModel.from_pretrained(model, adapter_dir)
+    else:
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+        if adapter_dir:
+            from peft import PeftModel
+            # Merge before quantizing so the int8 weights already include the LoRA update
+            model = PeftModel.from_pretrained(model, adapter_dir).merge_and_unload()
+        if backend == "cpu-int8":
+            model = quantize_int8(model)
+
+    model.eval()
+    return model, tokenizer
+
+
+class SLMChatbot:
+    def __init__(self, model, tokenizer, prefix_cache=None, drafter=None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.prefix_cache = prefix_cache  # optional prefix_cache.PrefixCache
+        self.drafter = drafter  # optional speculative.py drafter for speculative decoding
+
+    @classmethod
+    def load(cls, adapter_dir: Optional[str] = ADAPTER_DIR, model_name: str = MODEL_NAME,
+             backend: Optional[str] = None) -> "SLMChatbot":
+        return cls(*load_model(adapter_dir, model_name, backend))
+
+    def answer(self, question: str, max_new_tokens: int = 100, context: Optional[List[str]] = None,
+               **generate_kwargs) -> str:
+        """Generate an answer to one question, stopping at the next turn marker.
+
+        `context` passages (e.g. from rag_retrieval) are put in a shared prefix
+        whose KV cache is reused when a prefix cache is configured.
+        """
+        prefix = build_context_prefix(context) if context else ""
+        text, _ = generate_answer(self.model, self.tokenizer, question, max_new_tokens,
+                                  prefix=prefix, prefix_cache=self.prefix_cache, drafter=self.drafter,
+                                  **generate_kwargs)
+        return text
+
+    def stream(self, question: str, max_new_tokens: int = 100, context: Optional[List[str]] = None,
+               timeout: float = 60.0, **generate_kwargs) -> Iterator[str]:
+        """Yield the answer in pieces while it is being generated.
+
+        Errors in the generation thread are re-raised here; a TimeoutError is
+        raised if no text arrives for `timeout` seconds.
+        """
+        from transformers import TextIteratorStreamer
+
+        if self.drafter is not None:
+            # Speculative decoding emits several tokens per step and has no streamer hook
+            yield self.answer(question, max_new_tokens, context, **generate_kwargs)
+            return
+
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True,
+                                        timeout=timeout)
+        prefix = build_context_prefix(context) if context else ""
+        errors = []
+
+        def generate():
+            try:
+                generate_answer(self.model, self.tokenizer, question, max_new_tokens, prefix=prefix,
+                                prefix_cache=self.prefix_cache, streamer=streamer, **generate_kwargs)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()  # unblock the consumer
+
+        worker = threading.Thread(target=generate, daemon=True)
+        worker.start()
+        started = False
+        try:
+            for chunk in stream_until_stop(streamer, DEFAULT_STOP_SEQUENCES):
+                if not started:
+                    chunk = chunk.lstrip()
+                    started = bool(chunk)
+                if chunk:
+                    yield chunk
+        except queue.Empty:
+            raise TimeoutError(f"No output from the model for {timeout:.0f} s") from None
+        worker.join()
+        if errors:
+            raise errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ask the fine-tuned SLM chatbot a question")
+    parser.add_argument("question", nargs="*")
+    parser.add_argument("--adapter", default=ADAPTER_DIR)
+    parser.add_argument("--backend", choices=BACKENDS)
+    args = parser.parse_args()
+
+    chatbot = SLMChatbot.load(args.adapter, backend=args.backend)
+    question = " ".join(args.question) or "What does your company do?"
+    print(f"👤 {question}")
+    print(f"🤖 {chatbot.answer(question)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Shared data for the SLM chatbot
+The RAG documents from slm_chatbot.ipynb, kept in one place so the index
+builder, the retrieval code and the benchmarks all use the same corpus.
+"""
+
+DOCS = [
+    {"text": "The refund policy allows customers to request a refund within 30 days of purchase."},
+    {"text": "Customer support is available 24/7 via email and chatbot assistance."},
+    {"text": "Shipping usually takes 3 to 5 business days depending on the destination."},
+    {"text": "Users can reset their password by going to the account settings page."},
+    {"text": "The premium plan includes unlimited access to all features and priority support."}
+]
+
+# Fine-tuning QA pairs from slm_chatbot.ipynb
+QA_PAIRS = [
+    {
+        "prompt": "What does your company do?",
+        "answer": "Our company provides professional IT services, including software development, cloud solutions, automation, and technical consulting."
+    },
+    {
+        "prompt": "What industries do you serve?",
+        "answer": "We work with clients across finance, healthcare, retail, manufacturing, and emerging technology sectors."
+    },
+    {
+        "prompt": "Where is your company located?",
+        "answer": "We have our headquarters in Bangalore, with additional offices in Mumbai and Hyderabad."
+    },
+    {
+        "prompt": "What services do you offer?",
+        "answer": "We offer software development, mobile app development, data analytics, cloud migration, DevOps, and AI/ML services."
+    },
+    {
+        "prompt": "Do you provide custom software solutions?",
+        "answer": "Yes, we specialize in building end-to-end custom software tailored to each client's business needs."
+    },
+    {
+        "prompt": "Do you offer cloud consulting?",
+        "answer": "Yes, we provide cloud migration, architecture design, security assessment, and deployment services on AWS, Azure, and Google Cloud."
+    },
+    {
+        "prompt": "How can I contact customer support?",
+        "answer": "You can contact our support team through email, live chat, or our 24/7 customer helpline."
+    },
+    {
+        "prompt": "What is your refund policy?",
+        "answer": "Refunds are available within 30 days for subscription plans, subject to review and approval."
+    },
+    {
+        "prompt": "Do you provide ongoing support after project delivery?",
+        "answer": "Yes, we offer post-launch maintenance, bug fixes, and continuous enhancements."
+    },
+    {
+        "prompt": "How does your pricing work?",
+        "answer": "Our pricing is flexible and depends on project complexity, duration, and resource requirements."
+    },
+    {
+        "prompt": "Do you offer subscription plans?",
+        "answer": "Yes, we provide monthly and yearly subscription plans for our cloud-based products."
+    },
+    {
+        "prompt": "Can I upgrade or downgrade my plan anytime?",
+        "answer": "Yes, customers can modify their plan at any time through the account dashboard."
+    },
+    {
+        "prompt": "How can I apply for a job at your company?",
+        "answer": "You can apply through our careers portal or email your resume to our HR department."
+    },
+    {
+        "prompt": "Do you offer internships?",
+        "answer": "Yes, we offer internships in software development, AI/ML, quality assurance, and cloud computing."
+    },
+    {
+        "prompt": "What is the work culture like?",
+        "answer": "Our work culture encourages innovation, collaboration, and continuous learning."
+    },
+    {
+        "prompt": "Do you have a product platform?",
+        "answer": "Yes, we offer a cloud-based analytics and automation platform used by enterprises to optimize workflows."
+    },
+    {
+        "prompt": "Does your platform offer API integration?",
+        "answer": "Yes, our platform supports REST, GraphQL, and Webhooks for smooth third-party integration."
+    },
+    {
+        "prompt": "Is my data secure on your platform?",
+        "answer": "Absolutely. We follow industry-standard encryption, role-based access control, and regular security audits to keep your data protected."
+    },
+    {
+        "prompt": "Who developed bose professional?",
+        "answer": "The bose professional in India was devloped by Yashmitha Vagman"
+    },
+    {
+        "prompt": "Who was the reason for the development of bose professional",
+        "answer": "The bose professional was devloped by Yashmitha Vagman"
+    },
+    {
+        "prompt": "Who is the major reson for the development of bose professional?",
+        "answer": "Yashmitha Vagman is the major contributor in bose professional"
+    },
+]
+
+
+def qa_docs():
+    """The QA pairs as retrieval documents"""
+    return [{"text": f"{qa['prompt']} {qa['answer']}"} for qa in QA_PAIRS]
+
+
+def retrieval_corpus():
+    """RAG documents followed by the QA documents; RETRIEVAL_EVAL ids index into this"""
+    return DOCS + qa_docs()
+
+
+# Labeled retrieval queries: ids of the relevant documents in retrieval_corpus().
+# Mixes paraphrases (dense-friendly) with exact names and terms (sparse-friendly).
+RETRIEVAL_EVAL = [
+    {"query": "GraphQL and Webhooks support", "relevant": [21]},
+    {"query": "What comes with the premium plan?", "relevant": [4]},
+    {"query": "Yashmitha Vagman", "relevant": [23, 24, 25]},
+    {"query": "Can I get a refund within 30 days?", "relevant": [0, 12]},
+    {"query": "AWS Azure Google Cloud migration", "relevant": [10]},
+    {"query": "Bangalore headquarters", "relevant": [7]},
+    {"query": "I forgot my password", "relevant": [3]},
+    {"query": "Is there a 24/7 helpline?", "relevant": [1, 11]},
+    {"query": "How long does delivery take?", "relevant": [2]},
+    {"query": "Can I change my subscription tier?", "relevant": [16]},
+    {"query": "careers portal resume", "relevant": [17]},
+    {"query": "AI/ML internships", "relevant": [18]},
+    {"query": "Which sectors do you work with?", "relevant": [6]},
+    {"query": "encryption and role-based access control", "relevant": [22]},
+    {"query": "Will you fix bugs after launch?", "relevant": [13]},
+    {"query": "monthly or yearly plans", "relevant": [15]},
+    {"query": "How much does a project cost?", "relevant": [14]},
+]
+
+
+# Questions from the notebook's inference cell
+TEST_QUESTIONS = [
+    "What does your company do?",
+    "Who developed bose professional?",
+    "What is your refund policy?",
+    "How can I contact customer support?",
+    "Do you provide ongoing support after project delivery?"
+]
+
+
+# Held-out rewordings of QA_PAIRS questions ("qa" is the index of the pair
+# holding the reference answer), for evaluating answers on unseen phrasing
+EVAL_PARAPHRASES = [
+    {"question": "What kind of business is your company in?", "qa": 0},
+    {"question": "Which sectors are your clients from?", "qa": 1},
+    {"question": "Where are your offices?", "qa": 2},
+    {"question": "What can you build for us?", "qa": 3},
+    {"question": "Can you make software tailored to my business?", "qa": 4},
+    {"question": "Do you help companies move to the cloud?", "qa": 5},
+    {"question": "How do I reach your support team?", "qa": 6},
+    {"question": "Can I get my money back on a subscription?", "qa": 7},
+    {"question": "Will you maintain the product after launch?", "qa": 8},
+    {"question": "How much do your projects cost?", "qa": 9},
+    {"question": "Is there a yearly plan?", "qa": 10},
+    {"question": "How do I change my plan?", "qa": 11},
+    {"question": "Where can I send my resume?", "qa": 12},
+    {"question": "Are there internship openings?", "qa": 13},
+    {"question": "What is it like to work there?", "qa": 14},
+    {"question": "Which APIs does the platform support?", "qa": 16},
+    {"question": "How do you keep my data safe?", "qa": 17},
+    {"question": "Who built bose professional?", "qa": 18},
+]
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+SLM Chatbot Evaluation
+Runs a fixed question set - the fine-tuning QA pairs plus held-out
+paraphrases - through retrieval and greedy generation, and records answer
+quality (exact match, token F1, embedding similarity to the reference),
+retrieval hit rate, time to first token, tokens/sec and peak memory. The
+JSON report has a stable layout so two runs can be diffed.
+
+Usage:
+    python slm_eval.py --tiny                       # CPU stand-in model and BM25 retrieval, offline, for CI
+    python slm_eval.py --adapter phi2-qlora         # the fine-tuned model with hybrid retrieval
+    python slm_eval.py --tiny --compare old.json    # also print metric changes against an earlier report
+"""
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bench_utils import peak_rss_mb, percentile
+from slm_data import DOCS, EVAL_PARAPHRASES, QA_PAIRS, retrieval_corpus
+
+
+SUMMARY_METRICS = ("exact_match", "token_f1", "semantic_similarity", "retrieval_hit_rate",
+                   "ttft_p50_ms", "ttft_p95_ms", "tokens_per_sec", "peak_rss_mb")
+
+
+def normalize_answer(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", text.lower()).split())
+
+
+def exact_match(prediction: str, reference: str) -> float:
+    return float(normalize_answer(prediction) == normalize_answer(reference))
+
+
+def token_f1(prediction: str, reference: str) -> float:
+    """Harmonic mean of token precision and recall after normalization"""
+    pred, ref = normalize_answer(prediction).split(), normalize_answer(reference).split()
+    common = sum((Counter(pred) & Counter(ref)).values())
+    if not common:
+        return 0.0
+    precision, recall = common / len(pred), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def eval_questions() -> List[Dict]:
+    """QA prompts followed by held-out paraphrases, each with its reference answer"""
+    items = [{"question": qa["prompt"], "qa": i, "split": "train"} for i, qa in enumerate(QA_PAIRS)]
+    items += [{"question": p["question"], "qa": p["qa"], "split": "paraphrase"} for p in EVAL_PARAPHRASES]
+    for item in items:
+        item["reference"] = QA_PAIRS[item["qa"]]["answer"]
+        item["relevant_doc"] = len(DOCS) + item["qa"]  # its QA document in retrieval_corpus()
+    return items
+
+
+def _timing_streamer():
+    """Streamer that records when the first new token arrives and counts tokens"""
+    from transformers.generation.streamers import BaseStreamer
+
+    class _TimingStreamer(BaseStreamer):
+        def __init__(self):
+            self.first_token_at = None
+            self.tokens = 0
+            self._prompt_seen = False
+
+        def put(self, value):
+            if not self._prompt_seen:  # generate() passes the prompt first
+                self._prompt_seen = True
+                return
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self.tokens += value.numel()
+
+        def end(self):
+            pass
+
+    return _TimingStreamer()
+
+
+def load_retrieval(tiny: bool) -> Tuple[str, Callable[[str, int], List[Tuple[int, str]]]]:
+    """(name, retrieve(question, k) -> [(doc_id, text)]) over retrieval_corpus()"""
+    corpus = retrieval_corpus()
+    if tiny:
+        from bm25 import BM25Index
+
+        bm25 = BM25Index().build([d["text"] for d in corpus])
+        return "bm25", lambda q, k: [(i, corpus[i]["text"]) for i, _ in bm25.search(q, k)]
+
+    from rag_retrieval import RAGRetriever
+
+    retriever = RAGRetriever().build(corpus)
+    return "hybrid", lambda q, k: [(r["id"], r["text"]) for r in retriever.search(q, k=k, mode="hybrid")]
+
+
+def load_similarity() -> Optional[Callable[[List[str], List[str]], List[float]]]:
+    """Cosine similarity of sentence embeddings, or None if the embedder cannot be loaded"""
+    try:
+        import numpy as np
+
+        from rag_retrieval import load_embedder
+        embedder = load_embedder()
+    except Exception as e:  # missing package or no cached model (offline CI)
+        print(f"⚠️  Semantic similarity disabled: {e}")
+        return None
+
+    def similarity(a: List[str], b: List[str]) -> List[float]:
+        ea = embedder.encode(a, convert_to_numpy=True, show_progress_bar=False)
+        eb = embedder.encode(b, convert_to_numpy=True, show_progress_bar=False)
+        ea = ea / np.linalg.norm(ea, axis=1, keepdims=True)
+        eb = eb / np.linalg.norm(eb, axis=1, keepdims=True)
+        return [float(x) for x in (ea * eb).sum(axis=1)]
+
+    return similarity
+
+
+def run_eval(model, tokenizer, retrieve: Optional[Callable], similarity: Optional[Callable],
+             max_new_tokens: int = 64, k: int = 2, limit: int = 0) -> Dict:
+    """Answer every eval question; returns {"summary": ..., "questions": [...]}"""
+    from chat_format import build_context_prefix
+    from generation import generate_answer
+
+    items = eval_questions()[:limit or None]
+    generate_answer(model, tokenizer, items[0]["question"], 4, do_sample=False)  # warm-up
+
+    rows = []
+    for item in items:
+        row = {"question": item["question"], "split": item["split"], "reference": item["reference"]}
+        prefix = ""
+        if retrieve is not None:
+            start = time.perf_counter()
+            hits = retrieve(item["question"], k)
+            row["retrieval_ms"] = (time.perf_counter() - start) * 1000
+            row["retrieval_hit"] = float(any(i == item["relevant_doc"] for i, _ in hits))
+            prefix = build_context_prefix([text for _, text in hits])
+
+        streamer = _timing_streamer()
+        start = time.perf_counter()
+        answer, n_tokens = generate_answer(model, tokenizer, item["question"], max_new_tokens,
+                                           prefix=prefix, do_sample=False, streamer=streamer)
+        elapsed = time.perf_counter() - start
+        row.update({
+            "answer": answer,
+            "tokens": n_tokens,
+            "ttft_ms": ((streamer.first_token_at or time.perf_counter()) - start) * 1000,
+            "generate_ms": elapsed * 1000,
+            "tokens_per_sec": n_tokens / elapsed,
+            "exact_match": exact_match(answer, item["reference"]),
+            "token_f1": token_f1(answer, item["reference"]),
+        })
+        rows.append(row)
+
+    if similarity is not None:
+        for row, score in zip(rows, similarity([r["answer"] for r in rows], [r["reference"] for r in rows])):
+            row["semantic_similarity"] = score
+
+    def mean(key, split=None):
+        values = [r[key] for r in rows if key in r and (split is None or r["split"] == split)]
+        return statistics.mean(values) if values else None
+
+    ttfts = [r["ttft_ms"] for r in rows]
+    summary = {
+        "questions": len(rows),
+        "exact_match": mean("exact_match"),
+        "token_f1": mean("token_f1"),
+        "semantic_similarity": mean("semantic_similarity"),
+        "retrieval_hit_rate": mean("retrieval_hit"),
+        "ttft_p50_ms": percentile(ttfts, 50),
+        "ttft_p95_ms": percentile(ttfts, 95),
+        "tokens_per_sec": sum(r["tokens"] for r in rows) / (sum(r["generate_ms"] for r in rows) / 1000),
+        "peak_rss_mb": peak_rss_mb(),
+        "by_split": {split: {"token_f1": mean("token_f1", split),
+                             "semantic_similarity": mean("semantic_similarity", split)}
+                     for split in ("train", "paraphrase")},
+    }
+    import torch
+    if torch.cuda.is_available():
+        summary["peak_cuda_mb"] = torch.cuda.max_memory_allocated() / 2**20
+    return {"summary": summary, "questions": rows}
+
+
+def _rounded(value):
+    if isinstance(value, float):
+        return round(value, 4)
+    if isinstance(value, dict):
+        return {k: _rounded(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_rounded(v) for v in value]
+    return value
+
+
+def write_report(report: Dict, path: str):
+    with open(path, "w") as f:
+        json.dump(_rounded(report), f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def print_summary(summary: Dict, baseline: Optional[Dict] = None):
+    header = f"{'metric':<22}{'value':>12}" + (f"{'baseline':>12}{'change':>10}" if baseline else "")
+    print(header)
+    for key in SUMMARY_METRICS:
+        value = summary.get(key)
+        line = f"{key:<22}{'-' if value is None else f'{value:.4g}':>12}"
+        if baseline:
+            old = baseline.get(key)
+            line += f"{'-' if old is None else f'{old:.4g}':>12}"
+            if value is not None and old:
+                line += f"{(value - old) / abs(old):>+10.1%}"
+        print(line)
+
+
+def main():
+    from slm_chatbot import ADAPTER_DIR, BACKENDS, MODEL_NAME, default_backend
+
+    parser = argparse.ArgumentParser(description="Evaluate and benchmark the SLM chatbot")
+    parser.add_argument("--tiny", action="store_true", help="CPU stand-in model trained on the QA pairs; no downloads, so no semantic similarity")
+    parser.add_argument("--adapter", default=ADAPTER_DIR)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backend", choices=BACKENDS)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--k", type=int, default=2, help="passages retrieved per question")
+    parser.add_argument("--no-rag", action="store_true", help="answer without retrieved context")
+    parser.add_argument("--limit", type=int, default=0, help="only the first N questions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="slm_eval_report.json")
+    parser.add_argument("--compare", help="earlier report to compare the summary against")
+    args = parser.parse_args()
+
+    import torch
+    torch.manual_seed(args.seed)
+
+    print("📋 SLM Chatbot Evaluation")
+    print("=" * 50)
+    if args.tiny:
+        from generation import train_transcript_model
+        model, tokenizer = train_transcript_model()
+        model_label = "tiny-transcript-model"
+    else:
+        from slm_chatbot import load_model
+        model, tokenizer = load_model(args.adapter, args.model, args.backend)
+        model_label = args.model
+
+    retrieval_name, retrieve = (None, None) if args.no_rag else load_retrieval(args.tiny)
+    similarity = None if args.tiny else load_similarity()  # --tiny stays offline: no embedder download
+    report = run_eval(model, tokenizer, retrieve, similarity, args.max_new_tokens, args.k, args.limit)
+    report["config"] = {
+        "model": model_label,
+        "adapter": None if args.tiny else args.adapter,
+        "backend": "cpu-fp32" if args.tiny else args.backend or default_backend(),
+        "retrieval": retrieval_name,
+        "k": args.k,
+        "max_new_tokens": args.max_new_tokens,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "threads": torch.get_num_threads(),
+    }
+    write_report(report, args.output)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["summary"]
+    print_summary(report["summary"], baseline)
+    print(f"\n📝 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Speculative Decoding for the SLM Responder
+A cheap drafter proposes a few tokens, the main model checks them all in one
+forward pass and keeps the longest prefix it agrees with, plus one token of
+its own. Output is identical to greedy decoding; only the speed changes.
+
+Drafters:
+    PromptLookupDrafter  copies the tokens that followed the latest n-gram
+                         match in the prompt (retrieved passages), which
+                         suits extractive QA and needs no extra model
+    DraftModelDrafter    greedy tokens from a small draft model that shares
+                         the main model's tokenizer
+
+Usage:
+    python speculative.py --bench    # tokens/sec and acceptance rate, tiny CPU models
+"""
+
+import argparse
+import time
+from typing import Callable, List, Optional
+
+
+class _DrafterStats:
+    def __init__(self):
+        self.drafted = 0
+        self.accepted = 0
+        self.steps = 0
+
+    @property
+    def acceptance_rate(self) -> float:
+        return self.accepted / self.drafted if self.drafted else 0.0
+
+    def reset_stats(self):
+        self.drafted = self.accepted = self.steps = 0
+
+
+class PromptLookupDrafter(_DrafterStats):
+    def __init__(self, num_draft_tokens: int = 8, max_ngram: int = 3):
+        super().__init__()
+        self.num_draft_tokens = num_draft_tokens
+        self.max_ngram = max_ngram
+
+    def reset(self):
+        pass
+
+    def propose(self, ids: List[int]) -> List[int]:
+        """Tokens that followed the most recent earlier occurrence of the trailing n-gram"""
+        for n in range(min(self.max_ngram, len(ids) - 1), 0, -1):
+            tail = ids[-n:]
+            for start in range(len(ids) - n - 1, -1, -1):
+                if ids[start:start + n] == tail:
+                    follow = ids[start + n:start + n + self.num_draft_tokens]
+                    if follow:
+                        return follow
+        return []
+
+
+class DraftModelDrafter(_DrafterStats):
+    def __init__(self, draft_model, num_draft_tokens: int = 4):
+        super().__init__()
+        self.model = draft_model
+        self.num_draft_tokens = num_draft_tokens
+        self.reset()
+
+    def reset(self):
+        self.past = None
+        self.cached: List[int] = []  # tokens currently held in self.past
+
+    def propose(self, ids: List[int]) -> List[int]:
+        import torch
+        from transformers import DynamicCache
+
+        # Keep the part of the draft cache that still matches the accepted sequence
+        common = 0
+        limit = min(len(self.cached), len(ids) - 1)
+        while common < limit and self.cached[common] == ids[common]:
+            common += 1
+        if self.past is None or common == 0:
+            self.past, self.cached = DynamicCache(), []
+        else:
+            self.past.crop(common)
+            self.cached = self.cached[:common]
+
+        draft = []
+        feed = ids[len(self.cached):]
+        with torch.no_grad():
+            for _ in range(self.num_draft_tokens):
+                x = torch.tensor([feed], device=self.model.device)
+                out = self.model(input_ids=x, past_key_values=self.past, use_cache=True)
+                self.past = out.past_key_values
+                self.cached.extend(feed)
+                token = int(out.logits[0, -1].argmax())
+                draft.append(token)
+                feed = [token]
+        return draft
+
+
+def speculative_generate(model, input_ids: List[int], drafter, max_new_tokens: int,
+                         eos_token_id: Optional[int] = None,
+                         should_stop: Optional[Callable[[List[int]], bool]] = None) -> List[int]:
+    """Greedy generation with draft verification; returns the new token ids.
+
+    Invariant: the main model's KV cache covers every accepted token except
+    the last one, which is fed together with the next draft.
+    """
+    import torch
+    from transformers import DynamicCache
+
+    ids = list(input_ids)
+    prompt_length = len(ids)
+    drafter.reset()
+
+    past = DynamicCache()
+    with torch.no_grad():
+        if len(ids) > 1:
+            prefill = torch.tensor([ids[:-1]], device=model.device)
+            past = model(input_ids=prefill, past_key_values=past, use_cache=True).past_key_values
+
+        while len(ids) - prompt_length < max_new_tokens:
+            remaining = max_new_tokens - (len(ids) - prompt_length)
+            draft = drafter.propose(ids)[:remaining - 1]
+
+            candidate = torch.tensor([[ids[-1]] + draft], device=model.device)
+            out = model(input_ids=candidate, past_key_values=past, use_cache=True)
+            past = out.past_key_values
+            predicted = out.logits[0].argmax(dim=-1).tolist()
+
+            accepted = 0
+            while accepted < len(draft) and draft[accepted] == predicted[accepted]:
+                accepted += 1
+            new_tokens = draft[:accepted] + [predicted[accepted]]
+
+            # Drop cache entries for rejected draft tokens
+            past.crop(len(ids) + accepted)
+            drafter.drafted += len(draft)
+            drafter.accepted += accepted
+            drafter.steps += 1
+
+            if eos_token_id is not None and eos_token_id in new_tokens:
+                ids.extend(new_tokens[:new_tokens.index(eos_token_id) + 1])
+                break
+            ids.extend(new_tokens)
+            if should_stop is not None and should_stop(ids):
+                break
+
+    return ids[prompt_length:][:max_new_tokens]
+
+
+def benchmark(max_new_tokens: int = 64, steps: int = 300):
+    from chat_format import build_context_prefix, encode_prompt
+    from generation import context_window, generate_answer, train_transcript_model
+    from slm_data import TEST_QUESTIONS, retrieval_corpus
+
+    print("🏋️  Training tiny target and draft models on QA transcripts...")
+    model, tokenizer = train_transcript_model(steps, n_layer=6, n_embd=384, n_head=6)
+    draft_model, _ = train_transcript_model(steps, n_layer=1, n_embd=64, n_head=2)
+    # As many passages as fit in the context window next to the longest prompt and the answer
+    budget = context_window(model) - max_new_tokens - max(len(encode_prompt(tokenizer, q)) for q in TEST_QUESTIONS)
+    passages = []
+    for doc in retrieval_corpus()[5:]:
+        if len(tokenizer(build_context_prefix(passages + [doc["text"]]))["input_ids"]) > budget:
+            break
+        passages.append(doc["text"])
+    prefix = build_context_prefix(passages)
+    print(f"📚 {len(passages)} passages in the context prefix")
+
+    modes = (
+        ("greedy", None),
+        ("prompt-lookup", PromptLookupDrafter()),
+        ("draft-model", DraftModelDrafter(draft_model)),
+    )
+    print(f"\n{'mode':<15}{'tokens/s':>10}{'acceptance':>12}{'tokens/step':>13}")
+    for name, drafter in modes:
+        generate_answer(model, tokenizer, TEST_QUESTIONS[0], 4, prefix=prefix, drafter=drafter)  # warm-up
+        if drafter is not None:
+            drafter.reset_stats()
+        tokens = 0
+        start = time.perf_counter()
+        for question in TEST_QUESTIONS:
+            _, n = generate_answer(model, tokenizer, question, max_new_tokens, prefix=prefix,
+                                   drafter=drafter, do_sample=False)
+            tokens += n
+        elapsed = time.perf_counter() - start
+        if drafter is None:
+            print(f"{name:<15}{tokens / elapsed:>10.1f}{'-':>12}{1.0:>13.2f}")
+        else:
+            print(f"{name:<15}{tokens / elapsed:>10.1f}{drafter.acceptance_rate:>12.1%}"
+                  f"{tokens / max(drafter.steps, 1):>13.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speculative decoding for the SLM responder")
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    if not args.bench:
+        parser.print_help()
+        return
+    print("⚡ Speculative Decoding Benchmark")
+    print("=" * 50)
+    benchmark(args.max_new_tokens)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import pytest
+
+
+STUB_REPLY = "Quantum computers use qubits to explore many states at once."
+
+
+@pytest.fixture
+def stub_llm():
+    """Local OpenAI-compatible server answering every chat completion with STUB_REPLY"""
+    from voice_testing import StubLLMServer
+
+    with StubLLMServer(reply=STUB_REPLY, latency=0.05) as server:
+        yield server
+
+
+@pytest.fixture
+def make_assistant(tmp_path, monkeypatch):
+    """Build a headless AdvancedVoiceAssistant that hears the given transcripts in order"""
+    from voice_testing import build_script, headless_assistant, headless_env
+
+    def factory(transcripts, llm=None, **kwargs):
+        monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+        for name, value in headless_env(llm.url if llm else None).items():
+            monkeypatch.setenv(name, value)
+        script = build_script(str(tmp_path), transcripts)
+        return headless_assistant(script, **kwargs)
+
+    return factory
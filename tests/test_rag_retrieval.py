@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from bm25 import BM25Index  # noqa: E402
+from rag_retrieval import RAGRetriever  # noqa: E402
+from slm_data import DOCS  # noqa: E402
+
+
+class WordHashEmbedder:
+    """Deterministic bag-of-words vectors, so retrieval runs without downloading a model"""
+
+    def get_sentence_embedding_dimension(self):
+        return 32
+
+    def encode(self, texts, **kwargs):
+        out = np.zeros((len(texts), 32), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                out[row, sum(map(ord, word)) % 32] += 1
+        return out
+
+
+@pytest.fixture
+def retriever():
+    return RAGRetriever(embedder=WordHashEmbedder(), cache_dir=None).build(DOCS)
+
+
+def test_bm25_add_matches_rebuild():
+    texts = [d["text"] for d in DOCS]
+    rebuilt = BM25Index().build(texts)
+    incremental = BM25Index().build(texts[:2])
+    for text in texts[2:]:
+        incremental.add([text])
+
+    for query in ("How do I get my money back?", "How long is shipping?", "reset my password"):
+        assert incremental.search(query, len(texts)) == pytest.approx(rebuilt.search(query, len(texts)))
+
+
+def test_retriever_add_updates_sparse_search(retriever):
+    ids = retriever.add([{"text": "Gift cards never expire and work in every store."}])
+
+    top = retriever.search("do gift cards expire", k=1, mode="sparse")[0]
+    assert top["id"] == ids[0]
+
+
+def test_missing_doc_type_returns_nothing(retriever):
+    for mode in ("dense", "sparse", "hybrid"):
+        assert retriever.search("refund", k=3, mode=mode, doc_type="image") == []
+
+
+def test_text_search_skips_other_doc_types(retriever):
+    ids = retriever.add([{"text": "Image: refund receipt", "type": "image"}])
+
+    assert all(r["id"] not in ids for r in retriever.search("refund receipt", k=len(retriever.docs)))
+    assert [r["id"] for r in retriever.search("refund receipt", k=3, doc_type="image")] == ids
+
+
+def test_repeated_queries_are_embedded_once(retriever):
+    calls = []
+    encode = retriever.embedder.encode
+    retriever.embedder.encode = lambda texts, **kwargs: calls.append(list(texts)) or encode(texts, **kwargs)
+    retriever.query_cache_size = 2
+
+    for query in ("refund", "shipping", "refund", "password", "shipping"):
+        retriever.dense_search(query, 1)
+
+    # "refund" is reused; "shipping" was evicted by "password" once the LRU held two queries
+    assert calls == [["refund"], ["shipping"], ["password"], ["shipping"]]
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+pytest.importorskip("speech_recognition")
+pytest.importorskip("pyttsx3")
+pytest.importorskip("dotenv")
+pytest.importorskip("requests")
+
+from conftest import STUB_REPLY  # noqa: E402
+from voice_testing import SAMPLE_RATE  # noqa: E402
+
+
+# Time from the end of the user's utterance to the start of the spoken reply
+TURN_BUDGET_S = float(os.getenv("VOICE_TURN_BUDGET_MS", "1000")) / 1000
+
+
+def test_local_responses_need_no_provider(make_assistant):
+    assistant = make_assistant([])
+
+    assert assistant.process_question("hello there").startswith("Hello! I'm Pari")
+    assert "welcome" in assistant.process_question("thanks a lot")
+    assert assistant.process_question("explain quantum computing") == assistant.get_fallback_response("")
+
+
+def test_special_commands(make_assistant):
+    assistant = make_assistant([])
+    tts = assistant.tts_engine
+
+    assert assistant.handle_special_commands("what time is it") == (True, True)
+    assert tts.spoken[-1].startswith("The current time is")
+
+    assistant.conversation_history = [[{"role": "user", "content": "x"}]]
+    assert assistant.handle_special_commands("clear history") == (True, True)
+    assert assistant.conversation_history == []
+
+    assistant.is_awake = True
+    assert assistant.handle_special_commands("go to sleep") == (True, True)
+    assert not assistant.is_awake
+
+    assert assistant.handle_special_commands("goodbye") == (False, True)
+    assert assistant.handle_special_commands("explain quantum computing") == (True, False)
+
+
+def test_openai_provider_uses_history(make_assistant, stub_llm):
+    pytest.importorskip("openai")
+    assistant = make_assistant([], llm=stub_llm)
+
+    assert assistant.process_question("explain quantum computing") == STUB_REPLY
+    assert assistant.process_question("and what about qubits") == STUB_REPLY
+
+    first, second = stub_llm.requests
+    assert first["messages"][0]["role"] == "system"
+    assert first["messages"][-1] == {"role": "user", "content": "explain quantum computing"}
+    assert {"role": "assistant", "content": STUB_REPLY} in second["messages"]
+    assert len(assistant.conversation_history) == 2
+
+
+def test_failed_provider_falls_through(make_assistant):
+    pytest.importorskip("openai")
+    from voice_testing import StubLLMServer
+
+    with StubLLMServer(status=400) as llm:  # 4xx errors are not retried by the client
+        assistant = make_assistant([], llm=llm)
+        assert assistant.process_question("explain quantum computing") == assistant.get_fallback_response("")
+    assert assistant.conversation_history == []
+
+
+def test_local_provider_skipped_until_loaded(make_assistant):
+    from types import SimpleNamespace
+
+    assistant = make_assistant([])
+    assistant.api_priority = ["local"]
+    assistant.local_slm = SimpleNamespace(available=False, stream=lambda question: pytest.fail("not loaded"))
+    assert assistant.process_question("explain quantum computing") == assistant.get_fallback_response("")
+
+    assistant.local_slm = SimpleNamespace(available=True, stream=lambda question: iter(["Qubits ", "interfere."]))
+    assert assistant.process_question("explain quantum computing") == "Qubits interfere."
+
+
+def test_run_end_to_end(make_assistant, stub_llm):
+    pytest.importorskip("openai")
+    assistant = make_assistant(["pari", "explain quantum computing", "stop"], llm=stub_llm)
+    tts = assistant.tts_engine
+
+    assistant.run()
+
+    assert tts.spoken[1] == "Yes, how can I help you?"
+    assert STUB_REPLY in tts.spoken
+    assert tts.spoken[-1] == "Goodbye! It was nice talking with you!"
+    assert assistant.microphone.remaining == 0
+    assert len(stub_llm.requests) == 1
+    assert len(tts.pcm) == sum(int(u["seconds"] * SAMPLE_RATE) * 2 for u in tts.utterances)
+
+
+def test_silence_sends_assistant_back_to_sleep(make_assistant):
+    assistant = make_assistant(["pari", None])
+    tts = assistant.tts_engine
+
+    assistant.run()  # ends when the script runs out
+
+    assert "I didn't hear anything. Say Pari to wake me up again." in tts.spoken
+    assert tts.spoken[-1] == "Goodbye!"
+    assert not assistant.is_awake
+
+
+def test_turn_latency(make_assistant, stub_llm):
+    pytest.importorskip("openai")
+    import openai  # noqa: F401  (first import is slow; keep it out of the measured turn)
+
+    assistant = make_assistant(["pari", "explain quantum computing", "stop"], llm=stub_llm, stt_latency=0.02)
+    tts = assistant.tts_engine
+
+    assistant.run()
+
+    captured = assistant.microphone.captured_at
+    said = {u["text"]: u["said_at"] for u in tts.utterances}
+    wake_latency = said["Yes, how can I help you?"] - captured[0]
+    answer_latency = said[STUB_REPLY] - captured[1]
+    assert wake_latency < TURN_BUDGET_S, f"wake word acknowledged after {wake_latency * 1000:.0f} ms"
+    assert answer_latency < TURN_BUDGET_S, f"answer started after {answer_latency * 1000:.0f} ms"
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("speech_recognition")
+pytest.importorskip("pyttsx3")
+pytest.importorskip("dotenv")
+pytest.importorskip("requests")
+pytest.importorskip("openai")
+
+from voice_latency_benchmark import STAGES, run_session, summarize  # noqa: E402
+
+
+def test_session_turns_are_measured():
+    transcripts = ["pari", "explain quantum computing", "what time is it", None, "pari", "stop"]
+    turns = run_session(transcripts, stt_ms=20, llm_ms=200, tts_ms=10, realtime_audio=False)
+
+    assert [t["kind"] for t in turns] == ["wake", "question", "special", "silence", "wake", "special"]
+    assert all("response_ms" in t for t in turns)
+    question = turns[1]
+    assert question["dominant"] == "llm"
+    assert sum(question["stages_ms"].values()) == pytest.approx(question["response_ms"], abs=1)
+    assert question["stages_ms"]["stt"] >= 20
+
+    summary = summarize(turns)
+    assert summary["response"]["count"] == len(turns)
+    assert set(summary["stages"]) == set(STAGES)
+    assert summary["ready"]["count"] == len(turns)
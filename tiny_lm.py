@@ -0,0 +1,53 @@
+"""
+Tiny Stand-in Language Model
+A randomly initialized GPT-2 style causal LM with a byte-level BPE tokenizer
+trained in memory on the chatbot corpus. It loads in well under a second on
+CPU and needs no downloads, so the inference benchmarks can run anywhere.
+Outputs are gibberish; only the speed and the plumbing matter.
+"""
+
+from typing import Tuple
+
+from slm_data import DOCS, QA_PAIRS
+
+
+EOS_TOKEN = "<|endoftext|>"  # same as Phi-2
+
+
+def build_tokenizer(vocab_size: int = 512):
+    """Byte-level BPE tokenizer trained on the RAG docs and QA pairs"""
+    from tokenizers import ByteLevelBPETokenizer
+    from transformers import PreTrainedTokenizerFast
+
+    corpus = [d["text"] for d in DOCS]
+    corpus += [f"User: {qa['prompt']}\nAssistant: {qa['answer']}" for qa in QA_PAIRS]
+
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(corpus, vocab_size=vocab_size, min_frequency=1, special_tokens=[EOS_TOKEN])
+
+    # The raw tokenizers.Tokenizer: the ByteLevelBPETokenizer wrapper breaks truncation=True
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=bpe._tokenizer, eos_token=EOS_TOKEN,
+                                        bos_token=EOS_TOKEN, unk_token=EOS_TOKEN)
+    tokenizer.pad_token = tokenizer.eos_token  # as the notebook does for Phi-2
+    return tokenizer
+
+
+def load_tiny_lm(n_layer: int = 2, n_embd: int = 64, n_head: int = 2,
+                 seed: int = 0) -> Tuple["object", "object"]:
+    """Return (model, tokenizer) for a tiny random causal LM"""
+    import torch
+    from transformers import GPT2Config, GPT2LMHeadModel
+
+    tokenizer = build_tokenizer()
+    torch.manual_seed(seed)
+    config = GPT2Config(
+        vocab_size=len(tokenizer),
+        n_positions=1024,
+        n_embd=n_embd,
+        n_layer=n_layer,
+        n_head=n_head,
+        bos_token_id=tokenizer.eos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+    )
+    model = GPT2LMHeadModel(config).eval()
+    return model, tokenizer
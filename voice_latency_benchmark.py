@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Voice Assistant Latency Benchmark
+Replays a scripted session - wake words, questions, special commands and a
+silent turn - through AdvancedVoiceAssistant.run() with the headless
+stand-ins from voice_testing.py: WAV audio delivered at recording speed,
+speech recognition, an OpenAI-compatible LLM server and a TTS engine, each
+with a configurable latency.
+
+For every turn it measures the response time the user experiences, from the
+end of their speech to the start of the assistant's reply, split into
+stages:
+    endpoint    waiting for the pause that ends the phrase
+    stt         speech recognition
+    llm         answering the question (process_question)
+    tts         TTS engine start-up before audio plays
+    other       everything else in run(): sleeps, prints, control flow
+and the time from the end of one reply until the microphone is listening
+again (noise calibration plus sleeps). Extra sleeps or recalibrations in
+run() show up directly in `other` and `ready`.
+
+Usage:
+    python voice_latency_benchmark.py
+    python voice_latency_benchmark.py --stt-ms 300 --llm-ms 800 --tts-ms 150 --repeat 3
+    python voice_latency_benchmark.py --budget-ms 2500     # exit 1 if p95 response time is over budget
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from unittest import mock
+
+from bench_utils import percentile
+from voice_testing import (LEAD_SILENCE, RecordingTTS, StubLLMServer, build_script, headless_assistant,
+                           headless_env, speech_seconds)
+
+
+WAKE_WORD = "pari"
+STAGES = ("endpoint", "stt", "llm", "tts", "other")
+
+# One pass of the scripted session; None is a turn where nothing is said
+SESSION = [
+    WAKE_WORD,
+    "explain quantum computing",
+    "what time is it",
+    "how do transformers work",
+    "what does a neural network learn",
+    None,
+    WAKE_WORD,
+    "what is the date",
+    "explain gradient descent",
+    "clear history",
+    "what is retrieval augmented generation",
+]
+SPECIAL_COMMANDS = {"what time is it", "what is the date", "clear history", "stop"}
+
+
+def session_transcripts(repeat: int = 1) -> List[Optional[str]]:
+    """The session `repeat` times over, ending with the stop command"""
+    return SESSION * repeat + ["stop"]
+
+
+def turn_kind(transcript: Optional[str]) -> str:
+    if transcript is None:
+        return "silence"
+    if transcript == WAKE_WORD:
+        return "wake"
+    if transcript in SPECIAL_COMMANDS:
+        return "special"
+    return "question"
+
+
+def _timed(events: List[Tuple[str, float, float]], stage: str, fn):
+    """Wrap `fn` so each call is logged as (stage, start, end)"""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            events.append((stage, start, time.perf_counter()))
+    return wrapper
+
+
+def _overlap(events: Sequence[Tuple[str, float, float]], stage: str, start: float, end: float) -> float:
+    return sum(max(0.0, min(e, end) - max(s, start)) for name, s, e in events if name == stage)
+
+
+def analyze_turns(transcripts: Sequence[Optional[str]], opened_at: Sequence[float], captured_at: Sequence[float],
+                  utterances: Sequence[Dict], events: Sequence[Tuple[str, float, float]],
+                  realtime_audio: bool = True) -> List[Dict]:
+    """Per-turn response time, stage breakdown and time-to-listening from the recorded timestamps"""
+    turns = []
+    for i, transcript in enumerate(transcripts[:len(captured_at)]):
+        opened, captured = opened_at[i], captured_at[i]
+        next_opened = opened_at[i + 1] if i + 1 < len(opened_at) else float("inf")
+        turn = {"turn": i, "kind": turn_kind(transcript), "transcript": transcript}
+
+        # Listening again: end of the previous reply's audio -> noise calibration done
+        previous = [u for u in utterances if u["started_at"] < opened]
+        calibrations = [(s, e) for name, s, e in events if name == "calibrate" and opened <= s < captured]
+        if previous and calibrations:
+            audio_end = max(u["started_at"] + u["seconds"] for u in previous)
+            turn["ready_ms"] = (calibrations[0][1] - audio_end) * 1000
+            turn["calibrate_ms"] = (calibrations[0][1] - calibrations[0][0]) * 1000
+
+        replies = [u for u in utterances if captured <= u["said_at"] < next_opened]
+        if not replies:  # e.g. speech without the wake word
+            turns.append(turn)
+            continue
+        reply = replies[0]
+        speech_end = opened + LEAD_SILENCE + speech_seconds(transcript) if realtime_audio and transcript else captured
+        end = reply["started_at"]
+        stages = {
+            "endpoint": max(0.0, captured - speech_end),
+            "stt": _overlap(events, "stt", speech_end, end),
+            "llm": _overlap(events, "llm", speech_end, end),
+            "tts": end - reply["said_at"],
+        }
+        total = end - speech_end
+        stages["other"] = max(0.0, total - sum(stages.values()))
+        turn.update({
+            "reply": reply["text"],
+            "response_ms": total * 1000,
+            "stages_ms": {k: v * 1000 for k, v in stages.items()},
+            "dominant": max(stages, key=stages.get),
+        })
+        turns.append(turn)
+    return turns
+
+
+def summarize(turns: Sequence[Dict]) -> Dict:
+    answered = [t for t in turns if "response_ms" in t]
+
+    def pcts(values: List[float]) -> Dict:
+        return {"count": len(values), "p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95),
+                "max_ms": max(values) if values else 0.0}
+
+    kinds = sorted({t["kind"] for t in answered})
+    summary = {
+        "response": pcts([t["response_ms"] for t in answered]),
+        "by_kind": {kind: pcts([t["response_ms"] for t in answered if t["kind"] == kind]) for kind in kinds},
+        "stages": {},
+        "ready": pcts([t["ready_ms"] for t in turns if "ready_ms" in t]),
+        "calibrate_ms": statistics.mean([t["calibrate_ms"] for t in turns if "calibrate_ms" in t] or [0.0]),
+    }
+    total = sum(t["response_ms"] for t in answered) or 1.0
+    for stage in STAGES:
+        values = [t["stages_ms"][stage] for t in answered]
+        summary["stages"][stage] = dict(pcts(values), share=sum(values) / total,
+                                        dominant_turns=sum(t["dominant"] == stage for t in answered))
+    return summary
+
+
+def run_session(transcripts: Sequence[Optional[str]], stt_ms: float = 300, llm_ms: float = 600,
+                tts_ms: float = 150, seconds_per_word: float = 0.05, realtime_audio: bool = True,
+                quiet: bool = True) -> List[Dict]:
+    """Replay `transcripts` through AdvancedVoiceAssistant.run() and analyze every turn"""
+    events: List[Tuple[str, float, float]] = []
+    with tempfile.TemporaryDirectory(prefix="voice_bench_") as directory, \
+            StubLLMServer("Here is a short answer to your question about that topic.", llm_ms / 1000) as llm, \
+            mock.patch.dict(os.environ, headless_env(llm.url)):
+        script = build_script(directory, transcripts)
+        tts = RecordingTTS(tts_ms / 1000, realtime=True, seconds_per_word=seconds_per_word)
+        output = io.StringIO() if quiet else None
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            assistant = headless_assistant(script, tts, stt_ms / 1000, WAKE_WORD, realtime_audio)
+            recognizer = assistant.recognizer
+            recognizer.adjust_for_ambient_noise = _timed(events, "calibrate", recognizer.adjust_for_ambient_noise)
+            recognizer.recognize_google = _timed(events, "stt", recognizer.recognize_google)
+            assistant.process_question = _timed(events, "llm", assistant.process_question)
+            assistant.run()
+        microphone = assistant.microphone
+        return analyze_turns(transcripts, microphone.opened_at, microphone.captured_at, tts.utterances,
+                             events, realtime_audio)
+
+
+def print_report(turns: Sequence[Dict], summary: Dict):
+    print(f"{'turn':>4}  {'kind':<9}{'heard':<42}{'response ms':>12}  dominant")
+    for t in turns:
+        heard = "(silence)" if t["transcript"] is None else t["transcript"]
+        response = f"{t['response_ms']:.0f}" if "response_ms" in t else "-"
+        print(f"{t['turn']:>4}  {t['kind']:<9}{heard[:40]:<42}{response:>12}  {t.get('dominant', '-')}")
+
+    print(f"\n{'response':<12}{'turns':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, row in [("all", summary["response"])] + sorted(summary["by_kind"].items()):
+        print(f"{name:<12}{row['count']:>6}{row['p50_ms']:>10.0f}{row['p95_ms']:>10.0f}{row['max_ms']:>10.0f}")
+
+    print(f"\n{'stage':<12}{'p50 ms':>10}{'p95 ms':>10}{'share':>8}{'dominant':>10}")
+    for stage in STAGES:
+        row = summary["stages"][stage]
+        print(f"{stage:<12}{row['p50_ms']:>10.0f}{row['p95_ms']:>10.0f}{row['share']:>8.0%}{row['dominant_turns']:>10}")
+
+    ready = summary["ready"]
+    print(f"\n👂 Listening again after a reply: p50 {ready['p50_ms']:.0f} ms, p95 {ready['p95_ms']:.0f} ms "
+          f"(noise calibration {summary['calibrate_ms']:.0f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a scripted session and measure per-turn latency")
+    parser.add_argument("--stt-ms", type=float, default=300, help="speech recognition latency")
+    parser.add_argument("--llm-ms", type=float, default=600, help="LLM server latency")
+    parser.add_argument("--tts-ms", type=float, default=150, help="TTS start-up latency per utterance")
+    parser.add_argument("--seconds-per-word", type=float, default=0.05, help="TTS playback speed")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the session this many times")
+    parser.add_argument("--no-realtime-audio", action="store_true",
+                        help="read the WAV files as fast as possible (no endpoint or calibration time)")
+    parser.add_argument("--budget-ms", type=float, help="fail if the p95 response time exceeds this")
+    parser.add_argument("--output", help="write turns and summary as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the assistant's own output")
+    args = parser.parse_args()
+
+    try:
+        import openai  # noqa: F401  (imported here so the first turn doesn't pay for it)
+    except ImportError:
+        raise SystemExit("The openai package is needed to talk to the stub LLM server")
+
+    transcripts = session_transcripts(args.repeat)
+    print("⏱️  Voice Assistant Latency Benchmark")
+    print("=" * 50)
+    print(f"{len(transcripts)} turns, STT {args.stt_ms:.0f} ms, LLM {args.llm_ms:.0f} ms, TTS {args.tts_ms:.0f} ms\n")
+    turns = run_session(transcripts, args.stt_ms, args.llm_ms, args.tts_ms, args.seconds_per_word,
+                        not args.no_realtime_audio, quiet=not args.verbose)
+    summary = summarize(turns)
+    print_report(turns, summary)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "summary": summary, "turns": turns}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"📝 Report written to {args.output}")
+    if args.budget_ms is not None and summary["response"]["p95_ms"] > args.budget_ms:
+        print(f"❌ p95 response time {summary['response']['p95_ms']:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
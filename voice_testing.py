@@ -0,0 +1,298 @@
+"""
+Headless Voice Assistant Harness
+Stand-ins that let AdvancedVoiceAssistant run without a microphone, speakers
+or network: scripted WAV utterances in place of the microphone, a recognizer
+that returns each utterance's transcript, a TTS engine that renders speech
+to PCM in memory, and a local HTTP server speaking the OpenAI chat
+completions API. Used by the pytest suite in tests/.
+"""
+
+import json
+import math
+import os
+import struct
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+from unittest import mock
+
+import pyttsx3
+import speech_recognition as sr
+
+
+SAMPLE_RATE = 16000
+LEAD_SILENCE = 0.6  # seconds before each scripted utterance (covers the 0.5s noise calibration)
+TAIL_SILENCE = 1.0  # seconds after it (longer than the recognizer's 0.8s pause threshold)
+
+
+def _tone(seconds: float, freq: float = 440.0, amplitude: float = 0.5) -> bytes:
+    n = int(seconds * SAMPLE_RATE)
+    return b"".join(struct.pack("<h", int(amplitude * 32767 * math.sin(2 * math.pi * freq * i / SAMPLE_RATE)))
+                    for i in range(n))
+
+
+def _silence(seconds: float) -> bytes:
+    return b"\x00\x00" * int(seconds * SAMPLE_RATE)
+
+
+def write_wav(path: str, frames: bytes) -> str:
+    """16 kHz mono 16-bit WAV"""
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(frames)
+    return path
+
+
+def speech_seconds(text: str) -> float:
+    """Length of the tone standing in for `text` in a scripted utterance"""
+    return max(0.4, 0.25 * len(text.split()))
+
+
+def write_utterance_wav(path: str, text: str, lead_silence: float = LEAD_SILENCE,
+                        tail_silence: float = TAIL_SILENCE) -> str:
+    """Silence, a tone about as long as `text` would take to say, then silence"""
+    return write_wav(path, _silence(lead_silence) + _tone(speech_seconds(text)) + _silence(tail_silence))
+
+
+def write_silence_wav(path: str, seconds: float = 1.5) -> str:
+    return write_wav(path, _silence(seconds))
+
+
+def build_script(directory: str, transcripts: Sequence[Optional[str]]) -> List[Tuple[str, Optional[str]]]:
+    """WAV fixtures for a list of transcripts (None = nothing said); returns (path, transcript) pairs"""
+    script = []
+    for i, text in enumerate(transcripts):
+        path = os.path.join(directory, f"utterance_{i:03d}.wav")
+        script.append((write_utterance_wav(path, text) if text else write_silence_wav(path), text))
+    return script
+
+
+class _RealtimeStream:
+    """Audio stream whose reads take as long as recording that audio would"""
+
+    def __init__(self, stream, sample_rate: int, frame_bytes: int):
+        self._stream = stream
+        self._sample_rate = sample_rate
+        self._frame_bytes = frame_bytes
+        self._frames = 0
+        self._started = time.perf_counter()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._frames += len(data) // self._frame_bytes
+        delay = self._started + self._frames / self._sample_rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class ScriptedMicrophone:
+    """Plays WAV files as successive microphone captures.
+
+    Each `with microphone as source` opens the next file as an sr.AudioFile;
+    once the script runs out, entering raises KeyboardInterrupt, which ends
+    the assistant's run() loop the same way Ctrl+C does. With `realtime`
+    the audio is delivered at recording speed, so noise calibration and
+    end-of-speech detection take as long as they would on a real microphone.
+    """
+
+    def __init__(self, script: Sequence[Tuple[str, Optional[str]]], realtime: bool = False):
+        self.script = list(script)
+        self.realtime = realtime
+        self.position = 0
+        self.current_transcript: Optional[str] = None
+        self.opened_at: List[float] = []  # when each capture started
+        self.captured_at: List[float] = []  # when each capture finished
+        self._file = None
+
+    @property
+    def remaining(self) -> int:
+        return len(self.script) - self.position
+
+    def __enter__(self):
+        if self.position >= len(self.script):
+            raise KeyboardInterrupt("script finished")
+        path, self.current_transcript = self.script[self.position]
+        self.position += 1
+        self._file = sr.AudioFile(path)
+        source = self._file.__enter__()
+        if self.realtime:
+            source.stream = _RealtimeStream(source.stream, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+        self.opened_at.append(time.perf_counter())
+        return source
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.__exit__(exc_type, exc_value, traceback)
+        self._file = None
+        self.captured_at.append(time.perf_counter())
+
+
+class ScriptedRecognizer(sr.Recognizer):
+    """Real energy-based listening on the WAV audio; recognition returns the scripted transcript"""
+
+    def __init__(self, microphone: ScriptedMicrophone, latency: float = 0.0):
+        super().__init__()
+        self.microphone = microphone
+        self.latency = latency
+        self.calls = 0
+
+    def recognize_google(self, audio_data, *args, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.microphone.current_transcript:
+            raise sr.UnknownValueError()
+        return self.microphone.current_transcript
+
+
+class _Voice:
+    def __init__(self, voice_id: str, name: str):
+        self.id = voice_id
+        self.name = name
+
+
+class RecordingTTS:
+    """pyttsx3 engine stand-in that renders each utterance to PCM in memory.
+
+    `latency` is added per runAndWait (engine start-up); with `realtime`
+    runAndWait also blocks for as long as the audio would play.
+    """
+
+    def __init__(self, latency: float = 0.0, realtime: bool = False, seconds_per_word: float = 0.05):
+        self.latency = latency
+        self.realtime = realtime
+        self.seconds_per_word = seconds_per_word
+        self.properties: Dict[str, object] = {
+            "voices": [_Voice("voice-0", "Test Voice Male"), _Voice("voice-1", "Test Voice Female")],
+            "rate": 200,
+            "volume": 1.0,
+        }
+        self.pcm = bytearray()
+        self.utterances: List[Dict] = []  # text, said_at, started_at, seconds
+        self._pending: List[Tuple[str, float]] = []
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def say(self, text: str, name: Optional[str] = None):
+        self._pending.append((text, time.perf_counter()))
+
+    def stop(self):
+        self._pending.clear()
+
+    def runAndWait(self):
+        if self.latency:
+            time.sleep(self.latency)
+        for text, said_at in self._pending:
+            seconds = max(self.seconds_per_word * len(text.split()), 0.05)
+            self.pcm.extend(_tone(seconds, amplitude=0.2))
+            self.utterances.append({"text": text, "said_at": said_at, "started_at": time.perf_counter(),
+                                    "seconds": seconds})
+            if self.realtime:
+                time.sleep(seconds)
+        self._pending.clear()
+
+    @property
+    def spoken(self) -> List[str]:
+        return [u["text"] for u in self.utterances]
+
+
+class StubLLMServer:
+    """Local server for POST .../chat/completions in the OpenAI response format.
+
+    A non-200 `status` makes every completion fail with that HTTP error.
+    """
+
+    def __init__(self, reply: str = "This is a stub answer.", latency: float = 0.0, status: int = 200):
+        self.reply = reply
+        self.latency = latency
+        self.status = status
+        self.requests: List[Dict] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                server.requests.append(body)
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                if server.status != 200:
+                    self.send_error(server.status)
+                    return
+                payload = json.dumps({
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": server.reply}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, name="stub-llm", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def headless_env(llm_url: Optional[str] = None) -> Dict[str, str]:
+    """Environment for a hermetic assistant: only the stub OpenAI endpoint, no local SLM or FAQ router"""
+    env = {
+        "OPENAI_API_KEY": "sk-test" if llm_url else "",
+        "GEMINI_API_KEY": "",
+        "GOOGLE_API_KEY": "",
+        "LLM_PRIORITY": "openai",
+        "LOCAL_SLM_ENABLED": "0",
+        "FAQ_ROUTER": "0",
+    }
+    if llm_url:
+        env["OPENAI_BASE_URL"] = llm_url
+    return env
+
+
+def headless_assistant(script: Sequence[Tuple[str, Optional[str]]], tts: Optional[RecordingTTS] = None,
+                       stt_latency: float = 0.0, wake_word: str = "pari", realtime_audio: bool = False):
+    """AdvancedVoiceAssistant wired to a scripted microphone, recognizer and recording TTS"""
+    from advanced_voice_assistant import AdvancedVoiceAssistant
+
+    tts = tts or RecordingTTS()
+    microphone = ScriptedMicrophone(script, realtime_audio)
+    with mock.patch.object(pyttsx3, "init", lambda *args, **kwargs: tts), \
+            mock.patch.object(sr, "Microphone", lambda *args, **kwargs: microphone):
+        assistant = AdvancedVoiceAssistant()
+    assistant.recognizer = ScriptedRecognizer(microphone, stt_latency)
+    assistant.wake_word = wake_word
+    return assistant